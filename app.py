@@ -2,10 +2,10 @@ import streamlit as st
 import os
 import sys
 from pathlib import Path
-import tempfile
 import subprocess
 import json
 import time
+import uuid
 
 # Proje dizinini Python path'ine ekle
 project_root = Path(__file__).parent
@@ -13,7 +13,10 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from config import *
-from utils.embeddings import EmbeddingManager
+from utils.embeddings import EmbeddingManager, get_embedding_model, has_persisted_index, release_shared_vectorstore
+from utils.embedding_cache import get_embedding_cache, reset_embedding_caches
+from utils.ingestion_manifest import IngestionManifest, file_sha256, store_pdf
+from utils.ingestion_jobs import ACTIVE_STATUSES, JOB_STAGES, get_job_runner
 from utils.rag_chain import RAGChain
 
 # PyMuPDF4LLM PDF işleyiciyi güvenli şekilde import et
@@ -27,7 +30,7 @@ try:
     PYMUPDF4LLM_AVAILABLE = True
     
     # PyMuPDF4LLM işleyiciyi import et
-    from utils.advanced_multi_pdf_processor import AdvancedPDFProcessor, check_all_dependencies
+    from utils.advanced_multi_pdf_processor import AdvancedPDFProcessor, EXTRACTOR_VERSION, check_all_dependencies
     
     # Mevcut durumu kontrol et
     status, available_count = check_all_dependencies()
@@ -47,7 +50,6 @@ st.set_page_config(
 # Dizinleri oluştur
 PDF_DIR.mkdir(parents=True, exist_ok=True)
 VECTOR_STORE_DIR.mkdir(parents=True, exist_ok=True)
-DEBUG_DIR = Path("debug_output")
 DEBUG_DIR.mkdir(exist_ok=True)
 
 # Session state başlat
@@ -61,6 +63,10 @@ if 'developer_mode' not in st.session_state:
     st.session_state.developer_mode = False
 if 'selected_model' not in st.session_state:
     st.session_state.selected_model = OLLAMA_MODEL
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+# Oturumu paylaşılan modelde etkin say - her etkileşimde yenilenir, boşta kalan oturumlar düşer
+get_embedding_model(EMBEDDING_MODEL, st.session_state.session_id)
 
 
 #Ollama'da mevcut modelleri getir
@@ -82,74 +88,63 @@ def get_available_models():
         return [OLLAMA_MODEL]  # Varsayılan model
 
 
-# PDF'leri işleme fonksiyonu
-def process_uploaded_pdfs(uploaded_files, debug_mode=False):
-    """Yüklenen PDF'leri PyMuPDF4LLM ile işle"""
+# PDF'leri arka plan işine gönderme fonksiyonu
+def submit_ingestion_job(uploaded_files, debug_mode=False, file_name=None):
+    """Yüklenen PDF'leri diske yaz ve arka plan işleme kuyruğuna gönder
+
+    Çıkarma, parçalama ve embedding arka planda çalışır; bu sırada sohbet
+    mevcut vektör veritabanıyla devam eder. İşin kimliğini döndürür.
+    file_name verilirse (tek dosya) yükleme bu isimle kaydedilir.
+    """
     
     # PyMuPDF4LLM kontrolü
     if not PYMUPDF4LLM_AVAILABLE or not AdvancedPDFProcessor:
         st.error("❌ PyMuPDF4LLM mevcut değil! Lütfen kurun: pip install pymupdf4llm")
-        return []
+        return None
     
     # Developer modundan chunk size al
     chunk_size = st.session_state.get('chunk_size', CHUNK_SIZE)
     
-    # PDF işleyici oluştur
-    pdf_processor = AdvancedPDFProcessor(chunk_size, CHUNK_OVERLAP, debug=debug_mode)
-    st.info("🤖 PyMuPDF4LLM işleyici kullanılıyor...")
+    # Aynı içerik + aynı ayarlarla indekslenmiş PDF'ler işte atlanır - çıkarıcı sürümü,
+    # kademeli çıkarma veya embedding modeli/arka ucu değişirse dosya yeniden indekslenir
+    ingest_settings = {
+        "extractor": "pymupdf4llm_merged",
+        "extractor_version": EXTRACTOR_VERSION,
+        "tiered": PDF_TIERED_EXTRACTION,
+        "chunk_size": chunk_size,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "chunker": CHUNK_STRATEGY,
+        "embedding_model": EMBEDDING_MODEL,
+        "embed_backend": EMBED_BACKEND
+    }
     
-    all_documents = []
-    #pdf işleme kısmı
-    with st.spinner("PDF'ler işleniyor..."):
-        for uploaded_file in uploaded_files:
-            # Geçici dosya oluştur
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(uploaded_file.getbuffer())
-                tmp_path = tmp_file.name
-            
-            # PDF'i işle
-            st.write(f"🔄 {uploaded_file.name} işleniyor...")
-            
-            try:
-                documents = pdf_processor.process_pdf(tmp_path)
-                all_documents.extend(documents)
-                
-                # Başarı mesajı
-                file_chunks = [d for d in documents if d.metadata.get('source') == uploaded_file.name]
-                st.success(f"✅ {uploaded_file.name} işlenmeye devam ediyor ")
-                
-                # PyMuPDF4LLM istatistikleri
-                if file_chunks:
-                    # Markdown özelliklerini göster
-                    total_markdown_features = sum(doc.metadata.get('markdown_features', 0) for doc in file_chunks)
-                    if total_markdown_features > 0:
-                        st.info(f"📝 Markdown özellikleri: {total_markdown_features} (başlık, tablo, vurgular)")
-                
-            except Exception as e:
-                st.error(f"❌ {uploaded_file.name} işlenirken hata: {str(e)}")
-                continue
-            
-            # Geçici dosyayı sil
-            os.unlink(tmp_path)
-            
-            # Kalıcı olarak kaydet
-            pdf_path = PDF_DIR / uploaded_file.name
-            with open(pdf_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+    # Yüklemeler içerik adresli son konumlarına bir kez yazılır - iş bu dosyaları okur
+    files = []
+    for uploaded_file in uploaded_files:
+        file_hash = file_sha256(uploaded_file.getbuffer())
+        pdf_path, created = store_pdf(uploaded_file.getbuffer(), file_hash, PDF_DIR)
+        files.append({"name": file_name or uploaded_file.name, "path": str(pdf_path), "hash": file_hash,
+                      "created": created})
     
-    return all_documents
+    settings = {
+        "ingest": ingest_settings,
+        # Developer modundan paralel işçi sayısını al
+        "workers": st.session_state.get('pdf_workers', PDF_PROCESS_WORKERS),
+        "debug": debug_mode
+    }
+    return get_job_runner().submit(files, settings)
 
-def create_or_update_vectorstore(documents):
-    """Vektör veritabanını oluştur veya güncelle"""
-    embedding_manager = EmbeddingManager(EMBEDDING_MODEL, str(VECTOR_STORE_DIR))
-    
-    if st.session_state.vectorstore is None:
-        with st.spinner("Vektör veritabanı oluşturuluyor..."):
-            st.session_state.vectorstore = embedding_manager.create_vectorstore(documents)
-    else:
-        with st.spinner("Yeni dökümanlar ekleniyor..."):
-            embedding_manager.add_documents(documents)
-            st.session_state.vectorstore = embedding_manager.load_vectorstore()
+def reload_vectorstore():
+    """Paylaşılan vektör veritabanına bağlan ve RAG chain'i güncelle
+
+    Bağlantı süreçte bir kez açılır; diğer oturumların ve işlerin yazdıkları
+    yeniden yüklemeden görünür.
+    """
+    embedding_manager = EmbeddingManager(EMBEDDING_MODEL, str(VECTOR_STORE_DIR),
+                                         session_id=st.session_state.session_id)
+    st.session_state.vectorstore = embedding_manager.load_vectorstore()
+    # Model ve indeks arka planda belleğe alınır (süreçte bir kez)
+    embedding_manager.warm_up()
     
     # RAG chain'i güncelle - seçili model ve temperature ile
     temperature = st.session_state.get('temperature', 0.0)
@@ -160,6 +155,72 @@ def create_or_update_vectorstore(documents):
         temperature=temperature
     )
 
+def delete_indexed_document(file_name):
+    """Bir PDF'in parçalarını vektör veritabanından ve saklanan dosyasını diskten sil"""
+    embedding_manager = EmbeddingManager(EMBEDDING_MODEL, str(VECTOR_STORE_DIR),
+                                         session_id=st.session_state.session_id)
+    result = embedding_manager.delete_document(file_name)
+    
+    # Başka bir kayıt aynı içeriği kullanmıyorsa saklanan PDF'i de sil
+    used_hashes = {entry.get("file_hash") for entry in embedding_manager.manifest.entries.values()}
+    for entry in result["removed_entries"]:
+        if entry.get("file_hash") not in used_hashes:
+            (PDF_DIR / f"{entry['file_hash']}.pdf").unlink(missing_ok=True)
+    return result["deleted_count"]
+
+def sync_finished_jobs(jobs):
+    """Bu oturumun son bakışından sonra biten iş varsa yeni indeksi kullanmaya başla
+
+    Oturum zaten bağlıysa paylaşılan indeks güncel - sadece ilk indekste bağlanılır.
+    """
+    finished = [job["finished_at"] for job in jobs if job["status"] == "done" and job["finished_at"]]
+    if finished and max(finished) > (st.session_state.jobs_synced_at or ""):
+        st.session_state.jobs_synced_at = max(finished)
+        if st.session_state.vectorstore is None or st.session_state.rag_chain is None:
+            reload_vectorstore()
+        return True
+    return False
+
+def show_job(job):
+    """Tek bir işin aşama ilerlemesi ve mesajları"""
+    stage_labels = {"extract": "📄 Çıkarma", "chunk": "✂️ Parçalama", "embed": "🧮 Embedding", "upsert": "💾 Yazma"}
+    status_labels = {"queued": "⏳ Kuyrukta", "running": "🔄 Çalışıyor", "done": "✅ Tamamlandı", "failed": "❌ Başarısız"}
+    file_names = ", ".join(file_info["name"] for file_info in job["files"])
+    
+    with st.expander(f"{status_labels.get(job['status'], job['status'])} - {file_names}",
+                     expanded=job["status"] in ACTIVE_STATUSES):
+        if job["status"] == "running":
+            for stage in JOB_STAGES:
+                entry = job["progress"][stage]
+                if entry["total"]:
+                    st.progress(min(entry["done"] / entry["total"], 1.0),
+                                text=f"{stage_labels[stage]}: {entry['done']}/{entry['total']}")
+                elif entry["done"]:
+                    st.caption(f"{stage_labels[stage]}: {entry['done']}")
+        
+        for message in job["messages"]:
+            getattr(st, message["level"], st.write)(message["text"])
+        
+        result = job.get("result") or {}
+        if job["status"] == "done":
+            skipped_count = len(result.get("skipped_files", []))
+            if result.get("chunk_count"):
+                st.metric("📊 İşlenen", f"{result['chunk_count']} parça", f"{result['char_count']:,} karakter")
+            elif skipped_count == len(job["files"]):
+                st.success(f"✅ {skipped_count} PDF zaten indekslenmiş, işlem gerekmedi")
+        elif job["status"] == "failed" and job.get("error"):
+            st.error(f"❌ {job['error']}")
+
+# Session açıldığında bitmiş işler zaten görülmüş sayılır
+if 'jobs_synced_at' not in st.session_state:
+    finished = [job["finished_at"] for job in get_job_runner().store.list_jobs() if job["finished_at"]]
+    st.session_state.jobs_synced_at = max(finished) if finished else None
+
+# Kayıtlı indeks varsa yeni oturum hemen bağlanır - yeniden yükleme/embedding gerekmez
+if (AUTO_ATTACH_INDEX and st.session_state.vectorstore is None
+        and has_persisted_index(str(VECTOR_STORE_DIR))):
+    reload_vectorstore()
+
 # Ana başlık
 status_colors = {
     'ready': '🟢',
@@ -167,7 +228,11 @@ status_colors = {
     'error': '🔴',
     'idle': '⚪'
 }
-system_status = 'ready' if st.session_state.rag_chain else 'idle'
+active_jobs = get_job_runner().store.list_jobs(statuses=ACTIVE_STATUSES)
+if active_jobs:
+    system_status = 'processing'
+else:
+    system_status = 'ready' if st.session_state.rag_chain else 'idle'
 
 robot_class = {
     'ready': 'robot-ready',
@@ -211,29 +276,37 @@ with st.sidebar:
     st.caption("40+ dil • Profesyonel AI çeviri")
     if uploaded_files:
         if st.button("🚀 İşle", type="primary", use_container_width=True):
-            documents = process_uploaded_pdfs(uploaded_files, debug_mode)
-            
-            if documents:
-                create_or_update_vectorstore(documents)
-                st.success(f"✅ {len(uploaded_files)} PDF işlendi!")
-                
-                if debug_mode:
-                    st.info("📁 Debug dosyaları kaydedildi")
-                
-                # Kompakt istatistikler
-                total_chunks = len(documents)
-                total_chars = sum(len(doc.page_content) for doc in documents)
-                
-                st.metric("📊 İşlenen", f"{total_chunks} parça", f"{total_chars:,} karakter")
-            else:
-                st.error("❌ İşlem başarısız!")
+            job_id = submit_ingestion_job(uploaded_files, debug_mode)
+            if job_id:
+                st.success("📥 PDF'ler işleme kuyruğuna alındı - bu sırada soru sormaya devam edebilirsiniz")
+                active_jobs = get_job_runner().store.list_jobs(statuses=ACTIVE_STATUSES)
+    
+    # Arka plan işleri - çalışan iş varken belirli aralıklarla yenilenir
+    def show_ingestion_jobs():
+        jobs = get_job_runner().store.list_jobs(limit=5)
+        still_active = any(job["status"] in ACTIVE_STATUSES for job in jobs)
+        if sync_finished_jobs(jobs) or (active_jobs and not still_active):
+            # Yeni indeks hazır ya da işler bitti - sohbet alanı dahil tüm sayfayı yenile
+            st.rerun()
+        if jobs:
+            st.markdown("### 📥 İşlemler")
+            for job in jobs:
+                show_job(job)
+    
+    if hasattr(st, "fragment"):
+        st.fragment(show_ingestion_jobs, run_every=JOB_POLL_SECONDS if active_jobs else None)()
+    else:
+        show_ingestion_jobs()
+        if active_jobs and st.button("🔄 Durumu Yenile", use_container_width=True):
+            st.rerun()
     
     # Debug dosyaları - sadece debug modda
     if debug_mode and DEBUG_DIR.exists():
-        debug_files = list(DEBUG_DIR.glob("*.txt"))
+        debug_files = list(DEBUG_DIR.glob("*.txt*")) + list(DEBUG_DIR.glob("*.jsonl*"))
         if debug_files:
             st.markdown("### 🐛 Debug")
-            st.caption(f"{len(debug_files)} dosya oluşturuldu")
+            debug_size = sum(path.stat().st_size for path in debug_files)
+            st.caption(f"{len(debug_files)} dosya oluşturuldu ({debug_size / 1024 / 1024:.1f}/{DEBUG_MAX_MB} MB)")
             
             if st.button("🗑️ Temizle", use_container_width=True):
                 for file in debug_files:
@@ -329,7 +402,20 @@ with st.sidebar:
         
         if chunk_size != st.session_state.get('chunk_size', CHUNK_SIZE):
             st.session_state.chunk_size = chunk_size
-            st.info(f"💡 Yeni chunk size: {chunk_size} (Yeniden PDF yükleyin)")
+            st.info(f"💡 Yeni chunk size: {chunk_size} (PDF'leri yeniden işleyin - sayfalar önbellekten okunur)")
+        
+        # Paralel PDF işleme
+        pdf_workers = st.slider(
+            "PDF İşçi Sayısı",
+            min_value=1,
+            max_value=max(os.cpu_count() or 1, PDF_PROCESS_WORKERS),
+            value=st.session_state.get('pdf_workers', PDF_PROCESS_WORKERS),
+            step=1,
+            help="Aynı anda işlenecek PDF sayısı (1 = sıralı)"
+        )
+        
+        if pdf_workers != st.session_state.get('pdf_workers', PDF_PROCESS_WORKERS):
+            st.session_state.pdf_workers = pdf_workers
         
         # Memory Durumu
         st.write("**Hafıza Durumu:**")
@@ -366,7 +452,55 @@ with st.sidebar:
             pdf_count = len(list(PDF_DIR.glob("*.pdf"))) if PDF_DIR.exists() else 0
             st.info(f"📄 İşlenen PDF sayısı: {pdf_count}")
             
+            # Paylaşılan embedding modeli - süreçte bir kez yüklenir
+            model_stats = get_embedding_model(EMBEDDING_MODEL, st.session_state.session_id).stats()
+            if not model_stats['loaded']:
+                st.info("🧠 Embedding modeli arka planda yükleniyor...")
+            else:
+                st.info(f"🧠 Embedding modeli ({model_stats['backend']}): {model_stats['load_seconds']:.1f} sn'de yüklendi, "
+                        f"~{model_stats['memory_mb']:.0f} MB ({model_stats['sessions']} etkin oturum paylaşıyor, "
+                        f"oturum başına ~{model_stats['memory_per_session_mb']:.0f} MB)")
+            st.caption(f"Süreç belleği: {model_stats['process_rss_mb']:.0f} MB")
+            if model_stats['encoded_count']:
+                st.caption(f"⚡ Kodlama hızı: {model_stats['chunks_per_second']:.1f} parça/sn "
+                           f"({model_stats['workers']} süreç, grup boyutu {model_stats['encode_batch_size']})")
+            
+            # Kalıcı embedding önbelleği
+            if EMBED_CACHE_ENABLED:
+                cache_name = get_embedding_model(EMBEDDING_MODEL).cache_name
+                cache_stats = get_embedding_cache(str(EMBED_CACHE_DIR), cache_name).stats()
+                st.info(f"🗄️ Embedding önbelleği: {cache_stats['vectors']:,} vektör ({cache_stats['size_mb']:.1f} MB), "
+                        f"bu süreçte {cache_stats['hits']:,} isabet / {cache_stats['misses']:,} hesaplama")
+            
+            
+        
+        # Tek döküman bakımı - sadece o dökümanın parçaları silinir / yeniden işlenir
+        indexed_files = IngestionManifest(str(VECTOR_STORE_DIR)).indexed_files()
+        if indexed_files:
+            st.write("**İndekslenmiş Dökümanlar:**")
+            selected_file = st.selectbox(
+                "Döküman seç:",
+                sorted(indexed_files),
+                format_func=lambda name: f"{name} ({indexed_files[name].get('chunk_count') or 0} parça)"
+            )
+            if active_jobs:
+                st.caption("⏳ İşleme sürerken döküman silinemez/değiştirilemez")
             
+            if st.button("🗑️ Dökümanı Sil", disabled=bool(active_jobs),
+                         help="Sadece seçili PDF'in parçalarını sil - diğerleri yeniden embed edilmez"):
+                deleted_count = delete_indexed_document(selected_file)
+                st.success(f"✅ {selected_file}: {deleted_count} parça silindi")
+                st.rerun()
+            
+            replacement = st.file_uploader("Yeni sürüm:", type="pdf", key="replacement_pdf",
+                                           help="Seçili dökümanın yerine geçecek PDF")
+            if replacement and st.button("🔁 Yeni Sürümle Değiştir", disabled=bool(active_jobs)):
+                # Aynı isimle yüklenen sürüm öncekinin yerini alır: değişen sayfalar işlenir,
+                # eski parçalar yenileri yazıldıktan sonra silinir (o ana kadar eski sürüm cevap verir)
+                job_id = submit_ingestion_job([replacement], file_name=selected_file)
+                if job_id:
+                    st.success(f"📥 {selected_file} yeni sürümü işleme kuyruğuna alındı (iş #{job_id})")
+                st.rerun()
         
         # Clear All Data Butonu
         st.write("**Tehlikeli İşlemler:**")
@@ -374,25 +508,25 @@ with st.sidebar:
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("🗑️ VektörDB Sil", help="Sadece vektör veritabanını sil"):
-                # Vektör veritabanını sil
-                import shutil
-                if VECTOR_STORE_DIR.exists():
-                    shutil.rmtree(VECTOR_STORE_DIR)
+            if st.button("🗑️ VektörDB Sil", help="Sadece vektör veritabanını sil", disabled=bool(active_jobs)):
+                # Tüm parçaları paylaşılan bağlantı üzerinden sil - açık oturumlar geçerli kalır
+                EmbeddingManager(EMBEDDING_MODEL, str(VECTOR_STORE_DIR)).clear_vectorstore()
                 
                 # Session state temizle
                 st.session_state.vectorstore = None
                 st.session_state.rag_chain = None
                 st.session_state.chat_history = []
                 
-                # Boş dizin oluştur
-                VECTOR_STORE_DIR.mkdir(exist_ok=True)
-                
                 st.success("✅ Vektör veritabanı temizlendi!")
                 st.rerun()
         
         with col2:
-            if st.button("🚨 Herşeyi Sil", help="PDF'ler + VektörDB + Debug + Hafıza"):
+            if st.button("🚨 Herşeyi Sil", help="PDF'ler + VektörDB + Debug + Hafıza", disabled=bool(active_jobs)):
+                # Dizin silinecek - paylaşılan bağlantıyı bırak, sonraki erişim yeniden açar
+                release_shared_vectorstore(str(VECTOR_STORE_DIR))
+                # İş geçmişi açık iş deposu üzerinden temizlenir (dosya silinmez)
+                get_job_runner().store.clear()
+                
                 # clean.py'deki fonksiyonu kullan
                 try:
                     # Clean.py modülünü import et ve fonksiyonu çağır
@@ -423,7 +557,7 @@ with st.sidebar:
                         
                         # Debug dosyalarını sil
                         if DEBUG_DIR.exists():
-                            for debug_file in DEBUG_DIR.glob("*.txt"):
+                            for debug_file in [*DEBUG_DIR.glob("*.txt*"), *DEBUG_DIR.glob("*.jsonl*")]:
                                 debug_file.unlink()
                         
                         # Boş dizinleri yeniden oluştur
@@ -431,6 +565,9 @@ with st.sidebar:
                         PDF_DIR.mkdir(parents=True, exist_ok=True)
                         DEBUG_DIR.mkdir(exist_ok=True)
                     
+                    # Embedding önbelleği silindi - bu süreçte açık önbellekler boş dizin ve tablolarla yeniden açılır
+                    reset_embedding_caches(str(EMBED_CACHE_DIR))
+                    
                     # Session state temizle
                     st.session_state.vectorstore = None
                     st.session_state.rag_chain = None
@@ -764,7 +901,11 @@ if st.session_state.rag_chain:
                         with st.expander("📎 Kaynaklar"):
                             for i, doc in enumerate(response["source_documents"]):
                                 source = doc.metadata.get("source", "Bilinmeyen")
-                                page = doc.metadata.get("page", "?")
+                                # Parçanın kapsadığı gerçek sayfalar (eski indekslerde blok sayfası)
+                                page = doc.metadata.get("chunk_page_start", doc.metadata.get("page", "?"))
+                                page_end = doc.metadata.get("chunk_page_end", page)
+                                if page_end != page:
+                                    page = f"{page}-{page_end}"
                                 chunk_id = doc.metadata.get("chunk_id", "?")
                                 
                                 # Çıkarma yöntemi bilgisi
@@ -775,6 +916,10 @@ if st.session_state.rag_chain:
                                 if method:
                                     if method == "pymupdf4llm" or "pymupdf4llm" in method:
                                         st.write(f"**Çıkarma Yöntemi:** 🤖 PyMuPDF4LLM (Markdown)")
+                                    elif method == "plain_text_merged":
+                                        st.write(f"**Çıkarma Yöntemi:** ⚡ PyMuPDF (Düz Metin)")
+                                    elif method == "tiered_merged":
+                                        st.write(f"**Çıkarma Yöntemi:** ⚡🤖 PyMuPDF + PyMuPDF4LLM (Kademeli)")
                                     else:
                                         st.write(f"**Çıkarma Yöntemi:** {method}")
                                 
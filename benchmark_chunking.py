@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Parçalayıcı karşılaştırması: LangChain RecursiveCharacterTextSplitter vs
+yapıyı koruyan Markdown parçalayıcı
+
+Parça sayısı, indeks boyutu, hız (karakter/sn) ve geri getirme isabet oranı
+raporlanır. İsabet için belgelerden rastgele cümleler soru olarak kullanılır;
+ilk k sonuçtan biri cümleyi bütün olarak içeriyorsa isabet sayılır.
+
+Kullanım: python benchmark_chunking.py [belge1.pdf ...]  (varsayılan: data/pdfs)
+"""
+
+import random
+import re
+import sys
+import time
+from typing import List
+
+import numpy as np
+from langchain.schema import Document
+from config import CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL, PDF_DIR
+from utils.advanced_multi_pdf_processor import AdvancedPDFProcessor
+from utils.embeddings import get_embedding_model
+from utils.ingestion_manifest import file_sha256_path
+
+STRATEGIES = ["recursive", "markdown"]
+QUERY_COUNT = 200
+TOP_K = 4
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def load_documents(pdf_paths: List[str]) -> List[Document]:
+    """Sayfa bloklarını çıkar (sayfa önbelleği kullanılır)"""
+    processor = AdvancedPDFProcessor()
+    documents = []
+    for pdf_path in pdf_paths:
+        cached = processor.page_cache.load(file_sha256_path(pdf_path), pdf_path)
+        documents.extend(cached if cached is not None else processor.extract_documents(pdf_path))
+    return documents
+
+
+def sample_queries(documents: List[Document]) -> List[str]:
+    """Belgelerden soru olarak kullanılacak cümleleri seç"""
+    sentences = []
+    for doc in documents:
+        for sentence in re.split(r"(?<=[.!?])\s+", doc.page_content):
+            sentence = normalize_text(sentence)
+            if 40 <= len(sentence) <= 300 and not sentence.startswith(("|", "#")):
+                sentences.append(sentence)
+    random.Random(42).shuffle(sentences)
+    return sentences[:QUERY_COUNT]
+
+
+def benchmark(pdf_paths: List[str]):
+    documents = load_documents(pdf_paths)
+    total_chars = sum(len(doc.page_content) for doc in documents)
+    queries = sample_queries(documents)
+
+    embeddings = get_embedding_model(EMBEDDING_MODEL)
+    query_vectors = np.array(embeddings.embed_documents(queries)) if queries else None
+
+    print(f"📚 {len(pdf_paths)} PDF, {len(documents)} sayfa bloğu, {total_chars:,} karakter, {len(queries)} soru")
+    print(f"⚙️ chunk_size={CHUNK_SIZE}, chunk_overlap={CHUNK_OVERLAP}, top_k={TOP_K}\n")
+
+    for strategy in STRATEGIES:
+        processor = AdvancedPDFProcessor(use_page_cache=False, chunk_strategy=strategy)
+
+        start_time = time.time()
+        chunks = processor.split_documents(documents)
+        split_seconds = time.time() - start_time
+
+        chunk_chars = sum(len(chunk.page_content) for chunk in chunks)
+        chunk_vectors = np.array(embeddings.embed_documents([chunk.page_content for chunk in chunks]))
+        index_bytes = chunk_chars + chunk_vectors.nbytes
+
+        hits = 0
+        if queries:
+            normalized_chunks = [normalize_text(chunk.page_content) for chunk in chunks]
+            scores = query_vectors @ chunk_vectors.T
+            for query, row in zip(queries, scores):
+                top = np.argsort(-row)[:TOP_K]
+                if any(query in normalized_chunks[i] for i in top):
+                    hits += 1
+
+        print(f"🔹 {strategy}")
+        print(f"  📦 Parça: {len(chunks):,} (ortalama {chunk_chars // max(len(chunks), 1):,} karakter)")
+        print(f"  💾 İndeks: {index_bytes / 1024 / 1024:.2f} MB (metin {chunk_chars / max(total_chars, 1):.2f}x)")
+        print(f"  ⚡ Hız: {total_chars / max(split_seconds, 1e-9) / 1e6:.2f} M karakter/sn")
+        if queries:
+            print(f"  🎯 İsabet@{TOP_K}: {hits / len(queries):.3f}")
+        print()
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [str(path) for path in sorted(PDF_DIR.glob("*.pdf"))]
+    if not paths:
+        print(__doc__)
+        sys.exit(1)
+    benchmark(paths)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Embedding hızı karşılaştırması: geliş sırasıyla gruplama vs uzunluğa göre
+sıralı gruplama, farklı grup boyutları ve süreç sayıları
+
+Her yapılandırma için parça/sn raporlanır. Embedding önbelleği kullanılmaz.
+
+Kullanım: python benchmark_embedding.py [belge1.pdf ...]  (varsayılan: data/pdfs)
+"""
+
+import os
+import sys
+import time
+from typing import List
+
+from config import EMBEDDING_MODEL, PDF_DIR
+from utils.advanced_multi_pdf_processor import AdvancedPDFProcessor
+from utils.embeddings import SharedEmbeddings
+from utils.ingestion_manifest import file_sha256_path
+
+BATCH_SIZES = [16, 32, 64]
+WORKER_COUNTS = sorted({1, max(1, min(4, (os.cpu_count() or 1) - 1))})
+
+
+def load_chunks(pdf_paths: List[str]) -> List[str]:
+    """Parça metinleri (sayfa önbelleği kullanılır)"""
+    processor = AdvancedPDFProcessor()
+    texts = []
+    for pdf_path in pdf_paths:
+        cached = processor.page_cache.load(file_sha256_path(pdf_path), pdf_path)
+        documents = cached if cached is not None else processor.extract_documents(pdf_path)
+        texts.extend(chunk.page_content for chunk in processor.iter_chunks(documents))
+    return texts
+
+
+def measure(encode, texts: List[str]) -> float:
+    start_time = time.time()
+    encode(texts)
+    return len(texts) / max(time.time() - start_time, 1e-9)
+
+
+def benchmark(pdf_paths: List[str]):
+    texts = load_chunks(pdf_paths)
+    lengths = sorted(len(text) for text in texts)
+    print(f"📚 {len(pdf_paths)} PDF, {len(texts)} parça "
+          f"(uzunluk min {lengths[0] if lengths else 0}, medyan {lengths[len(lengths) // 2] if lengths else 0}, "
+          f"maks {lengths[-1] if lengths else 0})\n")
+
+    for workers in WORKER_COUNTS:
+        for batch_size in BATCH_SIZES:
+            model = SharedEmbeddings(EMBEDDING_MODEL, encode_batch_size=batch_size, workers=workers)
+            model.embed_documents(texts[:batch_size])  # Isınma (havuz açılışı dahil)
+
+            def arrival_order(items):
+                # Eski davranış: geliş sırasıyla sabit gruplar
+                for start in range(0, len(items), batch_size):
+                    model.model.embed_documents(items[start:start + batch_size])
+
+            print(f"🔹 {workers} süreç, grup boyutu {batch_size}")
+            if workers == 1:
+                print(f"  🐢 Geliş sırası: {measure(arrival_order, texts):.1f} parça/sn")
+            print(f"  ⚡ Uzunluğa göre sıralı: {measure(model.embed_documents, texts):.1f} parça/sn")
+            model.close_pool()
+        print()
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [str(path) for path in sorted(PDF_DIR.glob("*.pdf"))]
+    if not paths:
+        print(__doc__)
+        sys.exit(1)
+    benchmark(paths)
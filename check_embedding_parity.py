@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Embedding arka uçlarının karşılaştırması: PyTorch (fp32) vs ONNX Runtime (int8)
+
+Aynı parçalar iki arka uçla kodlanır ve raporlanır:
+- Vektör sapması: eşleşen vektörlerin kosinüs benzerliği (ortalama, en düşük, %1'lik dilim)
+- Arama uyumu: örnek sorgularda ilk k sonucun örtüşmesi (recall@k)
+- Hız (parça/sn) ve model belleği
+
+Embedding önbelleği kullanılmaz. Sorgular parçalardan alınan cümlelerdir.
+
+Kullanım: python check_embedding_parity.py [belge1.pdf ...]  (varsayılan: data/pdfs)
+"""
+
+import random
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from benchmark_embedding import load_chunks
+from config import EMBEDDING_MODEL, PDF_DIR
+from utils.embeddings import SharedEmbeddings
+
+BACKENDS = ["torch", "onnx"]
+QUERY_COUNT = 50
+RECALL_KS = [4, 15]  # 15 = RAGChain retriever'ının k değeri
+
+
+def sample_queries(texts: List[str], count: int = QUERY_COUNT) -> List[str]:
+    """Parçalardan rastgele, yeterince uzun cümleler"""
+    sentences = [sentence.strip() for text in texts for sentence in text.split(".")
+                 if len(sentence.split()) >= 6]
+    return random.Random(0).sample(sentences, min(count, len(sentences)))
+
+
+def encode(model: SharedEmbeddings, texts: List[str]):
+    start_time = time.time()
+    vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+    return vectors, len(texts) / max(time.time() - start_time, 1e-9)
+
+
+def check_parity(pdf_paths: List[str]):
+    texts = load_chunks(pdf_paths)
+    queries = sample_queries(texts)
+    print(f"📚 {len(pdf_paths)} PDF, {len(texts)} parça, {len(queries)} örnek sorgu\n")
+
+    results = {}
+    for backend in BACKENDS:
+        model = SharedEmbeddings(EMBEDDING_MODEL, backend=backend)
+        model.embed_documents(texts[:8])  # Isınma
+        chunk_vectors, speed = encode(model, texts)
+        query_vectors = np.asarray([model.embed_query(query) for query in queries], dtype=np.float32)
+        results[backend] = (chunk_vectors, query_vectors)
+        print(f"🔹 {backend}: {speed:.1f} parça/sn, yükleme {model.load_seconds:.1f} sn, ~{model.memory_mb:.0f} MB")
+
+    (base_chunks, base_queries), (onnx_chunks, onnx_queries) = (results[name] for name in BACKENDS)
+
+    # Vektörler normalize - nokta çarpımı kosinüs benzerliği
+    similarity = (base_chunks * onnx_chunks).sum(axis=1)
+    print(f"\n📐 Vektör uyumu (kosinüs): ortalama {similarity.mean():.4f}, "
+          f"en düşük {similarity.min():.4f}, %1'lik dilim {np.percentile(similarity, 1):.4f}")
+
+    base_ranking = np.argsort(-(base_queries @ base_chunks.T), axis=1)
+    onnx_ranking = np.argsort(-(onnx_queries @ onnx_chunks.T), axis=1)
+    for k in RECALL_KS:
+        recall = np.mean([len(set(base[:k]) & set(onnx[:k])) / min(k, len(texts))
+                          for base, onnx in zip(base_ranking, onnx_ranking)])
+        print(f"🎯 recall@{k}: {recall:.3f}")
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [str(path) for path in sorted(PDF_DIR.glob("*.pdf"))]
+    if not paths:
+        print(__doc__)
+        sys.exit(1)
+    check_parity(paths)
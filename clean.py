@@ -5,6 +5,7 @@ Bu scripti çalıştırdıktan sonra PDF'leri yeniden yükleyin
 """
 
 import shutil
+import sqlite3
 from pathlib import Path
 
 def cleanup_all_data():
@@ -33,10 +34,37 @@ def cleanup_all_data():
     else:
         print("ℹ️ PDF klasörü bulunamadı.")
     
+    # Sayfa çıkarma önbelleğini temizle
+    page_cache_dir = Path("data/page_cache")
+    if page_cache_dir.exists():
+        print("🗑️ Sayfa önbelleği temizleniyor...")
+        shutil.rmtree(page_cache_dir)
+        print("✅ Sayfa önbelleği temizlendi!")
+    
+    # Embedding önbelleğini temizle
+    embedding_cache_dir = Path("data/embedding_cache")
+    if embedding_cache_dir.exists():
+        print("🗑️ Embedding önbelleği temizleniyor...")
+        shutil.rmtree(embedding_cache_dir)
+        print("✅ Embedding önbelleği temizlendi!")
+    
+    # Arka plan iş geçmişini temizle - uygulama açıkken dosya silinmez, kayıtlar silinir
+    jobs_db = Path("data/ingestion_jobs.sqlite3")
+    if jobs_db.exists():
+        conn = sqlite3.connect(jobs_db, timeout=30)
+        try:
+            with conn:
+                conn.execute("DELETE FROM jobs WHERE status NOT IN ('queued', 'running')")
+            print("✅ İş geçmişi temizlendi!")
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ İş geçmişi temizlenemedi: {e}")
+        finally:
+            conn.close()
+    
     # Debug dosyalarını temizle
     debug_dir = Path("debug_output")
     if debug_dir.exists():
-        debug_files = list(debug_dir.glob("*.txt"))
+        debug_files = list(debug_dir.glob("*.txt*")) + list(debug_dir.glob("*.jsonl*"))
         if debug_files:
             print(f"🗑️ {len(debug_files)} debug dosyası siliniyor...")
             for file in debug_files:
@@ -70,7 +98,7 @@ def cleanup_vectorstore():
     # Debug dosyalarını da temizle (opsiyonel)
     debug_dir = Path("debug_output")
     if debug_dir.exists():
-        for file in debug_dir.glob("*.txt"):
+        for file in [*debug_dir.glob("*.txt*"), *debug_dir.glob("*.jsonl*")]:
             file.unlink()
         print("✅ Debug dosyaları temizlendi!")
 
@@ -6,11 +6,43 @@ BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
 PDF_DIR = DATA_DIR / "pdfs"
 VECTOR_STORE_DIR = BASE_DIR / "vectorstore"
+PAGE_CACHE_DIR = DATA_DIR / "page_cache"
+EMBED_CACHE_DIR = DATA_DIR / "embedding_cache"
+EMBED_ONNX_DIR = DATA_DIR / "onnx_models"
+JOBS_DB_PATH = DATA_DIR / "ingestion_jobs.sqlite3"
+DEBUG_DIR = BASE_DIR / "debug_output"
 
 # Model ayarları
 EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 CHUNK_SIZE = 2000
 CHUNK_OVERLAP = 400
+CHUNK_STRATEGY = "markdown"  # "markdown" (yapıyı koruyan, cümle örtüşmeli) veya "recursive" (LangChain)
+EMBED_BATCH_SIZE = 256  # Vektör veritabanına tek seferde eklenen parça sayısı
+EMBED_CACHE_ENABLED = True  # Parça embedding'lerini diskte sakla - yeniden indekslemede model çalışmaz
+EMBED_ENCODE_BATCH_SIZE = 32  # Uzunluğa göre sıralanmış metinlerden tek seferde kodlanan sayı (sorgular aralarda çalışır)
+EMBED_WORKERS = 1  # Embedding süreç havuzu boyutu (1 = tek süreç; her süreç modelin bir kopyasını yükler)
+EMBED_BACKEND = "torch"  # "torch" (PyTorch fp32) veya "onnx" (int8 ONNX Runtime) - değiştirince vektör veritabanını yeniden kurun
+EMBED_ONNX_THREADS = 0  # ONNX Runtime iş parçacığı sayısı (0 = otomatik)
+EMBED_MAX_SEQ_LENGTH = 128  # Modelin token sınırı (paraphrase-multilingual-MiniLM-L12-v2 ile aynı)
+EMBED_SESSION_TTL_SECONDS = 30 * 60  # Bu süre boyunca etkileşim olmayan oturum model paylaşımında sayılmaz
+
+# PDF işleme ayarları
+PDF_PROCESS_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))  # Paralel PDF işleyici sayısı (1 = sıralı)
+PDF_SHARD_PAGES = 50  # Büyük PDF'lerde her işçiye verilen sayfa aralığı boyutu
+PDF_SHARD_MIN_PAGES = 100  # Bu sayfa sayısının altındaki PDF'ler bölünmeden işlenir
+PDF_STREAM_PAGES = 20  # PyMuPDF4LLM'ye tek çağrıda verilen sayfa sayısı (bellek sınırı)
+PDF_TIMEOUT_SECONDS = 600  # Tek PDF için süre sınırı - aşılırsa işçi süreç öldürülür, dosya başarısız sayılır
+PDF_MEMORY_LIMIT_MB = 4096  # İşçi süreç bellek sınırı (0 = sınırsız, sadece Linux/macOS)
+JOB_POLL_SECONDS = 2  # Arka plan işlerinin durumunun arayüzde yenilenme aralığı
+AUTO_ATTACH_INDEX = True  # Açılışta kayıtlı vektör veritabanına bağlan, modeli arka planda ısıt
+PDF_TIERED_EXTRACTION = True  # Düz metin sayfaları hızlı yoldan, sadece düzen gerektirenler PyMuPDF4LLM ile
+PDF_HEADING_SIZE_RATIO = 1.15  # Gövde yazısından bu oranda büyük yazı başlık sayılır
+
+# Debug çıktısı ayarları
+DEBUG_MAX_MB = 200  # debug_output klasörünün üst sınırı - aşılınca en eski dosyalar silinir
+DEBUG_SAMPLE_FIRST = 5  # Debug raporuna tam içeriğiyle yazılan ilk sayfa/parça sayısı
+DEBUG_SAMPLE_RANDOM = 5  # Bunlara ek olarak rastgele seçilen sayfa/parça sayısı
+DEBUG_QUEUE_SIZE = 32  # Yazılmayı bekleyen rapor sınırı - doluysa yeni rapor atlanır, işleme beklemez
 
 # Ollama ayarları sf117 sf127
 OLLAMA_MODEL = "llama3.1:8b"
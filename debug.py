@@ -1,7 +1,9 @@
 import os
+import json
+from collections import defaultdict
 from pathlib import Path
 from datetime import datetime
-from typing import List
+from typing import Iterable, List
 from langchain.schema import Document
 
 class PDFDebugger:
@@ -55,17 +57,43 @@ class PDFDebugger:
         print(f"Parçalanmış metin kaydedildi: {filepath}")
         return filepath
     
-    def create_comparison_report(self, original_docs: List[Document], chunks: List[Document], pdf_name: str):
-        """Orijinal ve parçalanmış metin karşılaştırma raporu"""
+    def create_comparison_report(self, original_docs: List[Document], chunks: Iterable[Document], pdf_name: str):
+        """Orijinal ve parçalanmış metin karşılaştırma raporu
+
+        Parçalar tek geçişte sayfalara göre gruplanır, rapor sayfa sayfa diske
+        yazılır. Aynı içerik ayrıca JSON Lines olarak (.jsonl) kaydedilir -
+        farklı çıkarma çalıştırmaları satır satır karşılaştırılabilir.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{pdf_name}_{timestamp}_comparison_report.txt"
         filepath = self.output_dir / filename
+        jsonl_path = filepath.with_suffix(".jsonl")
+        
+        # Sayfa -> [parça sayısı, toplam karakter] (tek geçiş)
+        page_stats = defaultdict(lambda: [0, 0])
+        total_chunks = 0
+        total_chunk_chars = 0
+        for chunk in chunks:
+            stats = page_stats[chunk.metadata.get('page')]
+            stats[0] += 1
+            stats[1] += len(chunk.page_content)
+            total_chunks += 1
+            total_chunk_chars += len(chunk.page_content)
         
-        # İstatistikler
         total_original_chars = sum(len(doc.page_content) for doc in original_docs)
-        total_chunk_chars = sum(len(chunk.page_content) for chunk in chunks)
+        summary = {
+            "type": "summary",
+            "pdf": pdf_name,
+            "pages": len(original_docs),
+            "chunks": total_chunks,
+            "original_chars": total_original_chars,
+            "chunk_chars": total_chunk_chars,
+            "char_diff": total_chunk_chars - total_original_chars
+        }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with open(filepath, 'w', encoding='utf-8') as f, open(jsonl_path, 'w', encoding='utf-8') as jf:
+            jf.write(json.dumps(summary, ensure_ascii=False) + "\n")
+            
             f.write(f"PDF KARŞILAŞTIRMA RAPORU\n")
             f.write(f"PDF: {pdf_name}\n")
             f.write(f"Rapor Tarihi: {datetime.now()}\n")
@@ -73,29 +101,38 @@ class PDFDebugger:
             
             f.write("İSTATİSTİKLER:\n")
             f.write(f"• Orijinal Sayfa Sayısı: {len(original_docs)}\n")
-            f.write(f"• Toplam Parça Sayısı: {len(chunks)}\n")
+            f.write(f"• Toplam Parça Sayısı: {total_chunks}\n")
             f.write(f"• Orijinal Toplam Karakter: {total_original_chars:,}\n")
             f.write(f"• Parçalanmış Toplam Karakter: {total_chunk_chars:,}\n")
             f.write(f"• Karakter Kaybı/Artışı: {total_chunk_chars - total_original_chars:,}\n")
             f.write("\n" + "="*80 + "\n\n")
             
-            # Her sayfa için detay
+            # Her sayfa için detay - gruplanmış parça istatistiklerinden
             for i, original_doc in enumerate(original_docs):
                 page_num = original_doc.metadata.get('page', i+1)
-                f.write(f"SAYFA {page_num} ANALİZİ:\n")
-                f.write(f"Orijinal Karakter Sayısı: {len(original_doc.page_content)}\n")
+                page_chars = len(original_doc.page_content)
+                chunk_count, chunk_total = page_stats.get(page_num, (0, 0))
+                preview = original_doc.page_content[:200]
                 
-                # Bu sayfaya ait parçaları bul
-                page_chunks = [chunk for chunk in chunks if chunk.metadata.get('page') == page_num]
-                chunk_total = sum(len(chunk.page_content) for chunk in page_chunks)
-                
-                f.write(f"Bu Sayfadan Oluşan Parça Sayısı: {len(page_chunks)}\n")
+                f.write(f"SAYFA {page_num} ANALİZİ:\n")
+                f.write(f"Orijinal Karakter Sayısı: {page_chars}\n")
+                f.write(f"Bu Sayfadan Oluşan Parça Sayısı: {chunk_count}\n")
                 f.write(f"Parçalardaki Toplam Karakter: {chunk_total}\n")
-                f.write(f"Karakter Farkı: {chunk_total - len(original_doc.page_content)}\n")
+                f.write(f"Karakter Farkı: {chunk_total - page_chars}\n")
                 
                 # İlk 200 karakter önizleme
-                f.write(f"İlk 200 Karakter: {original_doc.page_content[:200]}...\n")
+                f.write(f"İlk 200 Karakter: {preview}...\n")
                 f.write("-" * 60 + "\n\n")
+                
+                jf.write(json.dumps({
+                    "type": "page",
+                    "page": page_num,
+                    "chars": page_chars,
+                    "chunk_count": chunk_count,
+                    "chunk_chars": chunk_total,
+                    "char_diff": chunk_total - page_chars,
+                    "preview": preview
+                }, ensure_ascii=False) + "\n")
         
-        print(f"Karşılaştırma raporu kaydedildi: {filepath}")
-        return filepath
\ No newline at end of file
+        print(f"Karşılaştırma raporu kaydedildi: {filepath} (+ {jsonl_path.name})")
+        return filepath
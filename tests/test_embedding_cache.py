@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from utils.embedding_cache import EmbeddingCache, embedding_key, get_embedding_cache, reset_embedding_caches
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path), "fake/model")
+
+
+def test_key_ignores_whitespace_but_not_model():
+    assert embedding_key("m", "bir  iki\nüç") == embedding_key("m", " bir iki üç ")
+    assert embedding_key("m", "bir") != embedding_key("n", "bir")
+
+
+def test_vectors_round_trip(cache):
+    cache.put_many({"a": [1.0, 2.0, 3.0], "b": [4.0, 5.0, 6.0]})
+    cache.put_many({"c": [7.0, 8.0, 9.0]})
+    found = cache.get_many(["c", "a", "x"])
+    assert found == {"a": [1.0, 2.0, 3.0], "c": [7.0, 8.0, 9.0]}
+    assert cache.stats()["vectors"] == 3
+
+
+def test_cache_persists_across_instances(tmp_path, cache):
+    cache.put_many({"a": [0.5, 0.25]})
+    reopened = EmbeddingCache(str(tmp_path), "fake/model")
+    assert reopened.dim == 2
+    assert reopened.get_many(["a"]) == {"a": [0.5, 0.25]}
+
+
+def test_dimension_mismatch_is_rejected(cache):
+    cache.put_many({"a": [1.0, 2.0]})
+    with pytest.raises(Exception):
+        cache.put_many({"b": [1.0, 2.0, 3.0]})
+
+
+def test_partial_row_is_ignored_and_overwritten(cache):
+    cache.put_many({"a": [1.0, 2.0]})
+    with open(cache.vectors_path, "ab") as f:
+        f.write(np.float32(9.0).tobytes())  # Yarım kalmış yazım
+    cache.put_many({"b": [3.0, 4.0]})
+    assert cache.get_many(["a", "b"]) == {"a": [1.0, 2.0], "b": [3.0, 4.0]}
+
+
+def test_reset_keeps_live_cache_usable(tmp_path):
+    cache = get_embedding_cache(str(tmp_path), "reset/model")
+    cache.put_many({"a": [1.0, 2.0]})
+    reset_embedding_caches(str(tmp_path))
+    assert cache.get_many(["a"]) == {}
+    cache.put_many({"b": [1.0, 2.0, 3.0]})
+    assert cache.get_many(["b"]) == {"b": [1.0, 2.0, 3.0]}
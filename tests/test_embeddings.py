@@ -0,0 +1,445 @@
+import sqlite3
+import threading
+
+import pytest
+from langchain.schema import Document
+from langchain_community.embeddings import FakeEmbeddings
+
+import utils.embeddings as embeddings
+from utils.embedding_cache import EmbeddingCache
+from utils.embeddings import (CachedEmbeddings, EmbeddingManager, SharedEmbeddings, SharedVectorStore,
+                              chunk_document_id, has_persisted_index)
+from utils.ingestion_manifest import IngestionManifest, make_ingest_key
+
+SETTINGS = {"extractor": "pymupdf4llm_merged", "chunk_size": 1000, "chunk_overlap": 200, "chunker": "markdown"}
+
+
+class FakeCollection:
+    def __init__(self, count):
+        self._count = count
+
+    def count(self):
+        return self._count
+
+
+class FakeSharedStore:
+    def __init__(self, count):
+        self.vectorstore = type("FakeChroma", (), {"_collection": FakeCollection(count)})()
+
+
+def _index_file(persist_directory, file_name="a.pdf"):
+    manifest = IngestionManifest(persist_directory)
+    key = make_ingest_key("abc", SETTINGS)
+    manifest.record_extraction(key, file_name, SETTINGS, 3, 0.1)
+    manifest.mark_indexed(key, 0.2)
+    manifest.save()
+    return manifest
+
+
+def _open_store(monkeypatch, persist_directory, count):
+    monkeypatch.setitem(embeddings._vectorstores, embeddings.os.path.realpath(persist_directory),
+                        FakeSharedStore(count))
+
+
+def test_empty_directory_has_no_index(tmp_path):
+    assert not has_persisted_index(str(tmp_path))
+
+
+def test_indexed_manifest_with_chunks_is_attached(tmp_path, monkeypatch):
+    _index_file(str(tmp_path))
+    _open_store(monkeypatch, str(tmp_path), 12)
+    assert has_persisted_index(str(tmp_path))
+
+
+def test_emptied_collection_is_not_attached(tmp_path, monkeypatch):
+    _index_file(str(tmp_path))
+    _open_store(monkeypatch, str(tmp_path), 0)
+    assert not has_persisted_index(str(tmp_path))
+
+
+def test_cleared_manifest_is_not_attached(tmp_path, monkeypatch):
+    manifest = _index_file(str(tmp_path))
+    manifest.entries = {}
+    manifest.save()
+    _open_store(monkeypatch, str(tmp_path), 12)
+    assert not has_persisted_index(str(tmp_path))
+
+
+@pytest.mark.parametrize("rows, expected", [(0, False), (2, True)])
+def test_closed_store_is_counted_from_disk(tmp_path, rows, expected):
+    _index_file(str(tmp_path))
+    conn = sqlite3.connect(tmp_path / "chroma.sqlite3")
+    conn.execute("CREATE TABLE embeddings (id INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT INTO embeddings DEFAULT VALUES", [()] * rows)
+    conn.commit()
+    conn.close()
+    assert has_persisted_index(str(tmp_path)) is expected
+
+
+class FakeModel:
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+def _shared_model(**kwargs):
+    model = SharedEmbeddings("fake-model", **kwargs)
+    model._model = FakeModel()
+    return model
+
+
+def test_idle_sessions_are_not_counted(monkeypatch):
+    model = _shared_model(session_ttl=60)
+    clock = [1000.0]
+    monkeypatch.setattr(embeddings.time, "time", lambda: clock[0])
+    model.touch_session("a")
+    model.touch_session("b")
+    assert model.stats()["sessions"] == 2
+
+    clock[0] += 45
+    model.touch_session("b")
+    clock[0] += 30
+    assert model.active_sessions == 1
+    model.touch_session("c")
+    assert set(model.sessions) == {"b", "c"}
+
+
+def test_memory_is_shared_by_active_sessions_only(monkeypatch):
+    model = _shared_model(session_ttl=60)
+    model.memory_mb = 400.0
+    clock = [1000.0]
+    monkeypatch.setattr(embeddings.time, "time", lambda: clock[0])
+    for session_id in "abcd":
+        model.touch_session(session_id)
+    clock[0] += 120
+    model.touch_session("e")
+    assert model.stats()["memory_per_session_mb"] == 400.0
+
+
+def test_counters_are_exact_under_concurrent_use(tmp_path):
+    model = _shared_model(encode_batch_size=4)
+    cached = CachedEmbeddings(model, EmbeddingCache(str(tmp_path), "fake-model"))
+    barrier = threading.Barrier(8)
+
+    def work(worker):
+        barrier.wait()
+        for i in range(20):
+            model.embed_documents([f"{worker}-{i}-{j}" for j in range(3)])
+            cached.embed_documents([f"ortak-{i % 5}"])
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model.encoded_count == 8 * 20 * 3 + cached.misses
+    assert cached.hits + cached.misses == 8 * 20
+    cache_stats = cached.cache.stats()
+    assert cache_stats["hits"] + cache_stats["misses"] == 8 * 20
+
+
+def _matches(metadata, where):
+    """Chroma where filtresinin testlerde kullanılan alt kümesi"""
+    if "$and" in where:
+        return all(_matches(metadata, condition) for condition in where["$and"])
+    for field, condition in where.items():
+        value = metadata.get(field)
+        if isinstance(condition, dict):
+            # $in alanı olmayan kayıtları eşlemez; $ne için davranış Chroma sürümüne göre değişir - katı olanı
+            if field not in metadata:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeVectorStore:
+    """Chroma'nın EmbeddingManager'ın kullandığı kısmı - records: kimlik -> metadata"""
+
+    def __init__(self, added_batches=None):
+        self.records = {}
+        self.rows = {}
+        self.added_batches = [] if added_batches is None else added_batches
+        self.get_includes = []
+        self._collection = self
+
+    def get(self, ids=None, where=None, include=None):
+        self.get_includes.append(include)
+        if ids is not None:
+            found = [doc_id for doc_id in ids if doc_id in self.records]
+        else:
+            found = [doc_id for doc_id, metadata in self.records.items() if _matches(metadata, where or {})]
+        result = {"ids": found}
+        for field in include or []:
+            result[field] = [self.rows[doc_id][field] for doc_id in found]
+        return result
+
+    def add_documents(self, documents, ids):
+        self.added_batches.append(list(ids))
+        self.upsert(ids, [[float(len(doc.page_content))] for doc in documents],
+                    [doc.page_content for doc in documents], [dict(doc.metadata) for doc in documents])
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for doc_id, embedding, text, metadata in zip(ids, embeddings, documents, metadatas):
+            self.records[doc_id] = dict(metadata)
+            self.rows[doc_id] = {"embeddings": embedding, "documents": text, "metadatas": dict(metadata)}
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.records.pop(doc_id, None)
+            self.rows.pop(doc_id, None)
+
+    def persist(self):
+        pass
+
+
+class FakeIngestStore:
+    """SharedVectorStore yerine - ana koleksiyon ve işin hazırlık koleksiyonu"""
+
+    def __init__(self):
+        self.vectorstore = FakeVectorStore()
+        self.write_lock = threading.RLock()
+        self.staging = None
+        self.staged_batches = []
+        self.compactions = 0
+
+    def open_staging(self):
+        self.staging = FakeVectorStore(self.staged_batches)
+        return self.staging
+
+    def close_staging(self):
+        self.staging = None
+
+    def compact(self):
+        self.compactions += 1
+        return True
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(embeddings, "EMBED_CACHE_DIR", tmp_path / "embedding_cache")
+    monkeypatch.setattr(embeddings, "_cached_embeddings", {})
+    persist_directory = str(tmp_path / "vectorstore")
+    monkeypatch.setitem(embeddings._vectorstores, embeddings.os.path.realpath(persist_directory), FakeIngestStore())
+    return EmbeddingManager("fake-model", persist_directory, batch_size=2)
+
+
+def _record(manager, *args, **kwargs):
+    """Çıkarma kaydını işin yaptığı gibi diske yaz"""
+    with manager.manifest.update():
+        manager.manifest.record_extraction(*args, **kwargs)
+
+
+def _chunk(source, page_start, index, ingest_key=None, text=None):
+    metadata = {"source": source, "page_start": page_start, "page_end": page_start, "block_chunk_index": index}
+    if ingest_key:
+        metadata["ingest_key"] = ingest_key
+    return Document(page_content=text or f"{source} s{page_start} p{index}", metadata=metadata)
+
+
+def test_chunk_ids_are_stable_and_distinct():
+    first = _chunk("a.pdf", 3, 1, ingest_key="abc:123")
+    assert chunk_document_id(first) == "abc:123:3-3:1"
+    assert chunk_document_id(first) == chunk_document_id(_chunk("a.pdf", 3, 1, ingest_key="abc:123", text="x"))
+    assert chunk_document_id(first) != chunk_document_id(_chunk("a.pdf", 3, 2, ingest_key="abc:123"))
+    assert chunk_document_id(first) != chunk_document_id(_chunk("a.pdf", 3, 1, ingest_key="abc:456"))
+
+
+def test_chunk_id_without_ingest_key_uses_content():
+    chunk = _chunk("a.pdf", 1, 0, text="aynı metin")
+    assert chunk_document_id(chunk).startswith("a.pdf:")
+    assert chunk_document_id(chunk) == chunk_document_id(_chunk("a.pdf", 1, 0, text="aynı metin"))
+    assert chunk_document_id(chunk) != chunk_document_id(_chunk("a.pdf", 1, 0, text="başka metin"))
+
+
+def test_chunks_are_written_in_batches(manager):
+    progress = []
+    manager.add_documents((_chunk("a.pdf", page, 0) for page in range(1, 6)),
+                          progress_callback=lambda batch, added: progress.append((batch, added)))
+    assert progress == [(1, 2), (2, 4), (3, 5)]
+    assert [len(batch) for batch in manager.store.staged_batches] == [2, 2, 1]
+    assert len(manager.load_vectorstore().records) == 5
+
+
+def test_chunks_already_in_store_are_skipped(manager):
+    chunks = [_chunk("a.pdf", page, 0) for page in range(1, 4)]
+    manager.add_documents(chunks)
+    staged_batches = manager.store.staged_batches
+    batches_before = len(staged_batches)
+
+    manager.add_documents(chunks + [_chunk("a.pdf", 4, 0)])
+    assert manager.last_skipped_count == 3
+    assert staged_batches[batches_before:] == [[chunk_document_id(_chunk("a.pdf", 4, 0))]]
+    assert all(include == [] for include in manager.load_vectorstore().get_includes)
+
+
+def test_indexed_revision_is_not_embedded_again(manager):
+    _record(manager, "abc:1", "a.pdf", {}, 2, 0.1)
+    chunks = [_chunk("a.pdf", page, 0, ingest_key="abc:1") for page in (1, 2)]
+    manager.add_documents(chunks)
+    assert manager.manifest.is_indexed("abc:1")
+
+    batches_before = len(manager.store.staged_batches)
+    manager.add_documents(chunks)
+    assert len(manager.store.staged_batches) == batches_before
+
+
+def test_queries_see_previous_index_until_commit(manager):
+    _record(manager, "old:1", "a.pdf", {}, 2, 0.1)
+    manager.add_documents([_chunk("a.pdf", page, 0, ingest_key="old:1") for page in (1, 2)])
+    live = manager.load_vectorstore()
+    previous_index = dict(live.records)
+
+    _record(manager, "b:1", "b.pdf", {}, 5, 0.1)
+    _record(manager, "new:1", "a.pdf", {}, 1, 0.1, {"stale_page_starts": None}, replaces="old:1")
+    seen_during_job = []
+
+    def search_during_job(batch_count=None, added_count=None):
+        seen_during_job.append(dict(live.records))
+
+    chunks = [_chunk("b.pdf", page, 0, ingest_key="b:1") for page in range(1, 6)]
+    chunks.append(_chunk("a.pdf", 1, 0, ingest_key="new:1"))
+    manager.add_documents(chunks, progress_callback=search_during_job, commit_callback=search_during_job)
+
+    # Her gruptan sonra ve commit öncesinde: yarım dosya yok, eski revizyon olduğu gibi
+    assert len(seen_during_job) == 4
+    assert all(records == previous_index for records in seen_during_job)
+    assert {(metadata["source"], metadata["ingest_key"]) for metadata in live.records.values()} == {
+        ("b.pdf", "b:1"), ("a.pdf", "new:1")}
+    assert len(live.records) == 6
+    assert manager.store.staging is None
+
+
+def test_deletes_made_during_a_job_survive_its_commit(manager):
+    for key, name in (("a:1", "a.pdf"), ("b:1", "b.pdf")):
+        _record(manager, key, name, {}, 1, 0.1)
+        manager.add_documents([_chunk(name, 1, 0, ingest_key=key)])
+    _record(manager, "c:1", "c.pdf", {}, 1, 0.1)
+    _record(manager, "d:1", "d.pdf", {}, 1, 0.1)
+
+    def delete_from_another_session(*args):
+        # Arayüzdeki başka bir yönetici iş sürerken siler
+        other = EmbeddingManager("fake-model", manager.persist_directory)
+        other.delete_document("a.pdf", compact=False)
+        other.delete_document("d.pdf", compact=False)
+
+    manager.add_documents([_chunk("c.pdf", 1, 0, ingest_key="c:1"), _chunk("d.pdf", 1, 0, ingest_key="d:1")],
+                          commit_callback=delete_from_another_session)
+
+    assert sorted(IngestionManifest(manager.persist_directory).indexed_files()) == ["b.pdf", "c.pdf"]
+    assert sorted(metadata["source"] for metadata in manager.load_vectorstore().records.values()) == ["b.pdf", "c.pdf"]
+
+
+def test_failed_job_leaves_live_collection_untouched(manager):
+    live = manager.load_vectorstore()
+
+    def failing_documents():
+        yield from (_chunk("a.pdf", page, 0) for page in range(1, 4))
+        raise RuntimeError("çıkarma hatası")
+
+    with pytest.raises(RuntimeError):
+        manager.add_documents(failing_documents())
+    assert manager.store.staged_batches
+    assert live.records == {}
+    assert manager.store.staging is None
+
+
+def test_revision_replaces_only_stale_blocks(manager):
+    _record(manager, "old:1", "a.pdf", {}, 3, 0.1)
+    manager.add_documents([_chunk("a.pdf", page, 0, ingest_key="old:1") for page in (1, 2, 3)])
+
+    _record(manager, "new:1", "a.pdf", {}, 1, 0.1, {"stale_page_starts": [2]}, replaces="old:1")
+    manager.add_documents([_chunk("a.pdf", 2, 0, ingest_key="new:1")])
+
+    records = manager.load_vectorstore().records
+    assert sorted((metadata["ingest_key"], metadata["page_start"]) for metadata in records.values()) == [
+        ("new:1", 2), ("old:1", 1), ("old:1", 3)]
+    assert list(manager.manifest.entries) == ["new:1"]
+
+
+def test_delete_document_removes_only_that_source(manager):
+    for key, name in (("a:1", "a.pdf"), ("b:1", "b.pdf")):
+        _record(manager, key, name, {}, 2, 0.1)
+        manager.add_documents([_chunk(name, page, 0, ingest_key=key) for page in (1, 2)])
+
+    result = manager.delete_document("a.pdf")
+    assert result["deleted_count"] == 2
+    assert [entry["file_name"] for entry in result["removed_entries"]] == ["a.pdf"]
+    assert {metadata["source"] for metadata in manager.load_vectorstore().records.values()} == {"b.pdf"}
+    assert list(IngestionManifest(manager.persist_directory).indexed_files()) == ["b.pdf"]
+    assert manager.store.compactions == 1
+
+
+def test_delete_source_chunks_by_page_block(manager):
+    manager.add_documents([_chunk("a.pdf", page, 0) for page in (1, 2, 3)])
+    vectorstore = manager.load_vectorstore()
+    assert manager.delete_source_chunks(vectorstore, "a.pdf", page_starts=[]) == 0
+    assert manager.delete_source_chunks(vectorstore, "a.pdf", page_starts=[1, 3]) == 2
+    assert [metadata["page_start"] for metadata in vectorstore.records.values()] == [2]
+    assert vectorstore.get_includes[-1] == ["metadatas"]
+
+
+def test_replacement_removes_legacy_chunks_without_ingest_key(manager):
+    vectorstore = manager.load_vectorstore()
+    _record(manager, "old:1", "a.pdf", {}, 1, 0.1)
+    manager.add_documents([_chunk("a.pdf", 3, 0, ingest_key="old:1")])
+    # Manifest'ten önceki sürümün parçaları: ingest_key ve page_start yok, sadece page var
+    vectorstore.upsert(["eski-1", "eski-2"], [[1.0], [1.0]], ["eski s1", "eski s2"],
+                       [{"source": "a.pdf", "page": 1}, {"source": "a.pdf", "page": 2}])
+
+    _record(manager, "new:1", "a.pdf", {}, 1, 0.1, {"stale_page_starts": [1]}, replaces="old:1")
+    manager.add_documents([_chunk("a.pdf", 1, 0, ingest_key="new:1")])
+    assert "eski-1" not in vectorstore.records
+    assert "eski-2" in vectorstore.records
+
+    assert manager.delete_source_chunks(vectorstore, "a.pdf", keep_ingest_key="new:1") == 2
+    assert {metadata.get("ingest_key") for metadata in vectorstore.records.values()} == {"new:1"}
+
+
+def test_first_manifest_entry_removes_legacy_chunks_of_same_name(manager):
+    vectorstore = manager.load_vectorstore()
+    vectorstore.upsert(["eski-1"], [[1.0]], ["eski"], [{"source": "a.pdf", "page": 1}])
+    _record(manager, "new:1", "a.pdf", {}, 1, 0.1)
+    manager.add_documents([_chunk("a.pdf", 1, 0, ingest_key="new:1")])
+    assert {metadata.get("ingest_key") for metadata in vectorstore.records.values()} == {"new:1"}
+
+
+def test_replacement_under_same_name_swaps_whole_index(manager):
+    _record(manager, "old:1", "a.pdf", {}, 2, 0.1)
+    manager.add_documents([_chunk("a.pdf", page, 0, ingest_key="old:1") for page in (1, 2)])
+
+    # Yeni içerik aynı adla gönderilir - önceki revizyon tamamen değiştirilir
+    _record(manager, "new:1", "a.pdf", {}, 1, 0.1, {"stale_page_starts": None}, replaces="old:1")
+    manager.add_documents([_chunk("a.pdf", 1, 0, ingest_key="new:1")])
+
+    records = manager.load_vectorstore().records
+    assert {metadata["ingest_key"] for metadata in records.values()} == {"new:1"}
+    assert list(manager.manifest.indexed_files()) == ["a.pdf"]
+
+
+def test_compact_skips_active_jobs_and_reconnects_the_shared_wrapper(tmp_path):
+    store = SharedVectorStore(str(tmp_path / "vectorstore"), FakeEmbeddings(size=8))
+    vectorstore = store.vectorstore
+    documents = [Document(page_content=f"parça {i} " * 40, metadata={"source": "a.pdf" if i % 5 else "b.pdf"})
+                 for i in range(50)]
+    vectorstore.add_documents(documents, ids=[str(i) for i in range(50)])
+    vectorstore.delete(ids=vectorstore.get(where={"source": "a.pdf"}, include=[])["ids"])
+
+    store.open_staging()
+    assert store.compact() is False
+    store.close_staging()
+
+    assert store.compact() is True
+    # Oturumların tuttuğu sarmalayıcı yeni istemciyle çalışmaya devam eder
+    assert store.vectorstore is vectorstore
+    assert vectorstore._collection.count() == 10
+    assert len(vectorstore.similarity_search("parça", k=3)) == 3
+    vectorstore.add_documents([Document(page_content="yeni", metadata={"source": "c.pdf"})], ids=["yeni"])
+    assert vectorstore._collection.count() == 11
@@ -0,0 +1,103 @@
+import fitz
+import pytest
+
+from utils import advanced_multi_pdf_processor
+from utils.advanced_multi_pdf_processor import AdvancedPDFProcessor
+from utils.page_cache import PageCache
+
+PAGE_COUNT = 12
+
+
+def _write_pdf(path, changed=(), page_count=PAGE_COUNT):
+    document = fitz.open()
+    for page_num in range(1, page_count + 1):
+        version = "revised" if page_num in changed else "original"
+        # Her sayfa tam cümleyle biter - sayfalar birleşmez, her sayfa bir blok olur
+        text = f"Page {page_num} holds the {version} wording of this section. " * 5
+        document.new_page().insert_textbox(fitz.Rect(72, 72, 520, 700), text.strip(), fontsize=11)
+    document.save(str(path))
+    document.close()
+    return str(path)
+
+
+@pytest.fixture
+def processor():
+    return AdvancedPDFProcessor(chunk_size=500, chunk_overlap=0, use_page_cache=False)
+
+
+@pytest.fixture
+def first_revision(tmp_path, processor):
+    chunks, info = processor.process_pdf_incremental(_write_pdf(tmp_path / "v1.pdf"))
+    return chunks, info
+
+
+def test_first_revision_is_processed_fully(first_revision):
+    chunks, info = first_revision
+    assert info["stale_page_starts"] is None
+    assert len(info["page_hashes"]) == PAGE_COUNT
+    assert info["block_spans"] == [[page, page] for page in range(1, PAGE_COUNT + 1)]
+    assert {chunk.metadata["page_start"] for chunk in chunks} == set(range(1, PAGE_COUNT + 1))
+
+
+def test_unchanged_revision_produces_no_chunks(tmp_path, processor, first_revision):
+    chunks, info = processor.process_pdf_incremental(_write_pdf(tmp_path / "same.pdf"), first_revision[1])
+    assert chunks == []
+    assert info["stale_page_starts"] == []
+    assert info["block_spans"] == first_revision[1]["block_spans"]
+
+
+def test_only_changed_blocks_and_neighbours_are_reprocessed(tmp_path, processor, first_revision):
+    chunks, info = processor.process_pdf_incremental(_write_pdf(tmp_path / "v2.pdf", changed={6}), first_revision[1])
+    assert info["stale_page_starts"] == [5, 6, 7]
+    assert {chunk.metadata["page_start"] for chunk in chunks} == {5, 6, 7}
+    assert any("revised" in chunk.page_content for chunk in chunks)
+    assert info["block_spans"] == first_revision[1]["block_spans"]
+    assert info["page_hashes"][5] != first_revision[1]["page_hashes"][5]
+    assert info["page_hashes"][:5] == first_revision[1]["page_hashes"][:5]
+
+
+def test_appended_pages_extend_the_last_block(tmp_path, processor, first_revision):
+    path = _write_pdf(tmp_path / "longer.pdf", page_count=PAGE_COUNT + 2)
+    chunks, info = processor.process_pdf_incremental(path, first_revision[1])
+    assert info["stale_page_starts"] == [PAGE_COUNT - 1, PAGE_COUNT]
+    assert {chunk.metadata["page_start"] for chunk in chunks} == {PAGE_COUNT - 1, PAGE_COUNT,
+                                                                 PAGE_COUNT + 1, PAGE_COUNT + 2}
+    assert info["block_spans"][-1] == [PAGE_COUNT + 2, PAGE_COUNT + 2]
+
+
+def test_large_change_falls_back_to_full_processing(tmp_path, processor, first_revision):
+    path = _write_pdf(tmp_path / "rewritten.pdf", changed=set(range(1, 9)))
+    chunks, info = processor.process_pdf_incremental(path, first_revision[1])
+    assert info["stale_page_starts"] is None
+    assert {chunk.metadata["page_start"] for chunk in chunks} == set(range(1, PAGE_COUNT + 1))
+
+
+def test_known_hash_and_upload_name_are_used(tmp_path, monkeypatch):
+    def rehash(path):
+        raise AssertionError("dosya yeniden özetlenmemeli")
+
+    monkeypatch.setattr(advanced_multi_pdf_processor, "file_sha256_path", rehash)
+    processor = AdvancedPDFProcessor(chunk_size=500, chunk_overlap=0, use_page_cache=False)
+    processor.page_cache = PageCache(str(tmp_path / "cache"), "test")
+    # İçerik adresli depolamadaki gibi: dosya yolu özetten oluşur
+    file_hash = "ab" * 32
+    path = _write_pdf(tmp_path / f"{file_hash}.pdf")
+
+    chunks, info = processor.process_pdf_incremental(path, file_hash=file_hash, source_name="Rapor 2024.pdf")
+    assert {chunk.metadata["source"] for chunk in chunks} == {"Rapor 2024.pdf"}
+    assert processor.page_cache.load(file_hash, "x") is not None
+
+    revised = _write_pdf(tmp_path / f"{'cd' * 32}.pdf", changed={6})
+    chunks, _ = processor.process_pdf_incremental(revised, info, file_hash="cd" * 32, source_name="Rapor 2024.pdf")
+    assert chunks and {chunk.metadata["source"] for chunk in chunks} == {"Rapor 2024.pdf"}
+
+
+def test_debug_reports_are_named_after_upload(tmp_path, monkeypatch):
+    processor = AdvancedPDFProcessor(chunk_size=500, chunk_overlap=0, use_page_cache=False)
+    processor.debug = True
+    report_names = []
+    monkeypatch.setattr(processor, "save_extraction_analysis", lambda documents, name: report_names.append(name))
+    monkeypatch.setattr(processor, "save_final_result", lambda chunks, name: report_names.append(name))
+
+    processor.process_pdf(_write_pdf(tmp_path / f"{'ef' * 32}.pdf"), source_name="Rapor 2024.pdf")
+    assert report_names == ["Rapor 2024", "Rapor 2024"]
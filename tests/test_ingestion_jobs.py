@@ -0,0 +1,115 @@
+import pytest
+from langchain.schema import Document
+
+import utils.ingestion_jobs as ingestion_jobs
+import utils.parallel_pdf_processor as parallel_pdf_processor
+from utils.ingestion_jobs import ACTIVE_STATUSES, JOB_STAGES, JobProgress, JobStore, iter_job_documents
+from utils.ingestion_manifest import IngestionManifest
+from utils.text_stats import TextStats, format_text_stats
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_new_job_is_queued_with_stage_progress(store):
+    job_id = store.create_job([{"name": "a.pdf"}, {"name": "b.pdf"}], {"workers": 1})
+    job = store.get(job_id)
+    assert job["status"] == "queued"
+    assert list(job["progress"]) == JOB_STAGES
+    assert job["progress"]["extract"] == {"done": 0, "total": 2}
+    assert job["files"][0]["name"] == "a.pdf"
+    assert job["messages"] == []
+
+
+def test_update_and_messages_round_trip(store):
+    job_id = store.create_job([], {})
+    store.update(job_id, status="done", result={"chunk_count": 3})
+    store.add_message(job_id, "info", "bir")
+    store.add_message(job_id, "success", "iki")
+    job = store.get(job_id)
+    assert job["result"] == {"chunk_count": 3}
+    assert [message["text"] for message in job["messages"]] == ["bir", "iki"]
+
+
+def test_list_jobs_filters_by_status(store):
+    done_id = store.create_job([], {})
+    store.update(done_id, status="done")
+    queued_id = store.create_job([], {})
+    assert [job["id"] for job in store.list_jobs(statuses=ACTIVE_STATUSES)] == [queued_id]
+    assert {job["id"] for job in store.list_jobs()} == {done_id, queued_id}
+
+
+def test_clear_keeps_active_jobs(store):
+    done_id = store.create_job([], {})
+    store.update(done_id, status="failed")
+    queued_id = store.create_job([], {})
+    assert store.clear() == 1
+    assert [job["id"] for job in store.list_jobs()] == [queued_id]
+
+
+def test_store_survives_database_file_removal(store):
+    store.create_job([], {})
+    store.db_path.unlink()
+    assert store.list_jobs() == []
+    assert store.get(store.create_job([], {}))["status"] == "queued"
+
+
+def test_progress_advances_and_persists(store):
+    job_id = store.create_job([{"name": "a.pdf"}], {})
+    progress = JobProgress(store, job_id, store.get(job_id)["progress"])
+    progress.set("extract", advance=1)
+    progress.set("embed", done=5, total=10)
+    saved = store.get(job_id)["progress"]
+    assert saved["extract"]["done"] == 1
+    assert saved["embed"] == {"done": 5, "total": 10}
+
+
+def test_created_uploads_are_removed_when_job_fails_early(store, tmp_path, monkeypatch):
+    created = tmp_path / "yeni.pdf"
+    existing = tmp_path / "eski.pdf"
+    created.write_bytes(b"%PDF")
+    existing.write_bytes(b"%PDF")
+
+    class FailingManager:
+        def __init__(self, *args, **kwargs):
+            raise RuntimeError("chroma açılamadı")
+
+    monkeypatch.setattr(ingestion_jobs, "EmbeddingManager", FailingManager)
+    monkeypatch.setattr(ingestion_jobs, "VECTOR_STORE_DIR", tmp_path / "vectorstore")
+    files = [{"name": "yeni.pdf", "path": str(created), "hash": "a", "created": True},
+             {"name": "eski.pdf", "path": str(existing), "hash": "b", "created": False}]
+    job_id = store.create_job(files, {"ingest": {"chunk_size": 1000, "chunk_overlap": 200}, "workers": 1})
+
+    with pytest.raises(RuntimeError):
+        ingestion_jobs.run_ingestion_job(store, job_id)
+    assert not created.exists()
+    assert existing.exists()
+
+
+def test_char_count_uses_stored_text_stats(store, tmp_path, monkeypatch):
+    # Saklanan değer metin uzunluğundan farklı - toplam metinden yeniden ölçülmemeli
+    stored = TextStats(chars=1000, content_chars=990, words=150, lines=10, turkish=0, headers=0, bold=0, pipes=0)
+
+    class FakeProcessor:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def process_pdfs(self, pdf_paths, previous_states=None, **kwargs):
+            for path in pdf_paths:
+                documents = [Document(page_content="kısa", metadata={"text_stats": format_text_stats(stored)})
+                             for _ in range(2)]
+                yield {"pdf_path": path, "documents": documents, "error": None, "elapsed": 0.1,
+                       "ingest_info": {"page_hashes": [], "block_spans": [], "stale_page_starts": None}}
+
+    monkeypatch.setattr(parallel_pdf_processor, "ParallelPDFProcessor", FakeProcessor)
+    files = [{"name": "a.pdf", "path": str(tmp_path / "a.pdf"), "hash": "a", "created": False}]
+    job_id = store.create_job(files, {"ingest": {"chunk_size": 1000, "chunk_overlap": 200}, "workers": 1})
+    job = store.get(job_id)
+    stats = {}
+
+    progress = JobProgress(store, job_id, job["progress"])
+    documents = list(iter_job_documents(job, IngestionManifest(str(tmp_path)), progress, stats, set()))
+    assert len(documents) == 2
+    assert stats["char_count"] == 2000
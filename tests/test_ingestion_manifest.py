@@ -0,0 +1,132 @@
+import threading
+
+from utils.ingestion_manifest import IngestionManifest, file_sha256, make_ingest_key, store_pdf
+
+SETTINGS = {"extractor": "pymupdf4llm_merged", "chunk_size": 1000, "chunk_overlap": 200, "chunker": "markdown"}
+
+
+def _index(manifest, file_hash, file_name, settings=SETTINGS, replaces=None, ingest_info=None):
+    key = make_ingest_key(file_hash, settings)
+    manifest.record_extraction(key, file_name, settings, 3, 0.1, ingest_info, replaces=replaces)
+    manifest.mark_indexed(key, 0.2)
+    return key
+
+
+def test_ingest_key_depends_on_hash_and_settings():
+    key = make_ingest_key("abc", SETTINGS)
+    assert key.startswith("abc:")
+    assert key == make_ingest_key("abc", dict(reversed(list(SETTINGS.items()))))
+    assert key != make_ingest_key("abc", dict(SETTINGS, chunk_size=500))
+    assert key != make_ingest_key("abd", SETTINGS)
+
+
+def test_extracted_entry_is_not_indexed_until_marked(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    key = make_ingest_key("abc", SETTINGS)
+    manifest.record_extraction(key, "a.pdf", SETTINGS, 3, 0.1)
+    assert not manifest.is_indexed(key)
+    manifest.mark_indexed(key, 0.2)
+    assert manifest.is_indexed(key)
+
+
+def test_manifest_round_trips_through_disk(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    key = _index(manifest, "abc", "a.pdf")
+    manifest.save()
+    assert IngestionManifest(str(tmp_path)).is_indexed(key)
+
+
+def test_corrupt_manifest_starts_empty(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    manifest.path.write_text("{bozuk", encoding="utf-8")
+    assert IngestionManifest(str(tmp_path)).entries == {}
+
+
+def test_find_previous_matches_name_regardless_of_settings(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    old_key = _index(manifest, "abc", "a.pdf")
+    _index(manifest, "xyz", "b.pdf")
+
+    key, entry = manifest.find_previous("a.pdf")
+    assert key == old_key
+    assert entry["settings"] == SETTINGS
+    assert manifest.find_previous("c.pdf") == (None, None)
+
+
+def test_new_revision_replaces_previous_entry(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    old_key = _index(manifest, "abc", "a.pdf")
+    new_key = _index(manifest, "abc", "a.pdf", settings=dict(SETTINGS, chunk_size=500), replaces=old_key)
+
+    assert new_key != old_key
+    assert old_key not in manifest.entries
+    assert manifest.find_previous("a.pdf")[0] == new_key
+    assert "replaces" not in manifest.entries[new_key]
+
+
+def test_pending_replacements_lists_revisions_without_new_chunks(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    old_key = _index(manifest, "abc", "a.pdf")
+    new_key = make_ingest_key("abd", SETTINGS)
+    manifest.record_extraction(new_key, "a.pdf", SETTINGS, 0, 0.1, {"stale_page_starts": [3]}, replaces=old_key)
+    assert manifest.pending_replacements() == [new_key]
+
+
+def test_indexed_files_and_remove_file(tmp_path):
+    manifest = IngestionManifest(str(tmp_path))
+    _index(manifest, "abc", "a.pdf")
+    keep_key = _index(manifest, "abd", "a.pdf", settings=dict(SETTINGS, chunk_size=500))
+    _index(manifest, "xyz", "b.pdf")
+
+    assert sorted(manifest.indexed_files()) == ["a.pdf", "b.pdf"]
+    removed = manifest.remove_file("a.pdf", keep_keys=[keep_key])
+    assert [entry["file_hash"] for entry in removed] == ["abc"]
+    assert manifest.indexed_files()["a.pdf"]["file_hash"] == "abd"
+    assert len(manifest.remove_file("a.pdf")) == 1
+    assert sorted(manifest.indexed_files()) == ["b.pdf"]
+
+
+def test_store_pdf_writes_once(tmp_path):
+    data = b"%PDF-1.4 test"
+    file_hash = file_sha256(data)
+    path, created = store_pdf(data, file_hash, tmp_path)
+    assert created and path.read_bytes() == data
+    assert store_pdf(data, file_hash, tmp_path) == (path, False)
+
+
+def test_store_pdf_concurrent_writers_have_one_creator(tmp_path):
+    data = b"%PDF-1.4 " + b"x" * 1_000_000
+    file_hash = file_sha256(data)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def write():
+        barrier.wait()
+        results.append(store_pdf(data, file_hash, tmp_path))
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(created for _, created in results) == 1
+    assert (tmp_path / f"{file_hash}.pdf").read_bytes() == data
+    # Geçici dosya kalmaz
+    assert [path.name for path in tmp_path.iterdir()] == [f"{file_hash}.pdf"]
+
+
+def test_update_applies_changes_on_top_of_latest_file(tmp_path):
+    job_manifest = IngestionManifest(str(tmp_path))
+    with job_manifest.update():
+        _index(job_manifest, "aaa", "a.pdf")
+        _index(job_manifest, "bbb", "b.pdf")
+
+    # Arayüz, iş manifest'i açıkken bir dosyayı siler
+    ui_manifest = IngestionManifest(str(tmp_path))
+    with ui_manifest.update():
+        ui_manifest.remove_file("a.pdf")
+
+    with job_manifest.update():
+        _index(job_manifest, "ccc", "c.pdf")
+    assert sorted(IngestionManifest(str(tmp_path)).indexed_files()) == ["b.pdf", "c.pdf"]
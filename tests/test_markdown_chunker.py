@@ -0,0 +1,94 @@
+import pytest
+
+from utils.markdown_chunker import HEADING, TABLE, TEXT, MarkdownChunker, iter_markdown_blocks
+
+CHUNK_SIZE = 1000
+
+
+def _table(rows: int) -> str:
+    return "\n".join(f"| satır {i} | değer {i * 7} | açıklama metni burada {i} |" for i in range(rows))
+
+
+def _paragraph(sentences: int) -> str:
+    return "Uzun bir cümle burada yazılıyor ve devam ediyor. " * sentences
+
+
+def _chunks(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = 200):
+    return [text[start:end] for start, end in MarkdownChunker(chunk_size, chunk_overlap).iter_spans(text)]
+
+
+def _assert_invariants(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = 200):
+    spans = list(MarkdownChunker(chunk_size, chunk_overlap).iter_spans(text))
+    # Boyut: hiçbir parça chunk_size'ı aşmaz
+    assert all(0 < end - start <= chunk_size for start, end in spans)
+    # Kapsama: boşluk olmayan her karakter en az bir parçada
+    covered = [False] * len(text)
+    for start, end in spans:
+        covered[start:end] = [True] * (end - start)
+    assert all(covered[i] for i, char in enumerate(text) if not char.isspace())
+    # Parçalar metin sırasıyla ilerler
+    assert [start for start, _ in spans] == sorted(start for start, _ in spans)
+    return spans
+
+
+def test_blocks_are_classified():
+    text = "# Başlık\n\nParagraf satırı.\n\n| a | b |\n| 1 | 2 |"
+    kinds = [kind for kind, _, _ in iter_markdown_blocks(text)]
+    assert kinds == [HEADING, TEXT, TABLE]
+
+
+def test_heading_is_not_emitted_alone_before_large_table():
+    text = "Giriş paragrafı. " * 40 + "\n\n## Table 5: Budget\n\n" + _table(80) + "\n\nSon paragraf."
+    chunks = _chunks(text)
+    assert "## Table 5: Budget" not in chunks
+    heading_chunk = next(chunk for chunk in chunks if "## Table 5: Budget" in chunk)
+    assert heading_chunk.startswith("## Table 5: Budget")
+    assert "| satır 0 |" in heading_chunk
+    _assert_invariants(text)
+
+
+def test_heading_is_not_emitted_alone_before_long_paragraph():
+    text = "## Başlık\n\n" + _paragraph(60)
+    chunks = _chunks(text)
+    assert chunks[0].startswith("## Başlık\n\nUzun bir cümle")
+    assert all(chunk.strip() != "## Başlık" for chunk in chunks)
+    _assert_invariants(text)
+
+
+def test_heading_after_text_moves_with_oversized_block():
+    text = _paragraph(5) + "\n\n## Bölüm 2\n\n" + _table(80)
+    chunks = _chunks(text)
+    assert not chunks[0].rstrip().endswith("## Bölüm 2")
+    assert any(chunk.startswith("## Bölüm 2\n\n| satır 0 |") for chunk in chunks)
+
+
+def test_small_table_stays_in_one_chunk():
+    table = _table(10)
+    text = "# Tablo\n\n" + table + "\n\n" + _paragraph(30)
+    assert any(table in chunk for chunk in _chunks(text))
+
+
+@pytest.mark.parametrize("chunk_size", [200, 500, 1000])
+def test_invariants_on_mixed_document(chunk_size):
+    text = "\n\n".join([
+        "# Rapor",
+        _paragraph(12),
+        "## Liste",
+        "\n".join(f"- madde {i} ile ilgili açıklama" for i in range(30)),
+        "## Tablo",
+        _table(40),
+        "```\n" + "\n".join(f"kod_satiri_{i} = {i}" for i in range(15)) + "\n```",
+        _paragraph(20),
+    ])
+    _assert_invariants(text, chunk_size, chunk_size // 5)
+
+
+def test_split_documents_records_start_index():
+    from langchain.schema import Document
+
+    text = "## Başlık\n\n" + _paragraph(40)
+    chunks = MarkdownChunker(CHUNK_SIZE, 200).split_documents([Document(page_content=text, metadata={"page": 3})])
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        assert text[start:start + len(chunk.page_content)] == chunk.page_content
+        assert chunk.metadata["page"] == 3
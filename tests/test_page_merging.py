@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from utils.advanced_multi_pdf_processor import (AdvancedPDFProcessor, _chunk_page_index, format_page_index,
+                                                 parse_page_index)
+
+
+@pytest.fixture
+def processor():
+    return AdvancedPDFProcessor(chunk_size=200, chunk_overlap=0, use_page_cache=False, chunk_strategy="markdown")
+
+
+def _reference_blocks(processor, pages):
+    """Eski (karesel) birleştirme: blok metni her sayfada baştan kurulur"""
+    blocks = []
+    for page_text in pages:
+        if blocks and processor.should_merge_pages(blocks[-1], page_text):
+            blocks[-1] = processor.merge_page_content(blocks[-1], page_text)
+        else:
+            blocks.append(page_text)
+    return blocks
+
+
+def _random_pages(seed, count=40):
+    rng = random.Random(seed)
+    words = ["belge", "sayfa", "Türkçe", "metin", "gerektirmek", "tedir", "bilgi", "kural", "madde"]
+    endings = ["", ".", ":", "-", " ", "\n", "\n\n"]
+    pages = []
+    for _ in range(count):
+        lines = []
+        for _ in range(rng.randint(1, 5)):
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+            if rng.random() < 0.2:
+                line = "## " + line.capitalize()
+            lines.append(line + rng.choice(endings[:4]))
+        prefix = rng.choice(["", "\n", "  "])
+        pages.append(prefix + "\n".join(lines) + rng.choice(endings))
+    return pages
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merged_blocks_match_reference(processor, seed):
+    pages = _random_pages(seed)
+    blocks = list(processor.iter_merged_pages((page, "pymupdf4llm") for page in pages))
+    assert [block.text() for block in blocks] == _reference_blocks(processor, pages)
+
+
+def test_blocks_cover_all_pages_in_order(processor):
+    pages = _random_pages(7)
+    blocks = list(processor.iter_merged_pages(((page, "pymupdf4llm") for page in pages), first_page=3))
+    assert blocks[0].page_start == 3
+    assert blocks[-1].page_end == len(pages) + 2
+    for previous, block in zip(blocks, blocks[1:]):
+        assert block.page_start == previous.page_end + 1
+
+
+def test_unfinished_sentence_merges_across_pages(processor):
+    pages = ["Birinci paragraf.\nCümle yarıda", "devam ediyor ve biter.", "# Yeni Bölüm\nİçerik."]
+    blocks = list(processor.iter_merged_pages((page, "pymupdf4llm") for page in pages))
+    assert [(block.page_start, block.page_end) for block in blocks] == [(1, 2), (3, 3)]
+    assert blocks[0].text() == "Birinci paragraf.\nCümle yarıda devam ediyor ve biter."
+
+
+def test_hyphen_and_suffix_continuations_join_words(processor):
+    assert processor.merge_page_content("Bir kelime böl-", "ünmüş durumda") == "Bir kelime bölünmüş durumda"
+    assert processor.merge_page_content("Bu iş gerektirmek", "tedir bence") == "Bu iş gerektirmektedir bence"
+
+
+def test_page_offsets_point_at_each_page(processor):
+    pages = ["İlk sayfa metni ve devamı", "ikinci sayfa burada başlar", "Son kelime böl-", "ünmüş sayfa."]
+    blocks = list(processor.iter_merged_pages((page, "plain_text") for page in pages))
+    assert len(blocks) == 1
+    text = blocks[0].text()
+    assert blocks[0].page_methods == ["plain_text"] * 4
+    for page_text, offset in zip(pages[1:], blocks[0].page_offsets[1:]):
+        assert text[offset:].startswith(page_text.split()[0].rstrip("-"))
+
+
+def test_chunk_page_index_skips_empty_pages():
+    # Sayfa 11 boş (başlangıcı 12 ile aynı)
+    assert _chunk_page_index(10, [0, 100, 100, 250], 90, 260) == [(10, 0), (12, 10), (13, 160)]
+    assert _chunk_page_index(10, [0, 100, 100, 250], 120, 200) == [(12, 0)]
+    assert _chunk_page_index(5, [0], 0, 50) == [(5, 0)]
+
+
+def test_page_index_round_trips():
+    index = [(12, 0), (13, 842)]
+    assert format_page_index(index) == "12:0;13:842"
+    assert parse_page_index(format_page_index(index)) == index
+    assert parse_page_index("") == []
+
+
+def test_chunks_map_to_the_pages_they_cover(processor):
+    pages = [f"Sayfa {page} " + " ".join(["kelime"] * 60) for page in range(1, 5)]
+    blocks = list(processor.iter_merged_pages((page, "pymupdf4llm") for page in pages))
+    assert len(blocks) == 1
+    document = processor.make_merged_document(blocks[0], "belge.pdf")
+    chunks = processor.split_documents([document])
+
+    text = document.page_content
+    for chunk in chunks:
+        index = parse_page_index(chunk.metadata["page_index"])
+        assert chunk.metadata["chunk_page_start"] == index[0][0]
+        assert chunk.metadata["chunk_page_end"] == index[-1][0]
+        start = chunk.metadata["start_index"]
+        # Parçadaki her sayfa geçişi gerçekten o sayfanın metninin başına denk gelir
+        for page, offset in index[1:]:
+            assert text[start + offset:].startswith(f"Sayfa {page} ")
+    assert chunks[0].metadata["chunk_page_start"] == 1
+    assert chunks[-1].metadata["chunk_page_end"] == 4
+    assert "page_offsets" not in chunks[0].metadata
@@ -0,0 +1,55 @@
+import mmap
+
+import fitz
+import pytest
+
+from utils.parallel_pdf_processor import ParallelPDFProcessor, _ExtractionWorker
+
+
+def test_workers_start_from_a_fresh_interpreter():
+    worker = _ExtractionWorker(memory_limit_mb=0)
+    try:
+        assert worker.process._start_method == "spawn"
+    finally:
+        worker.close()
+
+
+def test_broken_file_fails_alone(tmp_path):
+    broken = tmp_path / "bozuk.pdf"
+    broken.write_bytes(b"PDF degil")
+    missing = tmp_path / "yok.pdf"
+    results = list(ParallelPDFProcessor(max_workers=1, timeout=60, use_page_cache=False).process_pdfs([str(broken), str(missing)]))
+    assert [result["pdf_path"] for result in results] == [str(broken), str(missing)]
+    assert all(result["error"] is not None and result["documents"] is None for result in results)
+
+
+def _table_pdf(path):
+    # Izgara çizgileri sayfayı düzen analizine (PyMuPDF4LLM) yönlendirir
+    document = fitz.open()
+    page = document.new_page()
+    for row in range(4):
+        page.draw_line((72, 100 + 20 * row), (300, 100 + 20 * row))
+    for x in (72, 180, 300):
+        page.draw_line((x, 100), (x, 160))
+    page.insert_text((80, 115), "cell", fontsize=11)
+    page.insert_textbox(fitz.Rect(72, 200, 520, 400), "Body text after the table. " * 10, fontsize=11)
+    document.save(str(path))
+    document.close()
+    return str(path)
+
+
+@pytest.mark.skipif(not hasattr(mmap, "MAP_ANONYMOUS"), reason="POSIX mmap gerekli")
+def test_memory_limit_ignores_parent_address_space(tmp_path):
+    pdf_path = _table_pdf(tmp_path / "tablo.pdf")
+    # Modelleri yüklü bir ana süreç gibi: büyük ama kullanılmayan sanal alan
+    reserve = mmap.mmap(-1, 5 << 30, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS | getattr(mmap, "MAP_NORESERVE", 0),
+                        prot=0)
+    try:
+        processor = ParallelPDFProcessor(500, 0, max_workers=1, timeout=120, memory_limit_mb=4096,
+                                         use_page_cache=False)
+        [result] = processor.process_pdfs([pdf_path])
+    finally:
+        reserve.close()
+    # Sınır işçinin kendi belleğine uygulanır - geçerli belge ana sürecin boyutundan bağımsız işlenir
+    assert result["error"] is None
+    assert any("Body text" in doc.page_content for doc in result["documents"])
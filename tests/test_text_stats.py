@@ -0,0 +1,35 @@
+from langchain.schema import Document
+
+from utils.text_stats import compute_text_stats, format_text_stats, get_text_stats, parse_text_stats, stats_metadata
+
+
+def test_counts_are_taken_from_stripped_content():
+    text = "  # Başlık\n**kalın** | hücre |\n"
+    stats = compute_text_stats(text)
+    assert stats.chars == len(text)
+    assert stats.content_chars == len(text) - 3
+    assert stats.words == 6
+    assert stats.lines == 2
+    assert stats.turkish == 4  # ş, ı, ı, ü
+    assert (stats.headers, stats.bold, stats.pipes) == (1, 2, 2)
+    assert stats.markdown_features == 5
+
+
+def test_empty_text_has_no_turkish_ratio():
+    stats = compute_text_stats("   ")
+    assert stats.content_chars == 0
+    assert stats.turkish_ratio == 0.0
+
+
+def test_stats_round_trip_through_metadata():
+    stats = compute_text_stats("Çalışma ağacı | tablo")
+    assert parse_text_stats(format_text_stats(stats)) == stats
+
+    metadata = stats_metadata("Çalışma ağacı | tablo")
+    assert metadata["markdown_features"] == stats.markdown_features
+    assert metadata["quality_score"] == stats.quality_score
+    assert get_text_stats(Document(page_content="farklı", metadata=metadata)) == stats
+
+
+def test_documents_without_stored_stats_are_computed():
+    assert get_text_stats(Document(page_content="iki kelime")) == compute_text_stats("iki kelime")
@@ -0,0 +1,100 @@
+import fitz
+import pytest
+
+from utils import advanced_multi_pdf_processor
+from utils.advanced_multi_pdf_processor import (LAYOUT_METHOD, PLAIN_METHOD, AdvancedPDFProcessor, _classify_page,
+                                                _extract_page_range)
+
+BODY = "Plain body text that runs across a few lines of the page so the layout stays simple. " * 3
+
+
+def _plain(page):
+    page.insert_textbox(fitz.Rect(72, 72, 520, 300), BODY, fontsize=11)
+
+
+def _table(page):
+    for row in range(4):
+        page.draw_line((72, 100 + 20 * row), (300, 100 + 20 * row))
+    for x in (72, 180, 300):
+        page.draw_line((x, 100), (x, 160))
+    page.insert_text((80, 115), "cell", fontsize=11)
+
+
+def _columns(page):
+    page.insert_textbox(fitz.Rect(72, 72, 280, 400), "Left column text that wraps. " * 6, fontsize=11)
+    page.insert_textbox(fitz.Rect(330, 72, 540, 400), "Right column text that wraps. " * 6, fontsize=11)
+
+
+def _heading(page):
+    page.insert_text((72, 60), "Large Heading", fontsize=24)
+    _plain(page)
+
+
+def _code(page):
+    page.insert_text((72, 72), "def answer(): return 42", fontsize=11, fontname="cour")
+
+
+@pytest.fixture
+def pdf_document():
+    document = fitz.open()
+    for draw in (_plain, _table, _columns, _heading, _code):
+        draw(document.new_page())
+    yield document
+    document.close()
+
+
+def test_plain_page_is_returned_as_text(pdf_document):
+    reason, text = _classify_page(pdf_document[0])
+    assert reason == ""
+    assert text.startswith("Plain body text")
+    assert "\n" in text  # Satırlar korunur
+
+
+@pytest.mark.parametrize("page_no, reason", [(1, "tablo"), (2, "sütun"), (3, "başlık"), (4, "kod")])
+def test_layout_pages_are_detected(pdf_document, page_no, reason):
+    assert _classify_page(pdf_document[page_no]) == (reason, "")
+
+
+def test_document_header_sizes_mark_heading_pages(pdf_document):
+    page = pdf_document[0]
+    assert _classify_page(page, header_sizes={11})[0] == "başlık"
+    assert _classify_page(page, header_sizes={30})[0] == ""
+
+
+def test_tiered_extraction_routes_pages_by_class(pdf_document):
+    results = _extract_page_range(pdf_document, list(range(5)), tiered=True)
+    assert [method for _, method in results] == [PLAIN_METHOD] + [LAYOUT_METHOD] * 4
+    assert results[0][0] == _classify_page(pdf_document[0])[1]
+
+
+def test_untiered_extraction_uses_layout_for_all_pages(pdf_document):
+    results = _extract_page_range(pdf_document, [0, 2], tiered=False)
+    assert [method for _, method in results] == [LAYOUT_METHOD, LAYOUT_METHOD]
+
+
+def test_headers_are_identified_once_and_shared_by_every_window(pdf_document, monkeypatch):
+    real_identify = advanced_multi_pdf_processor.IdentifyHeaders
+    assert real_identify is not None
+    computed = []
+    passed = []
+
+    def identify(document):
+        computed.append(real_identify(document))
+        return computed[-1]
+
+    real_to_markdown = advanced_multi_pdf_processor.pymupdf4llm.to_markdown
+
+    def to_markdown(document, **kwargs):
+        passed.append(kwargs.get("hdr_info"))
+        return real_to_markdown(document, **kwargs)
+
+    monkeypatch.setattr(advanced_multi_pdf_processor, "IdentifyHeaders", identify)
+    monkeypatch.setattr(advanced_multi_pdf_processor.pymupdf4llm, "to_markdown", to_markdown)
+    monkeypatch.setattr(advanced_multi_pdf_processor, "PDF_STREAM_PAGES", 2)
+    processor = AdvancedPDFProcessor(chunk_size=500, chunk_overlap=0, use_page_cache=False, tiered=False)
+
+    pages = list(processor.iter_page_texts("unused.pdf", pdf_document))
+    assert len(pages) == 5
+    assert len(computed) == 1
+    assert computed[0].header_id  # 24 pt başlık ayrı bir seviye olarak bulunur
+    assert len(passed) == 3 and all(hdr_info is computed[0] for hdr_info in passed)
@@ -1,12 +1,22 @@
 import os
 import io
-from typing import List, Dict, Any, Tuple
+import hashlib
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Union
 from pathlib import Path
 from datetime import datetime
 import fitz  # PyMuPDF
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+from config import (CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_STRATEGY, PDF_SHARD_PAGES, PDF_SHARD_MIN_PAGES, PDF_STREAM_PAGES, PAGE_CACHE_DIR,
+                    PDF_TIERED_EXTRACTION, PDF_HEADING_SIZE_RATIO)
+from utils.ingestion_manifest import file_sha256_path
+from utils.page_cache import PageCache
+from utils.markdown_chunker import MarkdownChunker
+from utils.debug_sink import get_debug_sink, sample_indices
+from utils.text_stats import get_text_stats, stats_metadata
 
 # PyMuPDF4LLM import - zorunlu
 try:
@@ -15,80 +25,362 @@ try:
 except ImportError:
     PYMUPDF4LLM_AVAILABLE = False
 
+# Başlık tespiti - yeni sürümlerde sadece yardımcı modülde, eskilerde paket seviyesinde
+try:
+    from pymupdf4llm.helpers.pymupdf_rag import IdentifyHeaders
+except ImportError:
+    IdentifyHeaders = getattr(pymupdf4llm, "IdentifyHeaders", None) if PYMUPDF4LLM_AVAILABLE else None
+
+# Çıkarma/birleştirme mantığı değiştiğinde artırılır - eski sayfa önbelleği geçersiz olur
+EXTRACTOR_VERSION = "pymupdf4llm_merged-6"
+
+# Sayfa başına çıkarma yolları
+LAYOUT_METHOD = "pymupdf4llm"
+PLAIN_METHOD = "plain_text"
+
+
+def _page_chunk_text(page_chunk) -> str:
+    """page_chunks=True çıktısındaki bir sayfanın metnini al (yeni sürümler dict döndürür)"""
+    if isinstance(page_chunk, dict):
+        return page_chunk.get("text", "")
+    return page_chunk
+
+
+def _classify_page(page, header_sizes=None) -> Tuple[str, str]:
+    """Sayfanın düzen analizi gerektirip gerektirmediğini ucuz sinyallerle belirle
+
+    Dönüş: (neden, düz metin). neden boşsa sayfa düz metindir ve düz metin
+    doğrudan kullanılabilir; doluysa ("tablo", "sütun", "başlık", "kod")
+    sayfa PyMuPDF4LLM'ye gönderilir.
+    """
+    # Tablo: hem yatay hem dikey çizgiler (ızgara)
+    horizontal = vertical = 0
+    for drawing in page.get_drawings():
+        for item in drawing["items"]:
+            if item[0] == "re":
+                horizontal += 2
+                vertical += 2
+            elif item[0] == "l":
+                start, end = item[1], item[2]
+                if abs(start.y - end.y) < 1:
+                    horizontal += 1
+                elif abs(start.x - end.x) < 1:
+                    vertical += 1
+        if horizontal >= 3 and vertical >= 2:
+            return "tablo", ""
+    
+    blocks = [block for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]
+              if block.get("type", 0) == 0]
+    
+    # Çok sütun / çerçevesiz tablo: dikeyde örtüşen ama yatayda ayrık bloklar
+    for i, first in enumerate(blocks):
+        x0, y0, x1, y1 = first["bbox"]
+        for second in blocks[i + 1:]:
+            bx0, by0, bx1, by1 = second["bbox"]
+            if min(y1, by1) - max(y0, by0) > 2 and (bx0 >= x1 or bx1 <= x0):
+                return "sütun", ""
+    
+    # Başlık / kod: yazı boyutu dağılımı ve eş aralıklı yazı
+    size_chars = {}
+    for block in blocks:
+        for line in block["lines"]:
+            for span in line["spans"]:
+                if not span["text"].strip():
+                    continue
+                if span["flags"] & 8:
+                    return "kod", ""
+                size = round(span["size"])
+                size_chars[size] = size_chars.get(size, 0) + len(span["text"])
+    if size_chars:
+        if header_sizes and any(size in header_sizes for size in size_chars):
+            return "başlık", ""
+        body_size = max(size_chars, key=size_chars.get)
+        if max(size_chars) >= body_size * PDF_HEADING_SIZE_RATIO:
+            return "başlık", ""
+    
+    # Düz metin: bloklar okuma sırasında, satırlar korunur
+    paragraphs = []
+    for block in sorted(blocks, key=lambda block: (block["bbox"][1], block["bbox"][0])):
+        lines = ["".join(span["text"] for span in line["spans"]).strip() for line in block["lines"]]
+        paragraph = "\n".join(line for line in lines if line)
+        if paragraph:
+            paragraphs.append(paragraph)
+    return "", "\n\n".join(paragraphs)
+
+
+@contextmanager
+def _open_pdf(pdf_source: Union[str, "fitz.Document"]):
+    """Yol verilirse PDF'i açıp kapat, açık belge verilirse olduğu gibi kullan"""
+    if isinstance(pdf_source, (str, Path)):
+        with fitz.open(pdf_source) as pdf_document:
+            yield pdf_document
+    else:
+        yield pdf_source
+
+
+def _extract_page_range(pdf_source: Union[str, "fitz.Document"], pages: List[int], hdr_info=None,
+                        tiered: bool = False) -> List[Tuple[str, str]]:
+    """Bir sayfa aralığını çıkar - (metin, çıkarma yolu) listesi
+
+    pdf_source açık bir fitz.Document olabilir; işçi süreçlerde yol verilir ve
+    belge aralık başına bir kez açılır. tiered=True ise düz metin sayfaları
+    PyMuPDF'in metin çıktısıyla alınır, sadece düzen gerektiren sayfalar
+    PyMuPDF4LLM'ye verilir.
+    """
+    texts = {}
+    with _open_pdf(pdf_source) as pdf_document:
+        layout_pages = list(pages)
+        if tiered:
+            header_sizes = set(getattr(hdr_info, "header_id", None) or {})
+            layout_pages = []
+            for page_no in pages:
+                reason, plain_text = _classify_page(pdf_document[page_no], header_sizes)
+                if reason:
+                    layout_pages.append(page_no)
+                else:
+                    texts[page_no] = (plain_text, PLAIN_METHOD)
+        
+        if layout_pages:
+            kwargs = {"page_chunks": True, "pages": layout_pages}
+            if hdr_info is not None:
+                kwargs["hdr_info"] = hdr_info
+            page_chunks = pymupdf4llm.to_markdown(pdf_document, **kwargs)
+            for page_no, page_chunk in zip(layout_pages, page_chunks):
+                texts[page_no] = (_page_chunk_text(page_chunk), LAYOUT_METHOD)
+    
+    return [texts[page_no] for page_no in pages]
+
+
+def _first_line(text: str) -> str:
+    """Metnin ilk satırı (strip edilmiş) - tüm metni bölmeden"""
+    text = text.lstrip()
+    newline = text.find('\n')
+    return (text if newline < 0 else text[:newline]).strip()
+
+
+def _last_line(text: str) -> str:
+    """Metnin son satırı (strip edilmiş) - tüm metni bölmeden"""
+    text = text.rstrip()
+    return text[text.rfind('\n') + 1:].strip()
+
+
+def _chunk_page_index(page_start: int, page_offsets: List[int], start: int, end: int) -> List[Tuple[int, int]]:
+    """Parçanın blok içindeki [start, end) aralığını orijinal sayfalara eşle
+
+    Dönüş: (sayfa no, parça içindeki başlangıç konumu) listesi. İçeriği olmayan
+    (boş) sayfalar atlanır.
+    """
+    first = max(0, bisect_right(page_offsets, start) - 1)
+    last = max(first, bisect_left(page_offsets, end) - 1)
+    index = [(page_start + first, 0)]
+    for i in range(first + 1, last + 1):
+        if i + 1 < len(page_offsets) and page_offsets[i + 1] == page_offsets[i]:
+            continue
+        index.append((page_start + i, page_offsets[i] - start))
+    return index
+
+
+def format_page_index(index: List[Tuple[int, int]]) -> str:
+    """Sayfa indeksini Chroma metadata'sına uygun kısa metne çevir (ör. 12:0;13:842)"""
+    return ";".join(f"{page}:{offset}" for page, offset in index)
+
+
+def parse_page_index(value: str) -> List[Tuple[int, int]]:
+    """format_page_index çıktısını geri çöz"""
+    index = []
+    for item in (value or "").split(";"):
+        if item:
+            page, offset = item.split(":", 1)
+            index.append((int(page), int(offset)))
+    return index
+
+
+class MergedPageBlock:
+    """Birleştirilmiş sayfa bloğu - sadece kuyruk satırı güncellenir, metin bir kez oluşturulur
+
+    Her birleştirme önceki bloğun son satırına ve yeni sayfanın ilk satırına
+    bakar; böylece uzun birleştirme zincirleri doğrusal zamanda kalır.
+    page_offsets, her sayfanın blok metnindeki başlangıç karakter konumudur;
+    page_methods her sayfanın çıkarma yoludur.
+    """
+
+    def __init__(self, page_text: str, page_num: int, page_method: str = LAYOUT_METHOD):
+        self.page_start = page_num
+        self.page_end = page_num
+        self.page_offsets = [0]
+        self.page_methods = [page_method]
+        self._raw = page_text   # Birleştirme olmadıysa sayfa metni olduğu gibi kalır
+        self._head = []         # Son satırdan önceki metin parçaları
+        self._head_len = 0      # _head parçalarının '\n' ayraçlarıyla toplam uzunluğu
+        self._tail = None       # Son satır (ham)
+
+    def last_line(self) -> str:
+        if self._tail is None:
+            return _last_line(self._raw)
+        if self._tail.strip():
+            return self._tail.strip()
+        # Son satır boş - geriye doğru ilk dolu satırı bul (metni kopyalamadan)
+        for part in reversed(self._head):
+            line = _last_line(part)
+            if line:
+                return line
+        return ""
+
+    def _strip_edges(self):
+        """Eski birleştirmedeki prev_page.strip() karşılığı - sadece kenarlara dokunur"""
+        # Sondaki boş satırları at
+        while not self._tail.strip() and self._head:
+            part = self._head.pop()
+            self._head_len -= len(part) + 1
+            newline = part.rfind('\n')
+            if newline >= 0:
+                self._head.append(part[:newline])
+                self._head_len += newline + 1
+            self._tail = part[newline + 1:]
+        
+        # Baştaki boşlukları at - sayfa başlangıç konumları da kayar
+        removed = 0
+        while self._head and self._head[0][:1].isspace():
+            stripped = self._head[0].lstrip()
+            if stripped:
+                removed += len(self._head[0]) - len(stripped)
+                self._head[0] = stripped
+                break
+            removed += len(self._head[0]) + 1
+            self._head.pop(0)
+        if not self._head and self._tail[:1].isspace():
+            stripped = self._tail.lstrip()
+            removed += len(self._tail) - len(stripped)
+            self._tail = stripped
+        
+        if removed:
+            # Nadir durum: blok boşlukla başlıyor - tüm başlangıçlar kayar
+            self._head_len = max(0, self._head_len - removed) if self._head else 0
+            self.page_offsets = [max(0, offset - removed) for offset in self.page_offsets]
+        
+        # Silinen sondaki (boş) sayfaların başlangıçları metin sonuna çekilir
+        self._clamp_offsets(self._head_len + len(self._tail))
+
+    def _clamp_offsets(self, limit: int, tail_shift: int = 0):
+        """Son satıra düşen sayfa başlangıçlarını kaydır/sınırla - sadece listenin sonuna bakar"""
+        i = len(self.page_offsets) - 1
+        while i >= 0 and self.page_offsets[i] > self._head_len:
+            offset = max(self._head_len, self.page_offsets[i] - tail_shift)
+            self.page_offsets[i] = min(offset, limit)
+            i -= 1
+
+    def append_page(self, page_text: str, page_num: int, merge_boundary, page_method: str = LAYOUT_METHOD):
+        """Sonraki sayfayı bloğa ekle - merge_boundary(son satır, ilk satır) -> (yeni satır, sayfa başlangıcı)"""
+        if self._tail is None:
+            # İlk birleştirme: blok metni strip edilir (eski davranış ile aynı)
+            text = self._raw.strip()
+            newline = text.rfind('\n')
+            if newline >= 0:
+                self._head.append(text[:newline])
+                self._head_len = newline + 1
+            self._tail = text[newline + 1:]
+            self._raw = None
+        else:
+            self._strip_edges()
+        
+        current = page_text.strip()
+        newline = current.find('\n')
+        first_line = current if newline < 0 else current[:newline]
+        
+        new_line, offset = merge_boundary(self._tail.strip(), first_line.strip())
+        page_offset = self._head_len + offset
+        
+        # Son satır strip edilip yeniden kurulur - o satırdaki sayfa başlangıçları
+        # baştaki boşluk kadar kayar ve yeni sayfanın başlangıcını geçemez
+        self._clamp_offsets(page_offset, tail_shift=len(self._tail) - len(self._tail.lstrip()))
+        self.page_offsets.append(page_offset)
+        
+        if newline < 0:
+            self._tail = new_line
+        else:
+            rest = current[newline + 1:]
+            self._head.append(new_line)
+            self._head_len += len(new_line) + 1
+            last_newline = rest.rfind('\n')
+            if last_newline >= 0:
+                self._head.append(rest[:last_newline])
+                self._head_len += last_newline + 1
+            self._tail = rest[last_newline + 1:]
+        
+        self.page_end = page_num
+        self.page_methods.append(page_method)
+
+    def text(self) -> str:
+        if self._tail is None:
+            return self._raw
+        return '\n'.join(self._head + [self._tail])
+
+
 class AdvancedPDFProcessor:
-    def __init__(self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP, debug: bool = False):
+    def __init__(self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP, debug: bool = False,
+                 shard_workers: int = 1, use_page_cache: bool = True, tiered: bool = PDF_TIERED_EXTRACTION,
+                 chunk_strategy: str = CHUNK_STRATEGY):
         self.chunk_size = chunk_size     
         self.chunk_overlap = chunk_overlap 
         self.debug = debug
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", ".", " ", ""],
-            length_function=len
-        )
-        
-        if debug:
-            self.debug_dir = Path("debug_output")
-            self.debug_dir.mkdir(exist_ok=True)
+        self.shard_workers = max(1, shard_workers)
+        self.tiered = tiered
+        # Kademeli ve tam PyMuPDF4LLM çıktıları farklı - önbellekte ayrı tutulur
+        extractor_version = EXTRACTOR_VERSION + ("+tiered" if tiered else "")
+        self.page_cache = PageCache(str(PAGE_CACHE_DIR), extractor_version) if use_page_cache else None
+        if chunk_strategy == "markdown":
+            # Başlık, tablo ve listeleri bölmeyen tek geçişli parçalayıcı
+            self.text_splitter = MarkdownChunker(chunk_size, chunk_overlap)
+        else:
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=["\n\n", "\n", ".", " ", ""],
+                length_function=len,
+                add_start_index=True  # Parçanın blok içindeki konumu - sayfa eşlemesi için
+            )
+        
+        # Debug raporları arka planda, sıkıştırılmış ve örneklenmiş olarak yazılır
+        self.debug_sink = get_debug_sink() if debug else None
 
-    def process_pdf(self, pdf_path: str) -> List[Document]:
-        """PDF'i PyMuPDF4LLM ile işle - Sayfa birleştirme ile"""
-        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    def process_pdf(self, pdf_path: str, pdf_document=None, file_hash: str = None,
+                    source_name: str = None) -> List[Document]:
+        """PDF'i PyMuPDF4LLM ile işle - Sayfa birleştirme ile
+
+        pdf_document: zaten açılmış fitz.Document (verilirse yeniden açılmaz).
+        file_hash: dosyanın bilinen SHA-256 özeti (verilirse dosya yeniden okunmaz).
+        source_name: yüklenen dosyanın asıl adı - içerik adresli depolamada dosya
+        yolu özetten oluşur; kaynak metadata'sı ve debug raporları bu adı kullanır.
+        """
+        source = source_name or os.path.basename(pdf_path)
+        pdf_name = os.path.splitext(source)[0]
         
         if self.debug:
             print(f"🚀 {pdf_name} işleniyor - PyMuPDF4LLM (Sayfa Birleştirme) kullanılıyor...")
         
-        # PyMuPDF4LLM ile işle - YENİ MERGED VERSİYON
-        try:
-            documents = self.extract_with_pymupdf4llm_merged(pdf_path)
-            if self.debug:
-                print("✓ PyMuPDF4LLM (Merged) tamamlandı")
-                
-                # Konsol çıktısında da TAM İÇERİK göster
-                print("\n--- PYMUPDF4LLM MERGED TAM METİN ÖNİZLEME ---")
-                for i, doc in enumerate(documents[:2]):  # İlk 2 sayfa
-                    page_num = doc.metadata.get('page', i+1)
-                    extraction_method = doc.metadata.get('extraction_method', 'unknown')
-                    print(f"\n🔸 SAYFA {page_num} TAM İÇERİK ({extraction_method}):")
-                    print("─" * 80)
-                    print(doc.page_content)  # TAM İÇERİK - HİÇBİR KESME YOK
-                    print("─" * 80)
-                    
-        except Exception as e:
-            if self.debug:
-                print(f"❌ PyMuPDF4LLM Merged hatası: {e}")
-                print("🔄 Normal PyMuPDF4LLM'ye geçiliyor...")
-            
-            # Fallback: Normal PyMuPDF4LLM
-            try:
-                documents = self.extract_with_pymupdf4llm(pdf_path)
-                if self.debug:
-                    print("✓ Normal PyMuPDF4LLM tamamlandı (fallback)")
-            except Exception as e2:
-                if self.debug:
-                    print(f"❌ Normal PyMuPDF4LLM de hatası: {e2}")
-                raise Exception(f"PDF işleme başarısız: {e2}")
-        
-        # Debug: Analiz kaydet
-        if self.debug:
-            self.save_extraction_analysis(documents, pdf_name)
-            self.save_final_result(documents, pdf_name)
+        # Sayfa önbelleği: aynı PDF daha önce çıkarıldıysa sadece parçalama yapılır
+        documents = None
+        if self.page_cache:
+            doc_hash = file_hash or file_sha256_path(pdf_path)
+            documents = self.page_cache.load(doc_hash, source)
+            if documents is not None and self.debug:
+                print(f"♻️ {len(documents)} sayfa önbellekten okundu, çıkarma atlandı")
+        
+        if documents is None:
+            documents = self.extract_documents(pdf_path, pdf_document)
+            for doc in documents:
+                doc.metadata["source"] = source
+            if self.page_cache:
+                self.page_cache.store(doc_hash, documents)
         
         # Metni parçalara ayır
-        chunks = self.text_splitter.split_documents(documents)
-        
-        # Metadata güncelle
-        for i, chunk in enumerate(chunks):
-            chunk.metadata.update({
-                "chunk_id": i,
-                "processing_method": "pymupdf4llm_merged"
-            })
+        chunks = self.split_documents(documents)
         
         if self.debug:
             print(f"✅ İşlem tamamlandı: {len(chunks)} parça oluşturuldu")
             
             # İstatistikler
-            total_chars = sum(len(chunk.page_content) for chunk in chunks)
+            total_chars = sum(get_text_stats(chunk).chars for chunk in chunks)
             total_markdown_features = sum(chunk.metadata.get("markdown_features", 0) for chunk in chunks)
             
             print(f"📊 Toplam karakter: {total_chars:,}")
@@ -96,25 +388,90 @@ class AdvancedPDFProcessor:
             print(f"📊 Ortalama parça boyutu: {total_chars//len(chunks) if chunks else 0:,} karakter")
             
             # Sayfa birleştirme istatistikleri
-            merged_pages = len([doc for doc in documents if doc.metadata.get('extraction_method') == 'pymupdf4llm_merged'])
             total_pages = len(documents)
             print(f"📎 Sayfa birleştirme: {total_pages} sayfa işlendi")
             
-            # TAM PARÇA ÖNİZLEMESİ
-            print("\n--- TAM PARÇA ÖNİZLEME ---")
-            for i, chunk in enumerate(chunks[:2]):  # İlk 2 parça
-                print(f"\n🔹 PARÇA {i+1} TAM İÇERİK ({len(chunk.page_content)} karakter):")
-                print("─" * 80)
-                print(chunk.page_content)  # TAM PARÇA İÇERİĞİ - HİÇBİR KESME YOK
-                print("─" * 80)
+            # Kademeli çıkarma istatistikleri
+            page_count = sum(doc.metadata.get("page_end", 0) - doc.metadata.get("page_start", 0) + 1 for doc in documents)
+            layout_pages = sum(doc.metadata.get("layout_pages", 0) for doc in documents)
+            print(f"⚡ Kademeli çıkarma: {page_count - layout_pages} düz metin, {layout_pages} PyMuPDF4LLM sayfası")
             
-            print(f"\n📁 Debug Dosyaları:")
-            print(f"  - {pdf_name}_*_pymupdf4llm_analysis.txt (TAM içerikli detaylı analiz)")
-            print(f"  - {pdf_name}_*_pymupdf4llm_final_result.txt (TAM içerikli final sonuç)")
+            # Debug: Analiz kaydet - tam içerik konsola değil, örneklenmiş olarak rapor dosyalarına
+            analysis_path = self.save_extraction_analysis(documents, pdf_name)
+            final_path = self.save_final_result(chunks, pdf_name)
+            
+            print(f"\n📁 Debug Dosyaları (arka planda yazılıyor):")
+            for filepath in (analysis_path, final_path):
+                print(f"  - {filepath.name if filepath else 'kuyruk dolu, rapor atlandı'}")
         
         return chunks
     
-    def extract_with_pymupdf4llm_merged(self, pdf_path: str) -> List[Document]:
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """Sayfa dökümanlarını parçalara ayır ve parça metadata'sını ekle"""
+        return list(self.iter_chunks(documents))
+    
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Dökümanları tek tek parçala - parçalar üretildikçe döndürülür"""
+        chunk_id = 0
+        for doc in documents:
+            page_start = doc.metadata.get("page_start", doc.metadata.get("page", 1))
+            page_offsets = doc.metadata.get("page_offsets") or [0]
+            for block_chunk_index, chunk in enumerate(self.text_splitter.split_documents([doc])):
+                # Parçanın gerçekten kapsadığı sayfalar (birleştirilmiş blok değil)
+                start = chunk.metadata.get("start_index", 0)
+                if start < 0:
+                    start = 0
+                page_index = _chunk_page_index(page_start, page_offsets, start, start + len(chunk.page_content))
+                
+                # Blok ofsetleri parçada gereksiz - yerine parçaya göre indeks tutulur
+                chunk.metadata.pop("page_offsets", None)
+                
+                # Metadata güncelle - istatistikler parçanın kendi metninden (sonraki aşamalar bunları okur)
+                chunk.metadata.update({
+                    "chunk_id": chunk_id,
+                    "block_chunk_index": block_chunk_index,  # Sayfa bloğu içindeki sıra (kalıcı parça kimliği için)
+                    "processing_method": "pymupdf4llm_merged",
+                    "chunk_page_start": page_index[0][0],
+                    "chunk_page_end": page_index[-1][0],
+                    "page_index": format_page_index(page_index),
+                    **stats_metadata(chunk.page_content)
+                })
+                chunk_id += 1
+                yield chunk
+    
+    def extract_documents(self, pdf_path: str, pdf_document=None) -> List[Document]:
+        """Birleştirilmiş çıkarmayı dene, hata olursa normal PyMuPDF4LLM'ye geç
+
+        PDF bir kez açılır; aynı fitz.Document iki yol arasında paylaşılır.
+        """
+        with _open_pdf(pdf_path if pdf_document is None else pdf_document) as pdf_document:
+            return self._extract_documents(pdf_path, pdf_document)
+    
+    def _extract_documents(self, pdf_path: str, pdf_document) -> List[Document]:
+        # PyMuPDF4LLM ile işle - YENİ MERGED VERSİYON
+        try:
+            documents = self.extract_with_pymupdf4llm_merged(pdf_path, pdf_document)
+            if self.debug:
+                print(f"✓ PyMuPDF4LLM (Merged) tamamlandı: {len(documents)} sayfa bloğu")
+                    
+        except Exception as e:
+            if self.debug:
+                print(f"❌ PyMuPDF4LLM Merged hatası: {e}")
+                print("🔄 Normal PyMuPDF4LLM'ye geçiliyor...")
+            
+            # Fallback: Normal PyMuPDF4LLM
+            try:
+                documents = self.extract_with_pymupdf4llm(pdf_path, pdf_document)
+                if self.debug:
+                    print("✓ Normal PyMuPDF4LLM tamamlandı (fallback)")
+            except Exception as e2:
+                if self.debug:
+                    print(f"❌ Normal PyMuPDF4LLM de hatası: {e2}")
+                raise Exception(f"PDF işleme başarısız: {e2}")
+        
+        return documents
+    
+    def extract_with_pymupdf4llm_merged(self, pdf_path: str, pdf_document=None) -> List[Document]:
         """PyMuPDF4LLM ile çıkarma - Sayfa geçişlerini akıllı birleştirme"""
         if not PYMUPDF4LLM_AVAILABLE:
             raise Exception("PyMuPDF4LLM mevcut değil!")
@@ -122,45 +479,11 @@ class AdvancedPDFProcessor:
         documents = []
         
         try:
-            # Önce sayfa bazında çıkar
-            page_chunks = pymupdf4llm.to_markdown(pdf_path, page_chunks=True)
-            
-            if isinstance(page_chunks, list):
-                merged_pages = []
-                
-                for i, page_text in enumerate(page_chunks):
-                    if i == 0:
-                        # İlk sayfa olduğu gibi
-                        merged_pages.append(page_text)
-                    else:
-                        prev_page = merged_pages[-1]
-                        current_page = page_text
-                        
-                        # Sayfa geçişi kontrolü
-                        if self.should_merge_pages(prev_page, current_page):
-                            # Sayfaları birleştir
-                            merged_pages[-1] = self.merge_page_content(prev_page, current_page)
-                            if self.debug:
-                                print(f"📎 Sayfa {i} ve {i+1} birleştirildi")
-                        else:
-                            # Ayrı sayfa olarak ekle
-                            merged_pages.append(current_page)
-                
-                # Document'leri oluştur
-                for page_num, page_text in enumerate(merged_pages):
-                    markdown_indicators = page_text.count('#') + page_text.count('**') + page_text.count('|')
-                    
-                    documents.append(Document(
-                        page_content=page_text,
-                        metadata={
-                            "source": os.path.basename(pdf_path),
-                            "page": page_num + 1,
-                            "extraction_method": "pymupdf4llm_merged",
-                            "format": "markdown",
-                            "markdown_features": markdown_indicators,
-                            "quality_score": len(page_text.strip()) + (markdown_indicators * 10)
-                        }
-                    ))
+            # Sayfalar akış halinde çıkarılır (büyük PDF'lerde sayfa aralıkları paralel),
+            # bloklar kapandıkça Document'e dönüştürülür
+            pages = self.iter_page_texts(pdf_path, pdf_document)
+            for block in self.iter_merged_pages(pages):
+                documents.append(self.make_merged_document(block, pdf_path))
             
         except Exception as e:
             if self.debug:
@@ -169,17 +492,217 @@ class AdvancedPDFProcessor:
         
         return documents
 
-    def should_merge_pages(self, prev_page: str, current_page: str) -> bool:
-        """İki sayfanın birleştirilip birleştirilmeyeceğini kontrol et"""
-        prev_lines = prev_page.strip().split('\n')
-        current_lines = current_page.strip().split('\n')
+    def iter_merged_pages(self, pages: Iterable[Tuple[str, str]], first_page: int = 1) -> Iterator[MergedPageBlock]:
+        """Ardışık sayfaları birleştir - kapanan her bloğu sayfa aralığı ve sınır konumlarıyla üret
+
+        pages: sırayla (sayfa metni, çıkarma yolu) çiftleri.
+        """
+        block = None
+        
+        for i, (page_text, page_method) in enumerate(pages):
+            page_num = first_page + i
+            if block is None:
+                # İlk sayfa olduğu gibi
+                block = MergedPageBlock(page_text, page_num, page_method)
+            # Sayfa geçişi kontrolü - sadece bloğun son satırı ve sayfanın ilk satırı
+            elif self._should_merge_lines(block.last_line(), _first_line(page_text)):
+                # Sayfaları birleştir
+                block.append_page(page_text, page_num, self._merge_boundary, page_method)
+                if self.debug:
+                    print(f"📎 Sayfa {page_num - 1} ve {page_num} birleştirildi")
+            else:
+                # Önceki blok kapandı, yeni blok başlat
+                yield block
+                block = MergedPageBlock(page_text, page_num, page_method)
+        
+        if block is not None:
+            yield block
+
+    def make_merged_document(self, block: MergedPageBlock, pdf_path: str) -> Document:
+        """Birleştirilmiş sayfa bloğundan Document oluştur - sayfa numarası PDF'teki gerçek ilk sayfadır"""
+        page_text = block.text()
+        
+        # Hangi yoldan çıkarıldı: tamamı düzen analizli, tamamı düz metin veya karışık
+        layout_pages = block.page_methods.count(LAYOUT_METHOD)
+        if layout_pages == len(block.page_methods):
+            extraction_method = "pymupdf4llm_merged"
+        elif layout_pages == 0:
+            extraction_method = "plain_text_merged"
+        else:
+            extraction_method = "tiered_merged"
+        
+        return Document(
+            page_content=page_text,
+            metadata={
+                "source": os.path.basename(pdf_path),
+                "page": block.page_start,
+                "page_start": block.page_start,
+                "page_end": block.page_end,
+                "page_offsets": block.page_offsets,
+                "extraction_method": extraction_method,
+                "layout_pages": layout_pages,
+                "format": "markdown",
+                # Karakter/kelime sayıları, Markdown özellikleri ve kalite skoru - tek seferde
+                **stats_metadata(page_text)
+            }
+        )
+
+    def iter_page_texts(self, pdf_path: str, pdf_document=None) -> Iterator[Tuple[str, str]]:
+        """(sayfa metni, çıkarma yolu) çiftlerini sırayla üret - büyük PDF'leri sayfa aralıklarına bölüp paralel işle"""
+        with _open_pdf(pdf_path if pdf_document is None else pdf_document) as pdf_document:
+            total_pages = len(pdf_document)
+            hdr_info = self.identify_headers(pdf_document)
+            
+            if self.shard_workers == 1 or total_pages < PDF_SHARD_MIN_PAGES:
+                # Küçük pencereler halinde çıkar - tüm belgenin Markdown'ı bellekte tutulmaz,
+                # açık belge tüm pencerelerde paylaşılır
+                for start in range(0, total_pages, PDF_STREAM_PAGES):
+                    pages = list(range(start, min(start + PDF_STREAM_PAGES, total_pages)))
+                    yield from _extract_page_range(pdf_document, pages, hdr_info, self.tiered)
+                return
+        
+        shards = [list(range(start, min(start + PDF_SHARD_PAGES, total_pages)))
+                  for start in range(0, total_pages, PDF_SHARD_PAGES)]
+        workers = min(self.shard_workers, len(shards))
         
-        if not prev_lines or not current_lines:
-            return False
+        if self.debug:
+            print(f"⚙️ {total_pages} sayfa, {len(shards)} aralığa bölündü ({workers} işçi)")
+        
+        # İşçi süreçler belgeyi kendi açar (açık belge süreçler arası taşınamaz)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_extract_page_range, pdf_path, pages, hdr_info, self.tiered) for pages in shards]
+            # Aralıklar gönderim sırasıyla birleştirilir - sayfa sırası korunur
+            for future in futures:
+                yield from future.result()
+
+    def identify_headers(self, pdf_source):
+        """Başlık seviyelerini tüm belgeye göre bir kez belirle (yol veya açık belge)
+
+        Sayfa aralıkları ayrı ayrı çıkarıldığında da sıralı çıkarma ile aynı
+        Markdown başlıkları üretilir.
+        """
+        if IdentifyHeaders is None:
+            return None
+        return IdentifyHeaders(pdf_source)
+
+    def compute_page_hashes(self, pdf_source) -> List[str]:
+        """Her sayfa için içerik özeti - revizyonlarda değişen sayfaları bulmak için"""
+        page_hashes = []
+        with _open_pdf(pdf_source) as pdf_document:
+            for page in pdf_document:
+                digest = hashlib.sha256(page.read_contents())
+                digest.update(page.get_text().encode("utf-8"))
+                page_hashes.append(digest.hexdigest()[:16])
+        return page_hashes
+
+    def process_pdf_incremental(self, pdf_path: str, previous: Dict[str, Any] = None, file_hash: str = None,
+                                source_name: str = None) -> Tuple[List[Document], Dict[str, Any]]:
+        """Önceki revizyona göre sadece değişen sayfa bloklarını işle
+
+        previous: önceki indekslemedeki {"page_hashes", "block_spans"}.
+        file_hash / source_name: process_pdf'e aynen iletilir.
+        Dönen bilgi sözlüğündeki stale_page_starts, vektör veritabanından
+        silinecek eski blokların ilk sayfalarıdır (None = dosyanın tamamı).
+        """
+        # Özetler, kısmi çıkarma ve gerekirse tam işleme aynı açık belgeyi kullanır
+        with fitz.open(pdf_path) as pdf_document:
+            return self._process_incremental(pdf_path, pdf_document, previous, file_hash, source_name)
+
+    def _process_incremental(self, pdf_path: str, pdf_document, previous: Dict[str, Any] = None, file_hash: str = None,
+                             source_name: str = None) -> Tuple[List[Document], Dict[str, Any]]:
+        page_hashes = self.compute_page_hashes(pdf_document)
+        
+        old_hashes = (previous or {}).get("page_hashes") or []
+        old_spans = [tuple(span) for span in (previous or {}).get("block_spans") or []]
         
-        prev_last_line = prev_lines[-1].strip()
-        current_first_line = current_lines[0].strip()
+        if not old_hashes or not old_spans:
+            return self._process_full(pdf_path, page_hashes, stale_page_starts=None, pdf_document=pdf_document,
+                                      file_hash=file_hash, source_name=source_name)
         
+        total_pages = len(page_hashes)
+        changed_pages = {
+            i + 1 for i in range(max(len(old_hashes), total_pages))
+            if i >= len(old_hashes) or i >= total_pages or old_hashes[i] != page_hashes[i]
+        }
+        
+        if not changed_pages:
+            if self.debug:
+                print("♻️ Değişen sayfa yok, yeniden işleme gerekmiyor")
+            return [], {"page_hashes": page_hashes, "block_spans": [list(span) for span in old_spans],
+                        "stale_page_starts": []}
+        
+        # Değişen sayfaları içeren bloklar + sınırdaki birleştirme kararları için komşu bloklar
+        affected = {i for i, (start, end) in enumerate(old_spans)
+                    if any(page in changed_pages for page in range(start, end + 1))}
+        if total_pages > len(old_hashes):
+            affected.add(len(old_spans) - 1)  # Eklenen sayfalar son bloğa birleşebilir
+        affected |= {i + step for i in affected for step in (-1, 1) if 0 <= i + step < len(old_spans)}
+        
+        affected_pages = sum(old_spans[i][1] - old_spans[i][0] + 1 for i in affected)
+        if affected_pages * 2 > total_pages:
+            # Değişiklik belgenin yarısından fazla - tam işleme daha basit
+            return self._process_full(pdf_path, page_hashes, stale_page_starts=None, pdf_document=pdf_document,
+                                      file_hash=file_hash, source_name=source_name)
+        
+        if self.debug:
+            print(f"🔍 {len(changed_pages)} sayfa değişti, {len(affected)} blok yeniden işlenecek")
+        
+        # Etkilenen blokları ardışık sayfa aralıklarına grupla
+        page_ranges = []
+        for i in sorted(affected):
+            start, end = old_spans[i]
+            if i == len(old_spans) - 1:
+                end = total_pages  # Belge sonu - eklenen sayfalar dahil
+            end = min(end, total_pages)
+            if page_ranges and page_ranges[-1][1] + 1 >= start:
+                page_ranges[-1][1] = max(page_ranges[-1][1], end)
+            else:
+                page_ranges.append([start, end])
+        
+        hdr_info = self.identify_headers(pdf_document)
+        documents = []
+        new_spans = [span for i, span in enumerate(old_spans) if i not in affected and span[0] <= total_pages]
+        for start, end in page_ranges:
+            if start > end:
+                continue
+            pages = _extract_page_range(pdf_document, list(range(start - 1, end)), hdr_info, self.tiered)
+            for block in self.iter_merged_pages(pages, first_page=start):
+                document = self.make_merged_document(block, pdf_path)
+                document.metadata["source"] = source_name or document.metadata["source"]
+                documents.append(document)
+                new_spans.append((block.page_start, block.page_end))
+        
+        chunks = self.split_documents(documents)
+        return chunks, {
+            "page_hashes": page_hashes,
+            "block_spans": [list(span) for span in sorted(new_spans)],
+            "stale_page_starts": sorted(old_spans[i][0] for i in affected)
+        }
+
+    def _process_full(self, pdf_path: str, page_hashes: List[str], stale_page_starts=None, pdf_document=None,
+                      file_hash: str = None, source_name: str = None) -> Tuple[List[Document], Dict[str, Any]]:
+        """Tüm belgeyi işle ve artımlı indeksleme bilgisini üret"""
+        chunks = self.process_pdf(pdf_path, pdf_document, file_hash, source_name)
+        block_spans = []
+        for chunk in chunks:
+            span = [chunk.metadata.get("page_start", chunk.metadata.get("page")),
+                    chunk.metadata.get("page_end", chunk.metadata.get("page"))]
+            if not block_spans or block_spans[-1] != span:
+                block_spans.append(span)
+        
+        # Parça üretmeyen (boş) sayfalar da blok sayılır, böylece sonradan dolarlarsa algılanır
+        covered = {page for start, end in block_spans for page in range(start, end + 1)}
+        block_spans.extend([page, page] for page in range(1, len(page_hashes) + 1) if page not in covered)
+        block_spans.sort()
+        return chunks, {"page_hashes": page_hashes, "block_spans": block_spans,
+                        "stale_page_starts": stale_page_starts}
+
+    def should_merge_pages(self, prev_page: str, current_page: str) -> bool:
+        """İki sayfanın birleştirilip birleştirilmeyeceğini kontrol et"""
+        return self._should_merge_lines(_last_line(prev_page), _first_line(current_page))
+
+    def _should_merge_lines(self, prev_last_line: str, current_first_line: str) -> bool:
+        """Sayfa sınırındaki iki satıra göre birleştirme kararı"""
         # Birleştirme koşulları
         merge_conditions = [
             # Kelime yarıda kalmış (tire ile)
@@ -225,107 +748,75 @@ class AdvancedPDFProcessor:
         prev_lines = prev_page.strip().split('\n')
         current_lines = current_page.strip().split('\n')
         
-        if not prev_lines or not current_lines:
-            return prev_page + '\n' + current_page
-        
-        prev_last_line = prev_lines[-1].strip()
-        current_first_line = current_lines[0].strip()
-        
+        new_last_line, _ = self._merge_boundary(prev_lines[-1].strip(), current_lines[0].strip())
+        return '\n'.join(prev_lines[:-1] + [new_last_line] + current_lines[1:])
+    
+    def _merge_boundary(self, prev_last_line: str, current_first_line: str) -> Tuple[str, int]:
+        """Sınırdaki iki satırı birleştir - (yeni satır, sonraki sayfanın satırdaki başlangıcı)"""
         # Kelime devamı kontrolü
         if self.is_word_continuation(prev_last_line, current_first_line):
             # Kelimeleri birleştir
             prev_words = prev_last_line.split()
             current_words = current_first_line.split()
+            merged_word = prev_words[-1] + current_words[0]
             
-            if prev_words and current_words:
-                merged_word = prev_words[-1] + current_words[0]
-                
-                # Yeni satırı oluştur
-                new_last_line = ' '.join(prev_words[:-1] + [merged_word] + current_words[1:])
-                
-                # Sayfaları birleştir
-                result_lines = prev_lines[:-1] + [new_last_line] + current_lines[1:]
-                return '\n'.join(result_lines)
+            # Yeni satırı oluştur
+            new_last_line = ' '.join(prev_words[:-1] + [merged_word] + current_words[1:])
+            return new_last_line, len(' '.join(prev_words))
         
         # Normal birleştirme (boşluk ile)
         if prev_last_line.endswith('-'):
             # Tire kaldır ve birleştir
-            prev_lines[-1] = prev_last_line[:-1] + current_first_line
-            result_lines = prev_lines + current_lines[1:]
-        else:
-            # Boşluk ile birleştir
-            prev_lines[-1] = prev_last_line + ' ' + current_first_line
-            result_lines = prev_lines + current_lines[1:]
+            return prev_last_line[:-1] + current_first_line, len(prev_last_line) - 1
         
-        return '\n'.join(result_lines)
+        # Boşluk ile birleştir
+        return prev_last_line + ' ' + current_first_line, len(prev_last_line) + 1
     
-    def extract_with_pymupdf4llm(self, pdf_path: str) -> List[Document]:
-        """PyMuPDF4LLM ile Markdown formatında çıkarma (LLM için optimize edilmiş)"""
+    def extract_with_pymupdf4llm(self, pdf_path: str, pdf_document=None) -> List[Document]:
+        """PyMuPDF4LLM ile Markdown formatında çıkarma (LLM için optimize edilmiş)
+
+        Belge tek geçişte işlenir: sayfa görünümü ve tam metin aynı çıktıdan
+        elde edilir.
+        """
         if not PYMUPDF4LLM_AVAILABLE:
             raise Exception("PyMuPDF4LLM mevcut değil! 'pip install pymupdf4llm' ile kurun.")
         
         documents = []
         
         try:
-            # Sayfa bazında işleme için to_markdown fonksiyonunu kullan
-            # Her sayfayı ayrı ayrı işle
-            pdf_document = fitz.open(pdf_path)
-            total_pages = len(pdf_document)
-            pdf_document.close()
-            
-            # Tüm dökümanı Markdown olarak çıkar
-            md_text = pymupdf4llm.to_markdown(pdf_path)
-            
-            # Sayfa başına böl - PyMuPDF4LLM'nin page_chunks özelliğini kullan
-            try:
-                # PyMuPDF4LLM'nin gelişmiş özelliklerini dene
-                page_chunks = pymupdf4llm.to_markdown(pdf_path, page_chunks=True)
+            with _open_pdf(pdf_path if pdf_document is None else pdf_document) as pdf_document:
+                total_pages = len(pdf_document)
                 
-                # Eğer page_chunks bir liste ise
-                if isinstance(page_chunks, list):
-                    for page_num, page_text in enumerate(page_chunks):
-                        # Markdown formatının kalitesini değerlendir
-                        markdown_indicators = page_text.count('#') + page_text.count('**') + page_text.count('|')
-                        
-                        documents.append(Document(
-                            page_content=page_text,
-                            metadata={
-                                "source": os.path.basename(pdf_path),
-                                "page": page_num + 1,
-                                "extraction_method": "pymupdf4llm",
-                                "format": "markdown",
-                                "markdown_features": markdown_indicators,
-                                "quality_score": len(page_text.strip()) + (markdown_indicators * 10)
-                            }
-                        ))
-                else:
-                    # Fallback: Manuel olarak böl
-                    raise ValueError("page_chunks desteklenmiyor")
-                    
-            except Exception:
-                # Fallback: Metni sayfa sayısına göre eşit parçalara böl
+                # Sayfa başına böl - PyMuPDF4LLM'nin page_chunks özelliğini kullan
+                page_chunks = pymupdf4llm.to_markdown(pdf_document, page_chunks=True)
+            
+            if isinstance(page_chunks, list):
+                page_texts = [_page_chunk_text(page_chunk) for page_chunk in page_chunks]
+            else:
+                # page_chunks desteklenmiyor: tam metni sayfa sayısına göre eşit parçalara böl
+                md_text = page_chunks
                 text_length = len(md_text)
                 chars_per_page = text_length // total_pages if total_pages > 0 else text_length
                 
+                page_texts = []
                 for page_num in range(total_pages):
                     start_idx = page_num * chars_per_page
                     end_idx = (page_num + 1) * chars_per_page if page_num < total_pages - 1 else text_length
-                    page_text = md_text[start_idx:end_idx]
-                    
-                    # Markdown formatının kalitesini değerlendir
-                    markdown_indicators = page_text.count('#') + page_text.count('**') + page_text.count('|')
-                    
-                    documents.append(Document(
-                        page_content=page_text,
-                        metadata={
-                            "source": os.path.basename(pdf_path),
-                            "page": page_num + 1,
-                            "extraction_method": "pymupdf4llm",
-                            "format": "markdown",
-                            "markdown_features": markdown_indicators,
-                            "quality_score": len(page_text.strip()) + (markdown_indicators * 10)
-                        }
-                    ))
+                    page_texts.append(md_text[start_idx:end_idx])
+            
+            for page_num, page_text in enumerate(page_texts):
+                documents.append(Document(
+                    page_content=page_text,
+                    metadata={
+                        "source": os.path.basename(pdf_path),
+                        "page": page_num + 1,
+                        "page_start": page_num + 1,
+                        "page_end": page_num + 1,
+                        "extraction_method": "pymupdf4llm",
+                        "format": "markdown",
+                        **stats_metadata(page_text)
+                    }
+                ))
             
         except Exception as e:
             if self.debug:
@@ -335,54 +826,34 @@ class AdvancedPDFProcessor:
         return documents
     
     def evaluate_extraction_quality(self, documents: List[Document], method_name: str = "pymupdf4llm") -> float:
-        """Çıkarma kalitesini değerlendir"""
+        """Çıkarma kalitesini değerlendir - çıkarma anında saklanan istatistiklerden"""
         if not documents:
             return 0.0
         
-        total_score = 0
-        for doc in documents:
-            content = doc.page_content.strip()
-            
-            # Temel kalite metrikleri
-            char_count = len(content)
-            word_count = len(content.split())
-            line_count = len(content.split('\n'))
-            
-            # Türkçe karakter oranı
-            turkish_chars = sum(1 for c in content if c in 'çğıöşüÇĞIİÖŞÜ')
-            turkish_ratio = turkish_chars / char_count if char_count > 0 else 0
-            
-            # Kalite skoru hesaplama
-            score = char_count * 0.3  # Karakter sayısı
-            score += word_count * 2    # Kelime sayısı
-            score += line_count * 5    # Satır sayısı
-            score += turkish_ratio * 100  # Türkçe bonus
-            
-            # PyMuPDF4LLM spesifik bonuslar
-            if doc.metadata.get("markdown_features", 0) > 0:
-                score += doc.metadata.get("markdown_features", 0) * 20
-            
-            total_score += score
-        
-        return total_score / len(documents)
+        return sum(get_text_stats(doc).extraction_score for doc in documents) / len(documents)
     
     def save_extraction_analysis(self, documents: List[Document], pdf_name: str):
-        """PyMuPDF4LLM çıkarma analizini kaydet - TAM İÇERİK"""
+        """PyMuPDF4LLM çıkarma analizini kaydet - örneklenmiş sayfalar TAM İÇERİKLE
+
+        Rapor arka planda sıkıştırılarak yazılır; dosya yolunu (kuyruk doluysa None) döndürür.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{pdf_name}_{timestamp}_pymupdf4llm_analysis.txt"
-        filepath = self.debug_dir / filename
+        documents = list(documents)
+        sampled = sample_indices(len(documents), pdf_name)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"PYMUPDF4LLM PDF ÇIKARMA ANALİZİ - TAM İÇERİK\n")
+        def render(f):
+            f.write(f"PYMUPDF4LLM PDF ÇIKARMA ANALİZİ\n")
             f.write(f"PDF: {pdf_name}\n")
             f.write(f"Tarih: {datetime.now()}\n")
             f.write("="*80 + "\n\n")
             
-            # Genel istatistikler
-            total_chars = sum(len(doc.page_content) for doc in documents)
-            total_words = sum(len(doc.page_content.split()) for doc in documents)
-            avg_quality = self.evaluate_extraction_quality(documents)
-            total_markdown_features = sum(doc.metadata.get("markdown_features", 0) for doc in documents)
+            # Genel istatistikler - çıkarma anında saklanan değerler
+            page_stats = [get_text_stats(doc) for doc in documents]
+            total_chars = sum(stats.chars for stats in page_stats)
+            total_words = sum(stats.words for stats in page_stats)
+            avg_quality = sum(stats.extraction_score for stats in page_stats) / len(page_stats) if page_stats else 0.0
+            total_markdown_features = sum(stats.markdown_features for stats in page_stats)
             
             f.write("GENEL İSTATİSTİKLER:\n")
             f.write(f"• Toplam Sayfa: {len(documents)}\n")
@@ -390,54 +861,54 @@ class AdvancedPDFProcessor:
             f.write(f"• Toplam Kelime: {total_words:,}\n")
             f.write(f"• Kalite Skoru: {avg_quality:.1f}\n")
             f.write(f"• Markdown Özellikleri: {total_markdown_features}\n")
-            f.write(f"• Ortalama Sayfa Boyutu: {total_chars//len(documents) if documents else 0:,} karakter\n\n")
+            f.write(f"• Ortalama Sayfa Boyutu: {total_chars//len(documents) if documents else 0:,} karakter\n")
+            f.write(f"• Rapordaki Sayfalar: {len(sampled)}/{len(documents)} (örneklem)\n\n")
             
             f.write("-"*80 + "\n\n")
             
-            # SAYFA BAZINDA TAM ANALIZ - HİÇBİR SINIR YOK
-            for i, doc in enumerate(documents):
+            # SAYFA BAZINDA ANALİZ - sadece örneklenen sayfalar
+            for i in sampled:
+                doc = documents[i]
                 page_num = doc.metadata.get('page', i+1)
                 
                 f.write(f"SAYFA {page_num} TAM ANALİZİ:\n")
                 f.write("-" * 60 + "\n")
                 
                 text = doc.page_content
-                quality = doc.metadata.get("quality_score", len(text))
-                markdown_features = doc.metadata.get("markdown_features", 0)
+                stats = page_stats[i]
                 
-                f.write(f"Karakter Sayısı: {len(text)}\n")
-                f.write(f"Kelime Sayısı: {len(text.split())}\n")
-                f.write(f"Satır Sayısı: {len(text.split(chr(10)))}\n")
-                f.write(f"Kalite Skoru: {quality:.1f}\n")
-                f.write(f"Markdown Özellikleri: {markdown_features}\n")
+                f.write(f"Karakter Sayısı: {stats.chars}\n")
+                f.write(f"Kelime Sayısı: {stats.words}\n")
+                f.write(f"Satır Sayısı: {stats.lines}\n")
+                f.write(f"Kalite Skoru: {stats.quality_score:.1f}\n")
+                f.write(f"Markdown Özellikleri: {stats.markdown_features}\n")
                 
                 # Markdown özelliklerini detaylandır
-                header_count = text.count('#')
-                bold_count = text.count('**')
-                table_count = text.count('|')
+                f.write(f"  - Başlık (#): {stats.headers}\n")
+                f.write(f"  - Kalın (**): {stats.bold}\n")
+                f.write(f"  - Tablo (|): {stats.pipes}\n")
+                f.write(f"  - Türkçe karakter oranı: {stats.turkish_ratio:.3f}\n")
                 
-                f.write(f"  - Başlık (#): {header_count}\n")
-                f.write(f"  - Kalın (**): {bold_count}\n")
-                f.write(f"  - Tablo (|): {table_count}\n")
-                
-                # TAM İÇERİK - HİÇBİR KESME YOK
                 f.write(f"\n📄 SAYFA {page_num} - TAM İÇERİK:\n")
                 f.write("─" * 100 + "\n")
-                f.write(text)  # Tam içerik, hiçbir kesme yok
+                f.write(text)
                 f.write("\n" + "─" * 100 + "\n")
                 f.write("\n" + "="*80 + "\n\n")
         
-        print(f"PyMuPDF4LLM TAM içerik analiz raporu kaydedildi: {filepath}")
-        return filepath
+        return self.debug_sink.submit(filename, render)
     
-    def save_final_result(self, final_docs: List[Document], pdf_name: str):
-        """Final sonucu kaydet - TAM İÇERİK"""
+    def save_final_result(self, chunks: List[Document], pdf_name: str):
+        """Final sonucu (parçaları) kaydet - örneklenmiş parçalar TAM İÇERİKLE
+
+        Rapor arka planda sıkıştırılarak yazılır; dosya yolunu (kuyruk doluysa None) döndürür.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{pdf_name}_{timestamp}_pymupdf4llm_final_result.txt"
-        filepath = self.debug_dir / filename
+        chunks = list(chunks)
+        sampled = sample_indices(len(chunks), pdf_name)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"PYMUPDF4LLM PDF İŞLEME FİNAL SONUÇ - TAM İÇERİK\n")
+        def render(f):
+            f.write(f"PYMUPDF4LLM PDF İŞLEME FİNAL SONUÇ\n")
             f.write(f"PDF: {pdf_name}\n")
             f.write(f"Tarih: {datetime.now()}\n")
             f.write("="*80 + "\n\n")
@@ -445,39 +916,38 @@ class AdvancedPDFProcessor:
             f.write("İŞLEME BİLGİLERİ:\n")
             f.write(f"• Kullanılan Yöntem: PyMuPDF4LLM\n")
             f.write(f"• Çıktı Formatı: Markdown\n")
-            f.write(f"• Toplam Sayfa: {len(final_docs)}\n")
+            f.write(f"• Toplam Parça: {len(chunks)}\n")
             
             # Kalite istatistikleri
-            total_chars = sum(len(doc.page_content) for doc in final_docs)
-            total_markdown_features = sum(doc.metadata.get("markdown_features", 0) for doc in final_docs)
-            avg_quality = self.evaluate_extraction_quality(final_docs)
+            chunk_stats = [get_text_stats(chunk) for chunk in chunks]
+            total_chars = sum(stats.chars for stats in chunk_stats)
+            total_markdown_features = sum(stats.markdown_features for stats in chunk_stats)
             
             f.write(f"• Toplam Karakter: {total_chars:,}\n")
-            f.write(f"• Ortalama Kalite: {avg_quality:.1f}\n")
-            f.write(f"• Markdown Özellikleri: {total_markdown_features}\n\n")
+            f.write(f"• Markdown Özellikleri: {total_markdown_features}\n")
+            f.write(f"• Rapordaki Parçalar: {len(sampled)}/{len(chunks)} (örneklem)\n\n")
             
             f.write("-"*80 + "\n\n")
             
-            # Her sayfa için TAM DETAY - HİÇBİR KESME YOK
-            for i, doc in enumerate(final_docs):
-                page_num = doc.metadata.get('page', i+1)
+            # Örneklenen her parça için detay
+            for i in sampled:
+                chunk = chunks[i]
+                page = chunk.metadata.get("chunk_page_start", chunk.metadata.get('page', '?'))
+                page_end = chunk.metadata.get("chunk_page_end", page)
                 
-                f.write(f"📖 SAYFA {page_num} - TAM DETAY:\n")
-                f.write(f"├─ Yöntem: PyMuPDF4LLM\n")
-                f.write(f"├─ Format: Markdown\n")
-                f.write(f"├─ Karakter Sayısı: {len(doc.page_content)}\n")
-                f.write(f"├─ Markdown Özellikleri: {doc.metadata.get('markdown_features', 0)}\n")
-                f.write(f"└─ Kalite Skoru: {doc.metadata.get('quality_score', 0):.1f}\n")
+                f.write(f"🔹 PARÇA {chunk.metadata.get('chunk_id', i)} - TAM DETAY:\n")
+                f.write(f"├─ Sayfa: {page}" + (f"-{page_end}" if page_end != page else "") + "\n")
+                f.write(f"├─ Yöntem: {chunk.metadata.get('extraction_method', 'PyMuPDF4LLM')}\n")
+                f.write(f"├─ Karakter Sayısı: {chunk_stats[i].chars}\n")
+                f.write(f"└─ Markdown Özellikleri: {chunk_stats[i].markdown_features}\n")
                 
-                # TAM İÇERİK - HİÇBİR SINIR YOK
-                f.write(f"\n📄 SAYFA {page_num} - TAM İÇERİK:\n")
+                f.write(f"\n📄 PARÇA İÇERİĞİ:\n")
                 f.write("─" * 100 + "\n")
-                f.write(doc.page_content)  # Tam içerik, hiçbir kesme yok
+                f.write(chunk.page_content)
                 f.write("\n" + "─" * 100 + "\n")
                 f.write("-" * 60 + "\n\n")
         
-        print(f"PyMuPDF4LLM TAM içerik final sonuç kaydedildi: {filepath}")
-        return filepath
+        return self.debug_sink.submit(filename, render)
 
 
 # Gereksinimler kontrolü - Sadece PyMuPDF4LLM
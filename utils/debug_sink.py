@@ -0,0 +1,112 @@
+import gzip
+import os
+import queue
+import random
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, TextIO
+from config import DEBUG_DIR, DEBUG_MAX_MB, DEBUG_SAMPLE_FIRST, DEBUG_SAMPLE_RANDOM, DEBUG_QUEUE_SIZE
+
+# Rapor yazan fonksiyon: açık (sıkıştırılmış) metin dosyasına yazar
+Renderer = Callable[[TextIO], None]
+
+
+def sample_indices(count: int, seed: str = "", first: int = DEBUG_SAMPLE_FIRST,
+                   extra: int = DEBUG_SAMPLE_RANDOM) -> List[int]:
+    """Rapora alınacak öğeler: ilk `first` öğe + kalanlardan rastgele `extra` öğe
+
+    Aynı seed (örn. PDF adı) ile aynı örnek seçilir - çalıştırmalar karşılaştırılabilir.
+    first < 0 ise hepsi seçilir.
+    """
+    if first < 0 or count <= first + extra:
+        return list(range(count))
+    rest = range(first, count)
+    return list(range(first)) + sorted(random.Random(seed).sample(rest, extra))
+
+
+class DebugSink:
+    """Debug raporlarını arka plan iş parçacığında sıkıştırarak yazan sınırlı kuyruk
+
+    İşleme yolu sadece raporu kuyruğa koyar; metin oluşturma, gzip ve disk
+    yazımı arka planda yapılır. Kuyruk doluysa rapor atlanır (işleme
+    beklemez). Her yazımdan sonra klasör boyutu max_bytes'a indirilir.
+    """
+
+    def __init__(self, directory: str = str(DEBUG_DIR), max_bytes: int = DEBUG_MAX_MB * 1024 * 1024,
+                 queue_size: int = DEBUG_QUEUE_SIZE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="debug-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, filename: str, render: Renderer) -> Optional[Path]:
+        """Raporu yazılmak üzere kuyruğa al - dosya yolunu (kuyruk doluysa None) döndür"""
+        filepath = self.directory / f"{filename}.gz"
+        try:
+            self.queue.put_nowait((filepath, render))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        return filepath
+
+    def flush(self):
+        """Kuyruktaki tüm raporlar yazılana kadar bekle"""
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            filepath, render = self.queue.get()
+            try:
+                self._write(filepath, render)
+                self._enforce_limit()
+            except Exception as e:
+                print(f"⚠️ Debug raporu yazılamadı ({filepath.name}): {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, filepath: Path, render: Renderer):
+        # Yarım dosya kalmaması için önce geçici dosyaya yaz
+        tmp_path = filepath.with_name(filepath.name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            render(f)
+        os.replace(tmp_path, filepath)
+
+    def _enforce_limit(self):
+        """Klasör sınırı aşıldıysa en eski dosyaları sil"""
+        if not self.max_bytes:
+            return
+        files = []
+        for path in self.directory.iterdir():
+            if path.is_file() and not path.name.endswith(".tmp"):
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+_sink = None
+_sink_pid = None
+_sink_lock = threading.Lock()
+
+
+def get_debug_sink() -> DebugSink:
+    """Süreç başına tek debug kuyruğu (fork edilen işçi süreçte yeniden oluşturulur)"""
+    global _sink, _sink_pid
+    with _sink_lock:
+        if _sink is None or _sink_pid != os.getpid():
+            _sink = DebugSink()
+            _sink_pid = os.getpid()
+        return _sink
+
+
+def flush_debug_sink():
+    """Bu süreçte debug kuyruğu açıldıysa bekleyen raporları yaz (süreç çıkmadan önce)"""
+    if _sink is not None and _sink_pid == os.getpid():
+        _sink.flush()
@@ -0,0 +1,79 @@
+import re
+from pathlib import Path
+from typing import List
+import numpy as np
+from config import EMBED_ONNX_DIR, EMBED_MAX_SEQ_LENGTH, EMBED_ONNX_THREADS
+
+# ONNX arka ucu opsiyonel - sadece EMBED_BACKEND = "onnx" iken gerekir
+try:
+    import onnxruntime
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+
+def export_quantized_onnx(model_name: str, output_dir: Path) -> Path:
+    """Modeli ONNX'e aktar ve ağırlıklarını dinamik int8'e çevir (bir kez, diske kaydedilir)"""
+    quantized_path = output_dir / "model_int8.onnx"
+    if quantized_path.exists():
+        return quantized_path
+
+    try:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise Exception(f"ONNX dışa aktarımı için optimum gerekli: pip install optimum[onnxruntime] ({e})")
+
+    print(f"📦 {model_name} ONNX'e aktarılıyor ve int8'e çevriliyor...")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    # Yarım dosya kalmaması için önce geçici ada yaz
+    tmp_path = output_dir / "model_int8.onnx.tmp"
+    quantize_dynamic(str(output_dir / "model.onnx"), str(tmp_path), weight_type=QuantType.QInt8)
+    tmp_path.replace(quantized_path)
+    return quantized_path
+
+
+class OnnxEmbeddings:
+    """sentence-transformers modelinin int8 ONNX karşılığı - HuggingFaceEmbeddings ile aynı arayüz
+
+    Çıktı PyTorch yolu ile aynı şekilde üretilir: son katman ortalaması
+    (mean pooling, dolgu hariç) ve L2 normalizasyonu.
+    """
+
+    def __init__(self, model_name: str, max_seq_length: int = EMBED_MAX_SEQ_LENGTH,
+                 threads: int = EMBED_ONNX_THREADS):
+        if not ONNX_AVAILABLE:
+            raise Exception("ONNX arka ucu için onnxruntime ve transformers gerekli: pip install onnxruntime transformers")
+
+        model_dir = Path(EMBED_ONNX_DIR) / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        model_path = export_quantized_onnx(model_name, model_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = max_seq_length
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length,
+                                 return_tensors="np")
+        inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self.input_names}
+        hidden = self.session.run(None, inputs)[0]
+
+        # Mean pooling - dolgu token'ları hariç
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # HuggingFaceEmbeddings ile aynı girdi: satır sonları boşluğa çevrilir
+        return self.encode([text.replace("\n", " ") for text in texts]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
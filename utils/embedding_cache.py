@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Anahtar için metin: boşluk farkları aynı parçayı farklı göstermez"""
+    return " ".join(text.split())
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()[:32]
+
+
+class EmbeddingCache:
+    """İçerik adresli kalıcı embedding önbelleği - (model, normalize metin) özeti anahtarlı
+
+    Vektörler tek bir float32 matris dosyasına satır satır eklenir ve
+    bellek eşlemeli (memmap) okunur; özet -> satır indeksi SQLite'ta tutulur.
+    Vektör veritabanı silinip yeniden kurulduğunda görülmüş parçalar modele
+    tekrar verilmez.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        model_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.directory = Path(cache_dir) / model_slug
+        self.model_name = model_name
+        self.vectors_path = self.directory / "vectors.f32"
+        self.db_path = self.directory / "index.sqlite3"
+        self._lock = threading.Lock()
+        self._matrix = None
+        self.dim = None
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self):
+        """Dizini, vektör dosyasını ve indeks tablolarını oluştur (yoksa)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path.touch(exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            if row:
+                self.dim = int(row[0])
+
+    @contextmanager
+    def _connect(self):
+        # Birden fazla süreç aynı önbelleği kullanabilir - kilit için bekle
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _rows(self) -> int:
+        if not self.dim:
+            return 0
+        return os.path.getsize(self.vectors_path) // (self.dim * 4)
+
+    def _matrix_for(self, max_row: int) -> Optional[np.ndarray]:
+        """Satırı kapsayan memmap - dosya büyüdüyse yeniden eşle"""
+        if self._matrix is None or max_row >= len(self._matrix):
+            rows = self._rows()
+            if rows == 0:
+                return None
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._matrix
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Önbellekte bulunan anahtarların vektörleri"""
+        if not keys or not self.dim:
+            return {}
+        rows = {}
+        with self._connect() as conn:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                part = unique_keys[start:start + 500]
+                rows.update(conn.execute(
+                    f"SELECT key, row FROM vectors WHERE key IN ({', '.join('?' for _ in part)})", part
+                ).fetchall())
+        if not rows:
+            return {}
+
+        with self._lock:
+            matrix = self._matrix_for(max(rows.values()))
+            if matrix is None:
+                return {}
+            # Yarım kalmış yazımdan kalan (dosyada olmayan) satırlar yok sayılır
+            return {key: matrix[row].tolist() for key, row in rows.items() if row < len(matrix)}
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Yeni vektörleri dosya sonuna ekle ve indeksle"""
+        if not items:
+            return
+        vectors = np.asarray(list(items.values()), dtype=np.float32)
+        with self._lock, self._connect() as conn:
+            # Yazma kilidi: başka süreçler aynı anda satır numarası alamaz
+            conn.execute("BEGIN IMMEDIATE")
+            if self.dim is None:
+                row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+                self.dim = int(row[0]) if row else vectors.shape[1]
+                conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+            if vectors.shape[1] != self.dim:
+                raise Exception(f"Embedding boyutu önbellekle uyuşmuyor: {vectors.shape[1]} != {self.dim}")
+
+            first_row = self._rows()
+            with open(self.vectors_path, "r+b") as f:
+                # Yarım satır varsa üzerine yazılır
+                f.seek(first_row * self.dim * 4)
+                f.write(vectors.tobytes())
+            conn.executemany("INSERT OR REPLACE INTO vectors (key, row) VALUES (?, ?)",
+                             [(key, first_row + i) for i, key in enumerate(items)])
+
+    def record_lookups(self, hits: int, misses: int):
+        """Bu süreçteki isabet/hesaplama sayaçlarını güncelle"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def reset(self):
+        """Önbelleği boşalt - dizin silinip tablolar yeniden oluşturulur, nesne kullanılmaya devam eder"""
+        with self._lock:
+            self._matrix = None
+            self.dim = None
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._open()
+
+    def stats(self) -> Dict[str, float]:
+        with self._connect() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            "vectors": count,
+            "size_mb": os.path.getsize(self.vectors_path) / 1024 / 1024,
+            "hits": hits,
+            "misses": misses
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def reset_embedding_caches(cache_dir: str):
+    """Dizindeki tüm önbellekleri sil - bu süreçte açık olanlar (ve onları tutan
+    embedding nesneleri) boş önbellekle çalışmaya devam eder"""
+    with _caches_lock:
+        live = [cache for (directory, _), cache in _caches.items() if directory == str(cache_dir)]
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    for cache in live:
+        cache.reset()
+
+
+def get_embedding_cache(cache_dir: str, model_name: str) -> EmbeddingCache:
+    """Süreç başına (dizin, model) için tek önbellek nesnesi"""
+    with _caches_lock:
+        key = (str(cache_dir), model_name)
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(cache_dir, model_name)
+        return _caches[key]
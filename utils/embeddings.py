@@ -1,19 +1,505 @@
-from typing import List
+import os
+import sys
+import hashlib
+import sqlite3
+import time
+import atexit
+import threading
+from typing import Callable, Dict, Iterable, List
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
 from langchain_community.vectorstores.utils import filter_complex_metadata
+from langchain_core.embeddings import Embeddings
+import numpy as np
 import chromadb
+from chromadb.api.shared_system_client import SharedSystemClient
 from chromadb.config import Settings
+from config import (EMBED_BATCH_SIZE, EMBED_ENCODE_BATCH_SIZE, EMBED_CACHE_DIR, EMBED_CACHE_ENABLED, EMBED_WORKERS,
+                    EMBED_BACKEND, EMBED_SESSION_TTL_SECONDS)
+from utils.embedding_cache import EmbeddingCache, embedding_key, get_embedding_cache
+from utils.ingestion_manifest import IngestionManifest
 
-class EmbeddingManager:
-    def __init__(self, model_name: str, persist_directory: str):
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=model_name,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+# Bellek ölçümü için (sadece POSIX)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _rss_mb() -> float:
+    """Sürecin o anki bellek kullanımı (MB) - ölçülemezse en yüksek değer"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return 0.0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class SharedEmbeddings(Embeddings):
+    """Süreç genelinde paylaşılan embedding modeli - tüm oturumlar ve işler aynı ağırlıkları kullanır
+
+    Model ilk kullanımda (ya da SharedVectorStore.warm_up ile arka planda) bir kez yüklenir. Metinler uzunluğa göre sıralanıp
+    encode_batch_size'lık gruplara bölünür - aynı gruptaki metinler benzer
+    uzunlukta olduğundan dolgu (padding) hesabı azalır; sonuçlar giriş
+    sırasına geri dizilir. Tokenizer aynı anda birden fazla iş parçacığından
+    kullanılamadığı için her grup kilit altında kodlanır; uzun bir indeksleme
+    sırasında gelen sorgular gruplar arasında çalışır.
+    workers > 1 ise büyük istekler sentence-transformers çok süreçli havuzuna
+    verilir (her süreç modelin bir kopyasını yükler).
+    backend: "torch" (HuggingFaceEmbeddings, fp32) veya "onnx" (int8 ONNX
+    Runtime - süreç havuzu yerine ONNX iş parçacıkları kullanılır).
+    sessions: oturum -> son görülme zamanı; session_ttl saniyedir görülmeyen
+    oturumlar düşülür. Sayaçlar _lock altında güncellenir.
+    """
+
+    def __init__(self, model_name: str, encode_batch_size: int = EMBED_ENCODE_BATCH_SIZE,
+                 workers: int = EMBED_WORKERS, backend: str = EMBED_BACKEND,
+                 session_ttl: float = EMBED_SESSION_TTL_SECONDS):
+        self.model_name = model_name
+        self.backend = backend
+        # Farklı arka uçların vektörleri birebir aynı değil - önbellekte ayrı tutulur
+        self.cache_name = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self.encode_batch_size = max(1, encode_batch_size)
+        self.workers = max(1, workers) if backend == "torch" else 1
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.sessions = {}
+        self.session_ttl = session_ttl
+        self.encoded_count = 0
+        self.encode_seconds = 0.0
+        if backend not in ("torch", "onnx"):
+            raise Exception(f"Bilinmeyen embedding arka ucu: {backend} (torch veya onnx)")
+        
+        self._model = None
+        self._load_lock = threading.Lock()
+        self.load_seconds = 0.0
+        self.memory_mb = 0.0
+
+    @property
+    def model(self):
+        """Yüklenmiş model - henüz yüklenmediyse yüklenene kadar bekler"""
+        return self._model if self._model is not None else self.load()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        """Model ağırlıklarını yükle (süreçte bir kez)"""
+        with self._load_lock:
+            if self._model is not None:
+                return self._model
+            
+            rss_before = _rss_mb()
+            start_time = time.time()
+            if self.backend == "onnx":
+                from utils.embedding_backends import OnnxEmbeddings
+                model = OnnxEmbeddings(self.model_name)
+            else:
+                model = HuggingFaceEmbeddings(
+                    model_name=self.model_name,
+                    model_kwargs={'device': 'cpu'},
+                    encode_kwargs={'normalize_embeddings': True, 'batch_size': self.encode_batch_size}
+                )
+            self.load_seconds = time.time() - start_time
+            self.memory_mb = max(0.0, _rss_mb() - rss_before)
+            self._model = model
+            print(f"🧠 Embedding modeli yüklendi: {self.model_name} [{self.backend}] "
+                  f"({self.load_seconds:.1f} sn, ~{self.memory_mb:.0f} MB)")
+            return model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start_time = time.time()
+        
+        # Uzunluğa göre sırala - gruplar benzer uzunlukta metinlerden oluşur
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        sorted_texts = [texts[i] for i in order]
+        
+        if self.workers > 1 and len(texts) > self.encode_batch_size:
+            sorted_vectors = self._encode_with_pool(sorted_texts)
+        else:
+            sorted_vectors = []
+            for start in range(0, len(sorted_texts), self.encode_batch_size):
+                with self._lock:
+                    sorted_vectors.extend(self.model.embed_documents(sorted_texts[start:start + self.encode_batch_size]))
+        
+        # Giriş sırasına geri diz
+        vectors = [None] * len(texts)
+        for position, i in enumerate(order):
+            vectors[i] = sorted_vectors[position]
+        
+        with self._lock:
+            self.encoded_count += len(texts)
+            self.encode_seconds += time.time() - start_time
+        return vectors
+
+    def _encode_with_pool(self, texts: List[str]) -> List[List[float]]:
+        """Çok süreçli havuzla kodla - havuz ilk kullanımda açılır, süreç kapanırken durdurulur"""
+        client = self.model.client
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = client.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+                atexit.register(self.close_pool)
+            # Tek süreçli yol ile aynı girdi (LangChain satır sonlarını boşluğa çevirir)
+            texts = [text.replace("\n", " ") for text in texts]
+            vectors = client.encode_multi_process(texts, self._pool, batch_size=self.encode_batch_size,
+                                                  chunk_size=self.encode_batch_size)
+        # Havuz normalize etmez - tek süreçli yol ile aynı çıktı için burada normalize et
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.maximum(norms, 1e-12)).tolist()
+
+    def close_pool(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self.model.client.stop_multi_process_pool(self._pool)
+                self._pool = None
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            return self.model.embed_query(text)
+
+    def touch_session(self, session_id: str):
+        """Oturumu etkin say ve süresi dolan oturumları düş"""
+        now = time.time()
+        with self._lock:
+            self.sessions[session_id] = now
+            for stale_id in [sid for sid, seen in self.sessions.items() if now - seen > self.session_ttl]:
+                del self.sessions[stale_id]
+
+    @property
+    def active_sessions(self) -> int:
+        """Son session_ttl saniye içinde görülen oturum sayısı"""
+        now = time.time()
+        with self._lock:
+            return sum(1 for seen in self.sessions.values() if now - seen <= self.session_ttl)
+
+    @property
+    def chunks_per_second(self) -> float:
+        with self._lock:
+            return self.encoded_count / self.encode_seconds if self.encode_seconds else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Yükleme süresi, model belleği, etkin oturum başına düşen pay ve kodlama hızı"""
+        sessions = self.active_sessions
+        return {
+            "model_name": self.model_name,
+            "backend": self.backend,
+            "loaded": self.is_loaded,
+            "load_seconds": self.load_seconds,
+            "memory_mb": self.memory_mb,
+            "sessions": sessions,
+            "memory_per_session_mb": self.memory_mb / max(1, sessions),
+            "process_rss_mb": _rss_mb(),
+            "encoded_count": self.encoded_count,
+            "chunks_per_second": self.chunks_per_second,
+            "workers": self.workers,
+            "encode_batch_size": self.encode_batch_size
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Paylaşılan modelin önüne kalıcı embedding önbelleği koyar - sadece eksikler kodlanır
+
+    hits/misses bu nesnenin sayaçlarıdır (süreç genelinde paylaşılır - bir
+    işin payı için iş öncesi ve sonrası okunur). Sorgu embedding'leri
+    önbelleğe alınmaz.
+    """
+
+    def __init__(self, model: SharedEmbeddings, cache: EmbeddingCache):
+        self.model = model
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model.cache_name, text) for text in texts]
+        found = self.cache.get_many(keys)
+        
+        # Eksik metinler (aynı metin bir kez) modele verilir
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.model.embed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+        
+        hits = len(texts) - len(missing)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(missing)
+        self.cache.record_lookups(hits, len(missing))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str, session_id: str = None, backend: str = EMBED_BACKEND) -> SharedEmbeddings:
+    """Modeli süreçte bir kez yükle ve paylaş - session_id verilirse oturum etkin sayılır"""
+    with _models_lock:
+        model = _models.get((model_name, backend))
+        if model is None:
+            model = _models[(model_name, backend)] = SharedEmbeddings(model_name, backend=backend)
+        if session_id:
+            model.touch_session(session_id)
+        return model
+
+
+_cached_embeddings = {}
+
+
+def get_cached_embeddings(model: SharedEmbeddings) -> CachedEmbeddings:
+    """Model başına süreçte tek önbellekli embedding nesnesi"""
+    with _models_lock:
+        if model.cache_name not in _cached_embeddings:
+            cache = get_embedding_cache(str(EMBED_CACHE_DIR), model.cache_name)
+            _cached_embeddings[model.cache_name] = CachedEmbeddings(model, cache)
+        return _cached_embeddings[model.cache_name]
+
+
+# İndeksleme sırasında yeni parçaların yazıldığı koleksiyon - sorgular sadece ana koleksiyonu görür
+STAGING_COLLECTION = "ingest_staging"
+
+
+class SharedVectorStore:
+    """Süreç genelinde tek Chroma istemcisi ve koleksiyon - tüm oturumlar ve işler aynı indeksi kullanır
+
+    Kalıcı dosyalar (SQLite + HNSW) bir kez açılır. Okumalar (sorgular)
+    eşzamanlı yapılır; yazmalar write_lock ile sıraya alınır. Bir yazım,
+    diğer oturumlarda diskten yeniden açmadan görünür.
+    """
+
+    def __init__(self, persist_directory: str, embeddings: Embeddings):
+        self.persist_directory = persist_directory
+        self.embeddings = embeddings
+        self.write_lock = threading.RLock()
+        self.active_ingestions = 0  # Hazırlık koleksiyonu açık işler - sıkıştırma bunları bekletmez, atlanır
+        self.client = self._open_client()
+        self.vectorstore = Chroma(
+            client=self.client,
+            persist_directory=persist_directory,
+            embedding_function=embeddings
         )
+        self._warm_thread = None
+
+    def warm_up(self) -> threading.Thread:
+        """Embedding modelini ve indeksi arka planda belleğe al (süreçte bir kez)
+
+        Bir deneme sorgusu modeli yükler ve HNSW indeksini açar; bu sırada
+        oturum bağlanmış ve RAG chain kurulmuş olur. Erken gelen ilk sorgu
+        model yüklenene kadar bekler.
+        """
+        with self.write_lock:
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self._warm_up, name="vectorstore-warm-up", daemon=True)
+                self._warm_thread.start()
+            return self._warm_thread
+
+    def _open_client(self):
+        return chromadb.PersistentClient(
+            path=self.persist_directory,
+            settings=Settings(anonymized_telemetry=False)
+        )
+
+    def open_staging(self) -> Chroma:
+        """Boş hazırlık koleksiyonu - önceki (yarım kalmış) işten kalan parçalar silinir
+
+        İş bitince close_staging çağrılmalıdır; o zamana kadar sıkıştırma yapılmaz.
+        """
+        with self.write_lock:
+            self.drop_staging()
+            staging = Chroma(
+                client=self.client,
+                collection_name=STAGING_COLLECTION,
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings
+            )
+            self.active_ingestions += 1
+            return staging
+
+    def close_staging(self):
+        """İşin hazırlık koleksiyonunu kapat ve sil"""
+        with self.write_lock:
+            self.active_ingestions -= 1
+            self.drop_staging()
+
+    def drop_staging(self):
+        """Hazırlık koleksiyonunu sil (yoksa bir şey yapma)"""
+        with self.write_lock:
+            try:
+                self.client.delete_collection(STAGING_COLLECTION)
+            except Exception:
+                pass  # Koleksiyon yok - Chroma sürümüne göre ValueError ya da NotFoundError
+
+    def compact(self) -> bool:
+        """Silmelerden sonra Chroma'nın SQLite dosyasında boşalan alanı geri kazan
+
+        Sadece chroma.sqlite3 küçülür; HNSW indeks dosyaları sıkıştırılmaz
+        (silinen vektörlerin yerini Chroma sonraki eklemelerde kullanır).
+        VACUUM write_lock altında, aktif indeksleme işi yokken ve istemci
+        kapatılmışken yapılır; sonra oturumların tuttuğu aynı Chroma nesnesi
+        yeni istemciye bağlanır. Sıkıştırma sürerken gelen bir sorgu hata
+        alabilir. Sıkıştırma yapıldıysa True döner.
+        """
+        db_path = os.path.join(self.persist_directory, "chroma.sqlite3")
+        with self.write_lock:
+            if not os.path.exists(db_path):
+                return False
+            if self.active_ingestions:
+                # İşin hazırlık koleksiyonu açık - sıkıştırma sonraki silmeye kalır
+                print("⏸️ İndeksleme işi sürüyor, vektör veritabanı sıkıştırılmadı")
+                return False
+            
+            size_before = os.path.getsize(db_path)
+            try:
+                self._close_client()
+                conn = sqlite3.connect(db_path, timeout=30)
+                try:
+                    conn.execute("VACUUM")
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                # Veritabanı başka bir süreçte meşgulse sıkıştırma sonraki silmeye kalır
+                print(f"⚠️ Vektör veritabanı sıkıştırılamadı: {e}")
+                return False
+            finally:
+                self._reconnect()
+        
+        freed_mb = (size_before - os.path.getsize(db_path)) / 1024 / 1024
+        print(f"🧹 Vektör veritabanının SQLite dosyası sıkıştırıldı ({freed_mb:.1f} MB boşaltıldı)")
+        return True
+
+    def _close_client(self):
+        # Sistem (SQLite bağlantıları, HNSW segmentleri) durdurulur ve süreç önbelleğinden
+        # çıkarılır - aksi halde yeni PersistentClient aynı açık sistemi geri verirdi
+        self.client._system.stop()
+        SharedSystemClient._identifier_to_system.pop(self.client._identifier, None)
+
+    def _reconnect(self):
+        self.client = self._open_client()
+        # Oturumlar ve RAG chain'leri aynı sarmalayıcıyı tutar - yerinde yeni istemciye bağlanır
+        self.vectorstore._client = self.client
+        self.vectorstore._collection = self.client.get_collection(self.vectorstore._collection.name)
+
+    def _warm_up(self):
+        start_time = time.time()
+        try:
+            self.vectorstore.similarity_search("ısınma", k=1)
+            print(f"🔥 Vektör veritabanı ve embedding modeli hazır ({time.time() - start_time:.1f} sn)")
+        except Exception as e:
+            print(f"⚠️ Isınma sorgusu başarısız: {e}")
+
+
+_vectorstores = {}
+_vectorstores_lock = threading.Lock()
+
+
+def get_shared_vectorstore(persist_directory: str, embeddings: Embeddings) -> SharedVectorStore:
+    """Dizin başına süreçte tek vektör veritabanı bağlantısı"""
+    key = os.path.realpath(persist_directory)
+    with _vectorstores_lock:
+        if key not in _vectorstores:
+            os.makedirs(persist_directory, exist_ok=True)
+            _vectorstores[key] = SharedVectorStore(persist_directory, embeddings)
+            print(f"📂 Vektör veritabanı açıldı: {persist_directory}")
+        return _vectorstores[key]
+
+
+def stored_chunk_count(persist_directory: str) -> int:
+    """Dizindeki koleksiyonda kaç parça var? (açık paylaşılan bağlantı varsa onun üzerinden)"""
+    with _vectorstores_lock:
+        store = _vectorstores.get(os.path.realpath(persist_directory))
+    if store is not None:
+        return store.vectorstore._collection.count()
+
+    db_path = os.path.join(persist_directory, "chroma.sqlite3")
+    if not os.path.exists(db_path):
+        return 0
+    # Bağlantı açmadan (model yüklemeden) salt okunur say
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 1  # Şema tanınmadı - indeks var kabul et, yükleme karar versin
+
+
+def has_persisted_index(persist_directory: str) -> bool:
+    """Dizinde kullanılabilir bir indeks var mı?
+
+    Manifest'te indekslenmiş dosya (ya da manifest'siz eski indeks) olmalı ve
+    koleksiyon boş olmamalı - silinmiş bir veritabanına yeniden bağlanılmaz.
+    """
+    manifest = IngestionManifest(persist_directory)
+    if manifest.path.exists() and not manifest.indexed_files():
+        return False
+    return stored_chunk_count(persist_directory) > 0
+
+
+def release_shared_vectorstore(persist_directory: str):
+    """Paylaşılan bağlantıyı bırak (dizin silinmeden önce) - sonraki erişim yeniden açar"""
+    with _vectorstores_lock:
+        _vectorstores.pop(os.path.realpath(persist_directory), None)
+    try:
+        # Chroma da yol başına istemci sistemini önbelleğe alır
+        from chromadb.api.client import SharedSystemClient
+        SharedSystemClient.clear_system_cache()
+    except (ImportError, AttributeError):
+        pass
+
+
+def chunk_document_id(doc: Document) -> str:
+    """Parçanın kalıcı kimliği: (döküman revizyonu, sayfa bloğu, blok içi sıra)
+
+    Aynı dosya aynı ayarlarla tekrar işlendiğinde aynı kimlikler üretilir -
+    vektör veritabanına yazım upsert olur, parça çoğalmaz. ingest_key'i
+    olmayan dökümanlar için kaynak adı ve içerik özeti kullanılır.
+    """
+    metadata = doc.metadata
+    document_key = metadata.get("ingest_key")
+    if not document_key:
+        content_hash = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()[:16]
+        document_key = f"{metadata.get('source', '')}:{content_hash}"
+    page_start = metadata.get("page_start", metadata.get("page", 0))
+    page_end = metadata.get("page_end", page_start)
+    index = metadata.get("block_chunk_index", metadata.get("chunk_id", 0))
+    return f"{document_key}:{page_start}-{page_end}:{index}"
+
+
+class EmbeddingManager:
+    def __init__(self, model_name: str, persist_directory: str, manifest: IngestionManifest = None,
+                 batch_size: int = EMBED_BATCH_SIZE, session_id: str = None):
+        # Model ağırlıkları her yöneticide değil, süreçte bir kez yüklenir
+        self.embeddings = get_embedding_model(model_name, session_id)
+        if EMBED_CACHE_ENABLED:
+            # Daha önce görülmüş parçaların embedding'leri diskten okunur
+            self.embeddings = get_cached_embeddings(self.embeddings)
         self.persist_directory = persist_directory
+        self.manifest = manifest or IngestionManifest(persist_directory)
+        self.batch_size = max(1, batch_size)
+        self.last_skipped_count = 0  # Son eklemede veritabanında zaten olan parçalar
+    
+    @property
+    def store(self) -> SharedVectorStore:
+        """Süreç genelinde paylaşılan Chroma bağlantısı (ilk erişimde açılır)"""
+        return get_shared_vectorstore(self.persist_directory, self.embeddings)
     
     def clean_metadata(self, documents: List[Document]) -> List[Document]:
         """Metadata'yı Chroma için temizle"""
@@ -45,40 +531,220 @@ class EmbeddingManager:
         
         return cleaned_documents
     
-    def create_vectorstore(self, documents: List[Document]) -> Chroma:
-        """Dökümanlardan vektör veritabanı oluştur"""
-        # Metadata'yı temizle
-        cleaned_documents = self.clean_metadata(documents)
-        
-        
-        filtered_documents = filter_complex_metadata(cleaned_documents)
-        
-        vectorstore = Chroma.from_documents(
-            documents=filtered_documents,
-            embedding=self.embeddings,
-            persist_directory=self.persist_directory,
-            client_settings=Settings(
-                anonymized_telemetry=False,
-                persist_directory=self.persist_directory
-            )
-        )
-        vectorstore.persist()
+    def create_vectorstore(self, documents: Iterable[Document], progress_callback: Callable[[int, int], None] = None,
+                           commit_callback: Callable[[], None] = None) -> Chroma:
+        """Dökümanları paylaşılan vektör veritabanına yaz (yoksa oluşturulur)"""
+        vectorstore = self.load_vectorstore()
+        self._add_to_vectorstore(vectorstore, documents, progress_callback, commit_callback)
         return vectorstore
     
+    def delete_document(self, source: str, compact: bool = True) -> Dict:
+        """Bir PDF'in tüm parçalarını ve manifest kayıtlarını sil
+
+        Sadece bu dökümanın parçaları silinir; diğer dökümanlar yeniden embed
+        edilmez. Dönen sözlük: silinen parça sayısı ve düşen manifest kayıtları
+        (saklanan PDF dosyasını silmek için).
+        """
+        vectorstore = self.load_vectorstore()
+        with self.store.write_lock:
+            deleted_count = self.delete_source_chunks(vectorstore, source)
+            vectorstore.persist()
+            
+            with self.manifest.update():
+                removed_entries = self.manifest.remove_file(source)
+            if compact and deleted_count:
+                self.compact()
+        
+        print(f"🗑️ {source}: {deleted_count} parça silindi")
+        return {"deleted_count": deleted_count, "removed_entries": removed_entries}
+    
+    def compact(self) -> bool:
+        """Silmelerden sonra SQLite dosyasını sıkıştır (bkz. SharedVectorStore.compact)"""
+        return self.store.compact()
+    
     def load_vectorstore(self) -> Chroma:
-        """Mevcut vektör veritabanını yükle"""
-        return Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings
-        )
+        """Paylaşılan vektör veritabanı - dosyalar süreçte bir kez açılır"""
+        return self.store.vectorstore
+    
+    def warm_up(self) -> threading.Thread:
+        """Model ve indeksi arka planda ısıt (bkz. SharedVectorStore.warm_up)"""
+        return self.store.warm_up()
     
-    def add_documents(self, documents: List[Document]):
+    def clear_vectorstore(self) -> int:
+        """Tüm parçaları sil ve manifest'i sıfırla - koleksiyon ve açık bağlantılar geçerli kalır"""
+        vectorstore = self.load_vectorstore()
+        with self.store.write_lock:
+            ids = vectorstore.get(include=[])["ids"]
+            for start in range(0, len(ids), self.batch_size):
+                vectorstore.delete(ids=ids[start:start + self.batch_size])
+            vectorstore.persist()
+            
+            with self.manifest.update():
+                self.manifest.entries = {}
+            if ids:
+                self.compact()
+        return len(ids)
+    
+    def add_documents(self, documents: Iterable[Document], progress_callback: Callable[[int, int], None] = None,
+                      commit_callback: Callable[[], None] = None):
         """Mevcut veritabanına yeni dökümanlar ekle"""
         vectorstore = self.load_vectorstore()
+        self._add_to_vectorstore(vectorstore, documents, progress_callback, commit_callback)
+    
+    def _add_to_vectorstore(self, vectorstore: Chroma, documents: Iterable[Document],
+                            progress_callback: Callable[[int, int], None] = None,
+                            commit_callback: Callable[[], None] = None):
+        """Dökümanları sabit boyutlu gruplar halinde ekle - manifest'te indekslenmiş olanları atla
+
+        documents bir generator olabilir; bellekte en fazla bir grup tutulur.
+        Parçalar kalıcı kimliklerle (chunk_document_id) yazılır; veritabanında
+        zaten olanlar atlanır (sayısı last_skipped_count).
+        progress_callback(grup_no, eklenen_parça) her gruptan sonra çağrılır.
+        Gruplar önce hazırlık koleksiyonuna yazılır; sorgular bu sırada önceki
+        indeksi görür. Tüm gruplar bitince (commit) yeni parçalar embedding'leriyle
+        birlikte ana koleksiyona kopyalanır ve revize edilen dosyaların bayat
+        parçaları silinir. commit_callback bu son aşamadan önce çağrılır.
+        İş yarıda kalırsa hazırlık koleksiyonu silinir, ana koleksiyon değişmez.
+        """
+        file_stats = {}  # ingest_key -> [parça sayısı, embedding süresi]
+        batch = []
+        batch_count = 0
+        added_count = 0
+        self.last_skipped_count = 0
+        staging = self.store.open_staging()
+        
+        def flush():
+            nonlocal batch, batch_count, added_count
+            start_time = time.time()
+            
+            # Kalıcı kimlikler - aynı kimlik grupta bir kez yazılır
+            batch_documents = {chunk_document_id(doc): doc for doc in batch}
+            
+            # Veritabanında zaten olan parçalar (aynı revizyon ve ayarlar) tekrar embed edilmez
+            existing_ids = set(vectorstore.get(ids=list(batch_documents), include=[])["ids"])
+            new_ids = [doc_id for doc_id in batch_documents if doc_id not in existing_ids]
+            self.last_skipped_count += len(batch) - len(new_ids)
+            
+            if new_ids:
+                # Metadata'yı temizle
+                cleaned_documents = self.clean_metadata([batch_documents[doc_id] for doc_id in new_ids])
+                filtered_documents = filter_complex_metadata(cleaned_documents)
+                # Yazmalar sıralı - sorgular bu sırada ana koleksiyonda devam eder
+                with self.store.write_lock:
+                    staging.add_documents(filtered_documents, ids=new_ids)
+            
+            # Grup süresini dosyalara parça sayısına göre dağıt
+            share = (time.time() - start_time) / len(batch)
+            for doc in batch:
+                ingest_key = doc.metadata.get("ingest_key")
+                if ingest_key:
+                    file_stats[ingest_key][1] += share
+            
+            batch_count += 1
+            added_count += len(batch)
+            batch = []
+            if progress_callback:
+                progress_callback(batch_count, added_count)
+        
+        try:
+            for doc in documents:
+                ingest_key = doc.metadata.get("ingest_key")
+                if ingest_key:
+                    if self.manifest.is_indexed(ingest_key):
+                        continue
+                    if ingest_key not in file_stats:
+                        file_stats[ingest_key] = [0, 0.0]
+                    file_stats[ingest_key][0] += 1
+                
+                batch.append(doc)
+                if len(batch) >= self.batch_size:
+                    flush()
+            
+            if batch:
+                flush()
+            
+            if commit_callback:
+                commit_callback()
+            
+            # Manifest diskteki güncel haliyle birleştirilir - iş sürerken yapılan silmeler korunur
+            with self.store.write_lock, self.manifest.update():
+                # Yeni parçası olmayan revizyonlar da sadece bayat parçaları silmek için işlenir
+                for ingest_key in self.manifest.pending_replacements():
+                    file_stats.setdefault(ingest_key, [0, 0.0])
+                
+                # Commit: yeni parçalar görünür olur, revize edilmiş dosyaların bayat parçaları silinir
+                self._publish_staged(staging, vectorstore)
+                for ingest_key in list(file_stats):
+                    if ingest_key not in self.manifest.entries:
+                        # İş sürerken silindi (dosya silme / veritabanını temizleme) - parçaları da kalmaz
+                        ids = vectorstore.get(where={"ingest_key": ingest_key}, include=[])["ids"]
+                        if ids:
+                            vectorstore.delete(ids=ids)
+                        del file_stats[ingest_key]
+                        continue
+                    self._delete_replaced_chunks(vectorstore, ingest_key)
+                
+                for ingest_key, (chunk_count, embed_seconds) in file_stats.items():
+                    self.manifest.mark_indexed(ingest_key, embed_seconds, chunk_count)
+                
+                vectorstore.persist()
+        finally:
+            self.store.close_staging()
+    
+    def _publish_staged(self, staging: Chroma, vectorstore: Chroma):
+        """Hazırlık koleksiyonundaki parçaları embedding'leriyle ana koleksiyona kopyala (yeniden kodlamadan)"""
+        staged_ids = staging.get(include=[])["ids"]
+        for start in range(0, len(staged_ids), self.batch_size):
+            staged = staging.get(ids=staged_ids[start:start + self.batch_size],
+                                 include=["embeddings", "documents", "metadatas"])
+            vectorstore._collection.upsert(
+                ids=staged["ids"],
+                embeddings=staged["embeddings"],
+                documents=staged["documents"],
+                metadatas=staged["metadatas"]
+            )
+    
+    def _delete_replaced_chunks(self, vectorstore: Chroma, ingest_key: str):
+        """Manifest'teki revizyon bilgisine göre bayat parçaları sil"""
+        entry = self.manifest.entries.get(ingest_key, {})
+        if not entry.get("replaces"):
+            # Manifest'ten önce indekslenmiş aynı isimli dosyanın parçaları (ingest_key yok) kalmasın
+            result = vectorstore.get(where={"source": entry["file_name"]}, include=["metadatas"])
+            legacy_ids = [doc_id for doc_id, metadata in zip(result["ids"], result["metadatas"])
+                          if not (metadata or {}).get("ingest_key")]
+            if legacy_ids:
+                vectorstore.delete(ids=legacy_ids)
+            return
+        
+        self.delete_source_chunks(vectorstore, entry["file_name"], entry.get("stale_page_starts"),
+                                  keep_ingest_key=ingest_key)
+        if entry.get("stale_page_starts") is None:
+            # Dosyanın tamamı yeniden işlendi - eski revizyonların (farklı ayarlar dahil) kayıtları düşer
+            self.manifest.remove_file(entry["file_name"], keep_keys=[ingest_key])
+    
+    def delete_source_chunks(self, vectorstore: Chroma, source: str, page_starts: List[int] = None,
+                             keep_ingest_key: str = None) -> int:
+        """Bir PDF'in parçalarını sil - page_starts verilirse sadece o sayfa bloklarını
+
+        keep_ingest_key: bu revizyona ait (yeni eklenmiş) parçalar silinmez.
+        Eski sürümlerde yazılmış parçalarda ingest_key (ve page_start) olmayabilir;
+        Chroma'nın $ne/$in filtreleri alanı olmayan kayıtları eşlemediği için
+        kaynağa göre alınıp bu koşullar metadata üzerinde uygulanır.
+        """
+        if page_starts is not None and not page_starts:
+            return 0
         
-        # Metadata'yı temizle
-        cleaned_documents = self.clean_metadata(documents)
-        filtered_documents = filter_complex_metadata(cleaned_documents)
+        result = vectorstore.get(where={"source": source}, include=["metadatas"])
+        page_starts = set(page_starts) if page_starts is not None else None
+        ids = []
+        for doc_id, metadata in zip(result["ids"], result["metadatas"]):
+            metadata = metadata or {}
+            if keep_ingest_key and metadata.get("ingest_key") == keep_ingest_key:
+                continue
+            if page_starts is not None and metadata.get("page_start", metadata.get("page")) not in page_starts:
+                continue
+            ids.append(doc_id)
         
-        vectorstore.add_documents(filtered_documents)
-        vectorstore.persist()
\ No newline at end of file
+        for start in range(0, len(ids), self.batch_size):
+            vectorstore.delete(ids=ids[start:start + self.batch_size])
+        return len(ids)
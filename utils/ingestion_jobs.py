@@ -0,0 +1,357 @@
+import json
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+from langchain.schema import Document
+from config import EMBEDDING_MODEL, VECTOR_STORE_DIR, JOBS_DB_PATH
+from utils.embeddings import EmbeddingManager, get_embedding_model
+from utils.ingestion_manifest import IngestionManifest, make_ingest_key
+from utils.text_stats import get_text_stats
+
+# Her işin aşamaları - arayüzde bu sırayla gösterilir
+JOB_STAGES = ["extract", "chunk", "embed", "upsert"]
+ACTIVE_STATUSES = ("queued", "running")
+
+_JSON_FIELDS = ("files", "settings", "progress", "messages", "result")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT,
+    files TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    progress TEXT NOT NULL,
+    messages TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    finished_at TEXT
+)
+"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class JobStore:
+    """Kalıcı iş tablosu (SQLite) - tarayıcı yenilense de işlerin durumu okunabilir"""
+
+    def __init__(self, db_path: str = str(JOBS_DB_PATH)):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        # Dosya süreç çalışırken silinmiş olabilir (clean.py) - tablo her bağlantıda garanti edilir
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                conn.execute(_SCHEMA)
+                yield conn
+        finally:
+            conn.close()
+
+    def _decode(self, row) -> Dict[str, Any]:
+        job = dict(row)
+        for field in _JSON_FIELDS:
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def create_job(self, files: List[Dict[str, Any]], settings: Dict[str, Any]) -> str:
+        """Yeni iş kaydı oluştur (kuyrukta) - iş kimliğini döndür"""
+        job_id = uuid.uuid4().hex[:12]
+        progress = {stage: {"done": 0, "total": None} for stage in JOB_STAGES}
+        progress["extract"]["total"] = len(files)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, stage, files, settings, progress, messages, created_at, updated_at) "
+                "VALUES (?, 'queued', NULL, ?, ?, ?, '[]', ?, ?)",
+                (job_id, json.dumps(files, ensure_ascii=False), json.dumps(settings, ensure_ascii=False),
+                 json.dumps(progress), _now(), _now())
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def list_jobs(self, limit: int = 10, statuses=None) -> List[Dict[str, Any]]:
+        """En yeni işler önce"""
+        query = "SELECT * FROM jobs"
+        params = []
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+        query += " ORDER BY created_at DESC, rowid DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def update(self, job_id: str, **fields):
+        """Alanları güncelle - dict/list alanlar JSON olarak yazılır"""
+        fields["updated_at"] = _now()
+        for field in _JSON_FIELDS:
+            if field in fields and fields[field] is not None:
+                fields[field] = json.dumps(fields[field], ensure_ascii=False)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def clear(self) -> int:
+        """Bitmiş işlerin geçmişini sil - kuyrukta/çalışan işler kalır"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE status NOT IN ({', '.join('?' for _ in ACTIVE_STATUSES)})",
+                ACTIVE_STATUSES
+            )
+        return cursor.rowcount
+
+    def add_message(self, job_id: str, level: str, text: str):
+        """İşin mesaj listesine ekle (info / success / warning / error)"""
+        with self._lock:
+            job = self.get(job_id)
+            messages = (job or {}).get("messages") or []
+            messages.append({"level": level, "text": text})
+            self.update(job_id, messages=messages)
+
+
+class JobProgress:
+    """Bir işin aşama ilerlemesini tutar ve her değişiklikte tabloya yazar"""
+
+    def __init__(self, store: JobStore, job_id: str, progress: Dict[str, Dict]):
+        self.store = store
+        self.job_id = job_id
+        self.progress = progress
+
+    def set(self, stage: str, done: int = None, total: int = None, advance: int = 0):
+        entry = self.progress[stage]
+        if done is not None:
+            entry["done"] = done
+        entry["done"] += advance
+        if total is not None:
+            entry["total"] = total
+        self.store.update(self.job_id, stage=stage, progress=self.progress)
+
+    def message(self, level: str, text: str):
+        self.store.add_message(self.job_id, level, text)
+
+
+def iter_job_documents(job: Dict[str, Any], manifest: IngestionManifest, progress: JobProgress,
+                       stats: Dict[str, Any], created_paths: Set[str]) -> Iterator[Document]:
+    """İşteki PDF'leri çıkar ve parçala - parçaları dosya dosya üretir (generator)
+
+    Tüm dosyaların parçaları bellekte biriktirilmez; tüketici (embedding)
+    parçaları geldikçe gruplar halinde veritabanına yazar. Atlanan/başarısız
+    dosyalar ve toplamlar stats sözlüğüne yazılır. Atlanan ve başarıyla
+    işlenen dosyalar created_paths'ten çıkarılır (kalanları çağıran siler).
+    """
+    from utils.parallel_pdf_processor import ParallelPDFProcessor
+
+    settings = job["settings"]
+    ingest_settings = settings["ingest"]
+    pdf_processor = ParallelPDFProcessor(ingest_settings["chunk_size"], ingest_settings["chunk_overlap"],
+                                         debug=settings.get("debug", False), max_workers=settings["workers"])
+
+    skipped_files = stats.setdefault("skipped_files", [])
+    failed_files = stats.setdefault("failed_files", [])
+    stats.setdefault("chunk_count", 0)
+    stats.setdefault("char_count", 0)
+
+    # Aynı içerik + aynı ayarlarla indekslenmiş PDF'leri atla
+    pending_files = []
+    for file_info in job["files"]:
+        ingest_key = make_ingest_key(file_info["hash"], ingest_settings)
+        if manifest.is_indexed(ingest_key):
+            created_paths.discard(file_info["path"])
+            progress.message("info", f"⏭️ {file_info['name']} zaten indekslenmiş, atlandı")
+            skipped_files.append(file_info["name"])
+            progress.set("extract", advance=1)
+        else:
+            # Aynı isimli önceki revizyonun yerini alır - ayarlar aynıysa sadece değişen sayfalar işlenir
+            previous_key, previous_entry = manifest.find_previous(file_info["name"])
+            if previous_entry and previous_entry.get("settings") != ingest_settings:
+                # Farklı ayarlarla parçalanmış: sayfa farkı kullanılamaz, eski parçaların hepsi silinir
+                progress.message("info", f"🔁 {file_info['name']}: ayarlar değişti, önceki indeksin yerini alacak")
+                previous_entry = None
+            pending_files.append((file_info, ingest_key, previous_key, previous_entry))
+
+    # Sonuçlar yükleme sırasıyla gelir
+    previous_states = [previous_entry for *_, previous_entry in pending_files]
+    results = pdf_processor.process_pdfs([file_info["path"] for file_info, *_ in pending_files], previous_states,
+                                         file_hashes=[file_info["hash"] for file_info, *_ in pending_files],
+                                         source_names=[file_info["name"] for file_info, *_ in pending_files])
+    for (file_info, ingest_key, previous_key, previous_entry), result in zip(pending_files, results):
+        file_name = file_info["name"]
+        progress.set("extract", advance=1)
+
+        if result["error"] is not None:
+            progress.message("error", f"❌ {file_name} işlenirken hata: {str(result['error'])}")
+            failed_files.append(file_name)
+            continue
+
+        # İşlenen dosya kalıcı - temizlenmez
+        created_paths.discard(result["pdf_path"])
+        documents = result["documents"]
+        ingest_info = result["ingest_info"]
+
+        # Embedding sonrası manifest'e işlenebilmesi için anahtarı parçalara ekle
+        for doc in documents:
+            doc.metadata["source"] = file_name
+            doc.metadata["ingest_key"] = ingest_key
+        unchanged = bool(previous_key) and not documents and ingest_info.get("stale_page_starts") == []
+        with manifest.update():
+            manifest.record_extraction(ingest_key, file_name, ingest_settings, len(documents),
+                                       result["elapsed"], ingest_info, replaces=previous_key)
+            if unchanged:
+                # İçerik aynı (örn. sadece PDF metadata'sı değişmiş) - embedding gerekmez
+                manifest.mark_indexed(ingest_key, 0.0)
+
+        if unchanged:
+            progress.message("info", f"⏭️ {file_name}: değişen sayfa yok, atlandı")
+            skipped_files.append(file_name)
+            continue
+
+        if previous_key and ingest_info.get("stale_page_starts") is not None:
+            progress.message("info", f"🔁 {file_name}: önceki revizyona göre "
+                                     f"{len(ingest_info['stale_page_starts'])} sayfa bloğu güncelleniyor")
+
+        message = f"✅ {file_name}: {len(documents)} parça"
+        # Markdown özelliklerini göster
+        total_markdown_features = sum(doc.metadata.get('markdown_features', 0) for doc in documents)
+        if total_markdown_features > 0:
+            message += f", {total_markdown_features} markdown özelliği (başlık, tablo, vurgular)"
+        progress.message("success", message)
+
+        # Parçaları embedding'e aktar - bu dosyanın listesi sonra serbest kalır
+        stats["chunk_count"] += len(documents)
+        stats["char_count"] += sum(get_text_stats(doc).chars for doc in documents)
+        progress.set("chunk", done=stats["chunk_count"])
+        yield from documents
+        del documents, result
+
+
+def run_ingestion_job(store: JobStore, job_id: str):
+    """Bir işi baştan sona çalıştır: çıkarma/parçalama -> embedding -> veritabanına yazma
+
+    Gruplar hazırlık koleksiyonuna yazılır; açık oturumlar iş boyunca önceki
+    indeksi kullanmaya devam eder. Yeni parçalar ancak tüm gruplar bittiğinde
+    (upsert aşaması) ana koleksiyona aktarılır ve eski sürümün parçaları silinir.
+    """
+    job = store.get(job_id)
+    progress = JobProgress(store, job_id, job["progress"])
+    store.update(job_id, status="running", stage="extract")
+
+    # Bu işte yazılan ve henüz başarıyla işlenmemiş dosyalar - iş nerede biterse bitsin kalanlar silinir
+    created_paths = {file_info["path"] for file_info in job["files"] if file_info.get("created")}
+    try:
+        _run_job(store, job_id, job, progress, created_paths)
+    finally:
+        for pdf_path in created_paths:
+            Path(pdf_path).unlink(missing_ok=True)
+
+
+def _run_job(store: JobStore, job_id: str, job: Dict[str, Any], progress: JobProgress, created_paths: Set[str]):
+    """run_ingestion_job'un gövdesi - yükleme dosyalarının temizliği çağıranda"""
+    manifest = IngestionManifest(str(VECTOR_STORE_DIR))
+    stats = {}
+    documents = iter_job_documents(job, manifest, progress, stats, created_paths)
+
+    embedding_manager = EmbeddingManager(EMBEDDING_MODEL, str(VECTOR_STORE_DIR), manifest=manifest)
+    # Kodlama hızı için modelin sayaçları (süreç genelinde) iş öncesi ve sonrası okunur
+    model = get_embedding_model(EMBEDDING_MODEL)
+    encoded_before, encode_seconds_before = model.encoded_count, model.encode_seconds
+    embeddings = embedding_manager.embeddings
+    hits_before, misses_before = getattr(embeddings, "hits", 0), getattr(embeddings, "misses", 0)
+
+    def report_embed(batch_count, added_count):
+        progress.set("embed", done=added_count, total=stats.get("chunk_count"))
+
+    def report_commit():
+        progress.set("chunk", total=stats.get("chunk_count"))
+        progress.set("embed", total=stats.get("chunk_count"))
+        progress.set("upsert", done=0, total=1)
+
+    embedding_manager.create_vectorstore(documents, report_embed, report_commit)
+    progress.set("upsert", done=1, total=1)
+
+    # Kalıcı kimlikleri zaten veritabanında olan parçalar tekrar yazılmadı
+    stats["existing_chunks"] = embedding_manager.last_skipped_count
+    if stats["existing_chunks"]:
+        progress.message("info", f"♻️ {stats['existing_chunks']} parça vektör veritabanında zaten vardı, atlandı")
+
+    # Embedding önbelleği: isabet eden parçalar modele verilmedi
+    stats["embed_cache_hits"] = getattr(embeddings, "hits", 0) - hits_before
+    stats["embed_cache_misses"] = getattr(embeddings, "misses", 0) - misses_before
+    if stats["embed_cache_hits"]:
+        progress.message("info", f"🗄️ Embedding önbelleği: {stats['embed_cache_hits']} parça önbellekten, "
+                                 f"{stats['embed_cache_misses']} parça yeniden hesaplandı")
+
+    encoded_count = model.encoded_count - encoded_before
+    encode_seconds = model.encode_seconds - encode_seconds_before
+    if encoded_count and encode_seconds:
+        stats["embed_chunks_per_second"] = encoded_count / encode_seconds
+        progress.message("info", f"⚡ Embedding: {encoded_count} parça, {stats['embed_chunks_per_second']:.1f} parça/sn")
+
+    processed_count = len(job["files"]) - len(stats.get("skipped_files", [])) - len(stats.get("failed_files", []))
+    status = "failed" if processed_count == 0 and stats.get("failed_files") else "done"
+    store.update(job_id, status=status, result=dict(stats, processed_count=processed_count), finished_at=_now())
+
+
+class IngestionJobRunner:
+    """Süreç genelinde tek arka plan iş parçacığı - işler sırayla çalışır
+
+    Vektör veritabanına yazmalar böylece seri kalır. Sunucu yeniden
+    başlatıldığında yarım kalan işler (dosyaları diskte olduğu için) tekrar
+    kuyruğa alınır.
+    """
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self.queue = queue.Queue()
+        for job in reversed(store.list_jobs(limit=1000, statuses=ACTIVE_STATUSES)):
+            self.queue.put(job["id"])
+        self._thread = threading.Thread(target=self._run, name="ingestion-jobs", daemon=True)
+        self._thread.start()
+
+    def submit(self, files: List[Dict[str, Any]], settings: Dict[str, Any]) -> str:
+        """İşi kaydet ve kuyruğa al"""
+        job_id = self.store.create_job(files, settings)
+        self.queue.put(job_id)
+        return job_id
+
+    def _run(self):
+        while True:
+            job_id = self.queue.get()
+            try:
+                run_ingestion_job(self.store, job_id)
+            except Exception as e:
+                self.store.add_message(job_id, "error", f"❌ İş başarısız: {str(e)}")
+                self.store.update(job_id, status="failed", error=str(e), finished_at=_now())
+            finally:
+                self.queue.task_done()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> IngestionJobRunner:
+    """Süreç genelinde paylaşılan iş yürütücüsü (ilk çağrıda başlatılır)"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = IngestionJobRunner(JobStore())
+        return _runner
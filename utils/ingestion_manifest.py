@@ -0,0 +1,197 @@
+import os
+import json
+import hashlib
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_FILENAME = "ingestion_manifest.json"
+
+# Manifest dosyası başına kilit - aynı süreçteki iş ve arayüz değişiklikleri sırayla yazılır
+_file_locks = {}
+_file_locks_lock = threading.Lock()
+
+
+def _file_lock(path: Path) -> threading.RLock:
+    with _file_locks_lock:
+        return _file_locks.setdefault(os.path.realpath(path), threading.RLock())
+
+
+def file_sha256(data) -> str:
+    """Dosya içeriğinin SHA-256 özeti (bytes veya memoryview)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_sha256_path(path: str) -> str:
+    """Dosyayı bloklar halinde okuyarak SHA-256 özetini hesapla"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def store_pdf(data, file_hash: str, directory) -> Tuple[Path, bool]:
+    """Yüklemeyi içerik adresli son konumuna tek seferde yaz (geçici dosya + atomik bağlama)
+
+    Dönüş: (dosya yolu, bu çağrıda mı oluşturuldu). Aynı içerik zaten varsa
+    tekrar yazılmaz. Aynı yüklemeyi aynı anda yazan başka bir iş parçacığı ya
+    da süreç önce bitirirse onun dosyası kullanılır (oluşturan o sayılır).
+    """
+    target = Path(directory) / f"{file_hash}.pdf"
+    if target.exists():
+        return target, False
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Geçici ad her yazım için benzersiz - aynı süreçteki iş parçacıkları çakışmaz
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        try:
+            # Hedef yoksa oluşturur, varsa FileExistsError - kazanan tek yazım
+            os.link(tmp_path, target)
+        except FileExistsError:
+            return target, False
+        except OSError:
+            # Sabit bağlantı desteklemeyen dosya sistemi: içerik aynı, üzerine yazmak güvenli
+            if target.exists():
+                return target, False
+            os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return target, True
+
+
+def make_ingest_key(file_hash: str, settings: Dict) -> str:
+    """Dosya özeti + çıkarma/parçalama ayarlarından manifest anahtarı üret"""
+    settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{file_hash}:{settings_hash[:16]}"
+
+
+class IngestionManifest:
+    """İndekslenmiş PDF'lerin kalıcı kaydı - aynı içerik + aynı ayarlar tekrar işlenmez"""
+
+    def __init__(self, persist_directory: str):
+        self.path = Path(persist_directory) / MANIFEST_FILENAME
+        self.entries: Dict[str, Dict] = self._read()
+
+    def _read(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            # Bozuk manifest: sıfırdan başla, dosyalar yeniden indekslenir
+            return {}
+
+    @contextmanager
+    def update(self):
+        """Diskteki güncel kaydı kilit altında oku, değiştir ve yaz
+
+        Manifest'i uzun süre tutan bir iş, arada arayüzden yapılan silme ve
+        temizleme işlemlerini eski kopyasıyla ezmez - her değişiklik son
+        kaydın üzerine uygulanır.
+        """
+        with _file_lock(self.path):
+            self.entries = self._read()
+            yield self
+            self.save()
+
+    def is_indexed(self, ingest_key: str) -> bool:
+        """Bu içerik ve ayarlarla dosya vektör veritabanında mı?"""
+        entry = self.entries.get(ingest_key)
+        return bool(entry and entry.get("status") == "indexed")
+
+    def find_previous(self, file_name: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Aynı isimle en son indekslenmiş revizyonu bul - ayarlardan bağımsız
+
+        Yeni revizyon bunun yerini alır. Ayarlar aynıysa sadece değişen sayfalar
+        yeniden işlenir (artımlı indeksleme); farklıysa (örn. chunk_size) dosya
+        baştan işlenir ve eski revizyonun tüm parçaları silinir.
+        """
+        candidates = [
+            (entry.get("updated_at", ""), key, entry) for key, entry in self.entries.items()
+            if entry.get("file_name") == file_name and entry.get("status") == "indexed"
+        ]
+        if not candidates:
+            return None, None
+        _, key, entry = max(candidates, key=lambda candidate: candidate[0])
+        return key, entry
+
+    def record_extraction(self, ingest_key: str, file_name: str, settings: Dict,
+                          chunk_count: int, extract_seconds: float,
+                          ingest_info: Optional[Dict] = None, replaces: Optional[str] = None):
+        """Çıkarma/parçalama tamamlandı - embedding bekleniyor
+
+        replaces: aynı dosyanın önceki revizyonunun anahtarı. Embedding sırasında
+        o revizyonun bayat parçaları (stale_page_starts) vektör veritabanından silinir.
+        """
+        ingest_info = ingest_info or {}
+        file_hash = ingest_key.split(":", 1)[0]
+        self.entries[ingest_key] = {
+            "file_name": file_name,
+            "file_hash": file_hash,
+            "settings": settings,
+            "status": "extracted",
+            "chunk_count": chunk_count,
+            "extract_seconds": round(extract_seconds, 3),
+            "embed_seconds": None,
+            "page_hashes": ingest_info.get("page_hashes", []),
+            "block_spans": ingest_info.get("block_spans", []),
+            "replaces": replaces,
+            "stale_page_starts": ingest_info.get("stale_page_starts"),
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def mark_indexed(self, ingest_key: str, embed_seconds: float, chunk_count: Optional[int] = None):
+        """Embedding ve vektör veritabanına yazma tamamlandı"""
+        entry = self.entries.setdefault(ingest_key, {"file_hash": ingest_key.split(":", 1)[0]})
+        entry["status"] = "indexed"
+        entry["embed_seconds"] = round(embed_seconds, 3)
+        if chunk_count is not None:
+            entry["chunk_count"] = chunk_count
+        entry["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        
+        # Önceki revizyonun yerini aldı - eski kaydı düşür
+        replaced_key = entry.pop("replaces", None)
+        entry.pop("stale_page_starts", None)
+        if replaced_key and replaced_key != ingest_key:
+            self.entries.pop(replaced_key, None)
+
+    def pending_replacements(self) -> List[str]:
+        """Yeni parçası olmayan ama önceki revizyonu güncellenecek dosyalar"""
+        return [key for key, entry in self.entries.items()
+                if entry.get("status") == "extracted" and entry.get("replaces")
+                and not entry.get("chunk_count")]
+
+    def indexed_files(self) -> Dict[str, Dict]:
+        """Dosya adı -> en son indekslenmiş revizyonun kaydı"""
+        files = {}
+        for entry in self.entries.values():
+            if entry.get("status") != "indexed" or not entry.get("file_name"):
+                continue
+            current = files.get(entry["file_name"])
+            if current is None or entry.get("updated_at", "") > current.get("updated_at", ""):
+                files[entry["file_name"]] = entry
+        return files
+
+    def remove_file(self, file_name: str, keep_keys: Iterable[str] = ()) -> List[Dict]:
+        """Dosyanın tüm revizyon kayıtlarını düşür (keep_keys hariç) - düşenleri döndür"""
+        keep_keys = set(keep_keys)
+        keys = [key for key, entry in self.entries.items()
+                if entry.get("file_name") == file_name and key not in keep_keys]
+        return [self.entries.pop(key) for key in keys]
+
+    def save(self):
+        """Manifest'i atomik olarak diske yaz - eşzamanlı değişiklikler için update() kullanın"""
+        with _file_lock(self.path):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": self.entries}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
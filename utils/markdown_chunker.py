@@ -0,0 +1,211 @@
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+from langchain.schema import Document
+from config import CHUNK_SIZE, CHUNK_OVERLAP
+
+# Satır türleri
+HEADING = "heading"
+TABLE = "table"
+LIST = "list"
+CODE = "code"
+TEXT = "text"
+
+_LIST_ITEM = re.compile(r"([-*+•]|\d+[.)])\s")
+_SENTENCE_END = re.compile(r"[.!?:;]\s+")
+
+Block = Tuple[str, int, int]  # (tür, başlangıç, bitiş) - metin içindeki karakter konumları
+
+
+def _line_kind(stripped: str) -> Optional[str]:
+    """Tek bir Markdown satırının türü (boş satır için None)"""
+    if not stripped:
+        return None
+    if stripped.startswith("#"):
+        return HEADING
+    if stripped.startswith("|"):
+        return TABLE
+    if _LIST_ITEM.match(stripped):
+        return LIST
+    return TEXT
+
+
+def iter_markdown_blocks(text: str) -> Iterator[Block]:
+    """Markdown'ı tek geçişte bloklara ayır: başlık, tablo, liste, kod ve paragraf
+
+    Her başlık satırı ayrı bir bloktur; tablo ve liste satırları boş satıra
+    ya da tür değişene kadar aynı blokta kalır, kod blokları kapanana kadar
+    bölünmez.
+    """
+    block_kind = None
+    block_start = block_end = 0
+    in_code = False
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        newline = text.find("\n", pos)
+        line_end = length if newline < 0 else newline
+        stripped = text[pos:line_end].strip()
+
+        if in_code:
+            # Kod bloğu kapanana kadar boş satırlar dahil her şey aynı blokta
+            block_end = line_end
+            if stripped.startswith("```"):
+                in_code = False
+                yield block_kind, block_start, block_end
+                block_kind = None
+            pos = line_end + 1
+            continue
+
+        kind = CODE if stripped.startswith("```") else _line_kind(stripped)
+
+        # Liste maddesinin devam satırları listeye aittir
+        if kind == TEXT and block_kind == LIST:
+            kind = LIST
+
+        if block_kind is not None and (kind != block_kind or kind in (HEADING, CODE)):
+            yield block_kind, block_start, block_end
+            block_kind = None
+
+        if kind is not None:
+            if block_kind is None:
+                block_kind = kind
+                block_start = pos
+            block_end = line_end
+            in_code = kind == CODE
+
+        pos = line_end + 1
+
+    if block_kind is not None:
+        yield block_kind, block_start, block_end
+
+
+class MarkdownChunker:
+    """Yapıyı koruyan tek geçişli Markdown parçalayıcı
+
+    Bloklar chunk_size'a kadar art arda eklenir; tablo, liste ve kod blokları
+    sığdıkça bölünmez, başlıklar bir sonraki bloğuyla aynı parçada kalır.
+    Örtüşme sabit karakter sayısı değil, önceki parçanın son cümlesidir
+    (en fazla chunk_overlap karakter); tablo/başlık sonlarında örtüşme yoktur.
+    Her parça metnin kesintisiz bir alt dizisidir, start_index ile konumu tutulur.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_overlap = max(0, min(chunk_overlap, chunk_size // 2))
+        # Bu boyuttan büyük parça yeni başlıkta kapatılır - başlık yoğun metinde çok küçük parça olmaz
+        self.min_section_size = self.chunk_size // 4
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[start:end] for start, end in self.iter_spans(text)]
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """Dökümanları parçala - metadata kopyalanır ve start_index eklenir"""
+        chunks = []
+        for doc in documents:
+            for start, end in self.iter_spans(doc.page_content):
+                metadata = dict(doc.metadata)
+                metadata["start_index"] = start
+                chunks.append(Document(page_content=doc.page_content[start:end], metadata=metadata))
+        return chunks
+
+    def iter_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Parçaların (başlangıç, bitiş) karakter aralıkları"""
+        current: List[Block] = []  # Açık parçadaki bloklar
+
+        for block in iter_markdown_blocks(text):
+            kind, start, end = block
+            if current and self._fits(current, block):
+                current.append(block)
+                continue
+
+            if current:
+                # Sondaki başlıklar parçayı kapatmaz, bir sonraki bloğun önüne taşınır -
+                # blok sığmıyorsa bölünen ilk parçanın başında kalır
+                carried = []
+                while current and current[-1][0] == HEADING:
+                    carried.insert(0, current.pop())
+                if carried and carried[-1][2] - carried[0][1] > self.chunk_size // 2:
+                    # Parçanın yarısından uzun başlık grubu taşınmaz
+                    current.extend(carried)
+                    carried = []
+                if current:
+                    yield from self._emit(text, current[0][1], current[-1][2])
+                current = carried or self._overlap_prefix(text, current[-1], block)
+            current.append(block)
+
+            # Tek başına sığmayan blok: uygun sınırlardan bölünür, kalan kısım açık parça olur
+            pos = current[0][1]
+            if end - pos > self.chunk_size:
+                # İlk kesim bloğun içinde aranır - önündeki başlık tek başına parça olmaz
+                cut_from = start
+                while end - pos > self.chunk_size:
+                    cut = self._cut_point(text, max(pos, cut_from), pos + self.chunk_size, kind)
+                    yield from self._emit(text, pos, cut)
+                    overlap_start = self._overlap_start(text, pos, cut) if kind == TEXT else None
+                    pos = overlap_start if overlap_start is not None and overlap_start > pos else cut
+                current = [(kind, pos, end)]
+
+        if current:
+            yield from self._emit(text, current[0][1], current[-1][2])
+
+    def _fits(self, current: List[Block], block: Block) -> bool:
+        """Blok açık parçaya eklenebilir mi?"""
+        kind, _, end = block
+        if end - current[0][1] > self.chunk_size:
+            return False
+        # Yeni bölüm: parça yeterince büyükse başlıkta kapat
+        if kind == HEADING and current[-1][0] != HEADING and current[-1][2] - current[0][1] >= self.min_section_size:
+            return False
+        return True
+
+    def _overlap_prefix(self, text: str, last_block: Block, block: Block) -> List[Block]:
+        """Yeni parçanın başına eklenecek örtüşme: önceki düz metnin son cümlesi"""
+        last_kind, last_start, last_end = last_block
+        if block[0] == HEADING or last_kind not in (TEXT, LIST):
+            return []
+        overlap_start = self._overlap_start(text, last_start, last_end)
+        if overlap_start is None or block[2] - overlap_start > self.chunk_size:
+            return []
+        return [(last_kind, overlap_start, last_end)]
+
+    def _emit(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """Kenar boşluklarını atarak aralığı üret (boşsa hiçbir şey)"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            yield start, end
+
+    def _overlap_start(self, text: str, start: int, end: int) -> Optional[int]:
+        """Parçanın son cümlesinin başlangıcı - chunk_overlap içinde değilse None"""
+        if not self.chunk_overlap:
+            return None
+        window_start = max(start, end - self.chunk_overlap)
+        window = text[window_start:end].rstrip()
+        last = None
+        for match in _SENTENCE_END.finditer(window):
+            if match.end() < len(window):
+                last = match
+        if last is None:
+            return None
+        return window_start + last.end()
+
+    def _cut_point(self, text: str, start: int, limit: int, kind: str) -> int:
+        """[start, limit] içinde en iyi kesme noktası: satır/cümle sonu, boşluk, en son sert kesim"""
+        window = text[start:limit]
+        if kind != TEXT:
+            newline = window.rfind("\n")
+            if newline > 0:
+                return start + newline + 1
+        last = None
+        for match in _SENTENCE_END.finditer(window):
+            last = match
+        if last is not None and last.start() > 0:
+            return start + last.end()
+        for separator in ("\n", " "):
+            position = window.rfind(separator)
+            if position > 0:
+                return start + position + 1
+        return limit
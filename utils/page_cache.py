@@ -0,0 +1,81 @@
+import json
+import sqlite3
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+from langchain.schema import Document
+
+
+class PageCache:
+    """Birleştirilmiş sayfa Markdown'ı için disk önbelleği - (belge özeti, sayfa) anahtarlı
+
+    Metin zlib ile sıkıştırılır. Chunk ayarları değiştiğinde çıkarma yeniden
+    yapılmaz, sadece parçalama ve embedding tekrar çalışır.
+    """
+
+    def __init__(self, cache_dir: str, extractor_version: str):
+        self.db_path = Path(cache_dir) / "pages.sqlite3"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.extractor_version = extractor_version
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    doc_hash TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    metadata TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    PRIMARY KEY (doc_hash, extractor, page)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # Paralel işçiler aynı dosyaya yazabilir - kilit için bekle
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self, doc_hash: str, source: str) -> Optional[List[Document]]:
+        """Önbellekteki sayfaları döndür, yoksa None"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT metadata, content FROM pages WHERE doc_hash = ? AND extractor = ? ORDER BY page",
+                (doc_hash, self.extractor_version)
+            ).fetchall()
+
+        if not rows:
+            return None
+
+        documents = []
+        for metadata_json, content in rows:
+            metadata = json.loads(metadata_json)
+            # Kaynak adı yüklemeye göre değişebilir, önbellekte tutulmaz
+            metadata["source"] = source
+            documents.append(Document(
+                page_content=zlib.decompress(content).decode("utf-8"),
+                metadata=metadata
+            ))
+        return documents
+
+    def store(self, doc_hash: str, documents: List[Document]):
+        """Belgenin sayfalarını önbelleğe yaz (var olanın yerine)"""
+        rows = []
+        for i, doc in enumerate(documents):
+            metadata = {k: v for k, v in doc.metadata.items() if k != "source"}
+            rows.append((
+                doc_hash,
+                self.extractor_version,
+                doc.metadata.get("page", i + 1),
+                json.dumps(metadata, ensure_ascii=False),
+                zlib.compress(doc.page_content.encode("utf-8"))
+            ))
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE doc_hash = ? AND extractor = ?",
+                         (doc_hash, self.extractor_version))
+            conn.executemany("INSERT INTO pages VALUES (?, ?, ?, ?, ?)", rows)
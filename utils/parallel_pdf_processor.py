@@ -0,0 +1,225 @@
+import os
+import signal
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from langchain.schema import Document
+from config import CHUNK_SIZE, CHUNK_OVERLAP, PDF_PROCESS_WORKERS, PDF_TIMEOUT_SECONDS, PDF_MEMORY_LIMIT_MB
+from utils.advanced_multi_pdf_processor import AdvancedPDFProcessor
+from utils.debug_sink import flush_debug_sink
+
+# Bellek sınırı sadece POSIX sistemlerde uygulanabilir
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# İşçiler temiz bir yorumlayıcıyla başlar (spawn): fork, çok iş parçacıklı ana süreçten
+# (Streamlit, iş kuyruğu) kilit durumunu ve yüklü modellerin belleğini devralırdı
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _process_single_pdf(args: Tuple[str, int, int, bool, int, bool, Optional[Dict], Optional[str], Optional[str]]
+                        ) -> Tuple[List[Document], Dict[str, Any], float]:
+    """İşçi süreçte tek bir PDF'i işle (pickle edilebilir olması için modül seviyesinde)"""
+    pdf_path, chunk_size, chunk_overlap, debug, shard_workers, use_page_cache, previous, file_hash, source_name = args
+    start_time = time.time()
+    processor = AdvancedPDFProcessor(chunk_size, chunk_overlap, debug=debug, shard_workers=shard_workers,
+                                     use_page_cache=use_page_cache)
+    # Önceki revizyon varsa sadece değişen sayfalar işlenir
+    documents, ingest_info = processor.process_pdf_incremental(pdf_path, previous, file_hash, source_name)
+    return documents, ingest_info, time.time() - start_time
+
+
+def _worker_main(conn, memory_limit_mb: int):
+    """İşçi süreç döngüsü: iş al, işle, sonucu gönder (None gelince çık)"""
+    if hasattr(os, "setsid"):
+        # Kendi süreç grubu - öldürülürken sayfa aralığı işçileri de birlikte gider
+        os.setsid()
+    if memory_limit_mb and resource is not None and hasattr(resource, "RLIMIT_DATA"):
+        # RLIMIT_AS ayrılmış (kullanılmayan) sanal alanı da sayar - iş parçacığı yığınları ve
+        # ONNX/BLAS bellek havuzları yüzünden geçerli belgeler başarısız olurdu.
+        # RLIMIT_DATA sadece gerçekten yazılan özel belleği (heap, anonim mmap) sınırlar.
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        try:
+            conn.send(("ok", _process_single_pdf(job)))
+        except MemoryError:
+            conn.send(("fatal", f"Bellek sınırı aşıldı ({memory_limit_mb} MB)"))
+            break  # Bellek durumu belirsiz - işçi yenilenir
+        except Exception as e:
+            conn.send(("error", str(e)))
+    
+    # Süreç çıkmadan önce kuyrukta bekleyen debug raporlarını yaz
+    flush_debug_sink()
+
+
+class _ExtractionWorker:
+    """Tek bir işçi süreç - süre aşımında süreç grubuyla birlikte öldürülür"""
+
+    def __init__(self, memory_limit_mb: int):
+        self.conn, child_conn = _MP_CONTEXT.Pipe()
+        self.process = _MP_CONTEXT.Process(target=_worker_main, args=(child_conn, memory_limit_mb))
+        self.process.start()
+        child_conn.close()
+        self.job_index = None
+        self.started_at = 0.0
+
+    def submit(self, job_index: int, job: Tuple):
+        self.conn.send(job)
+        self.job_index = job_index
+        self.started_at = time.time()
+
+    def kill(self):
+        """Süreci (ve açtığı alt süreçleri) hemen sonlandır"""
+        pid = self.process.pid
+        try:
+            if hasattr(os, "killpg") and os.getpgid(pid) == pid:
+                os.killpg(pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except OSError:
+            pass  # Süreç zaten sonlanmış
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        """İşi yoksa düzgünce kapat, değilse öldür"""
+        if self.job_index is None and self.process.is_alive():
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=5)
+            except OSError:
+                pass
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class ParallelPDFProcessor:
+    """Birden fazla PDF'i yalıtılmış işçi süreçlerde aynı anda çıkar ve parçala
+
+    Her belge için süre (timeout) ve bellek sınırı uygulanır. Sınırı aşan ya da
+    çöken işçi öldürülüp yenisiyle değiştirilir; dosya başarısız olarak
+    raporlanır ve kalan dosyalar işlenmeye devam eder.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP,
+                 debug: bool = False, max_workers: int = PDF_PROCESS_WORKERS,
+                 timeout: float = PDF_TIMEOUT_SECONDS, memory_limit_mb: int = PDF_MEMORY_LIMIT_MB,
+                 use_page_cache: bool = True):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.debug = debug
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.use_page_cache = use_page_cache
+
+    def process_pdfs(self, pdf_paths: List[str], previous_states: List[Optional[Dict]] = None,
+                     file_hashes: List[Optional[str]] = None,
+                     source_names: List[Optional[str]] = None) -> Iterator[Dict[str, Any]]:
+        """PDF'leri işle ve sonuçları giriş sırasıyla döndür
+
+        file_hashes: bilinen SHA-256 özetleri (işçiler dosyayı yeniden özetlemez).
+        source_names: yüklenen dosyaların asıl adları (kaynak metadata'sı ve raporlar için).
+
+        Her sonuç: {"pdf_path", "documents", "error", "elapsed", "ingest_info"}
+        """
+        if not pdf_paths:
+            return
+
+        previous_states = previous_states or [None] * len(pdf_paths)
+        file_hashes = file_hashes or [None] * len(pdf_paths)
+        source_names = source_names or [None] * len(pdf_paths)
+        worker_count = min(self.max_workers, len(pdf_paths))
+        # Tek dosyada işçiler belgenin sayfa aralıklarına, çok dosyada dosyalara dağıtılır
+        shard_workers = self.max_workers if len(pdf_paths) == 1 else 1
+        jobs = [(path, self.chunk_size, self.chunk_overlap, self.debug, shard_workers, self.use_page_cache, previous,
+                 file_hash, source_name)
+                for path, previous, file_hash, source_name in zip(pdf_paths, previous_states, file_hashes, source_names)]
+
+        if self.debug:
+            print(f"⚙️ {len(jobs)} PDF, {worker_count} işçi süreçle işleniyor (süre sınırı {self.timeout} sn)...")
+
+        workers = [_ExtractionWorker(self.memory_limit_mb) for _ in range(worker_count)]
+        next_job = 0
+        next_result = 0
+        results = {}
+        try:
+            while next_result < len(jobs):
+                # Boştaki işçilere iş ver
+                for worker in workers:
+                    if worker.job_index is None and next_job < len(jobs):
+                        worker.submit(next_job, jobs[next_job])
+                        next_job += 1
+
+                # En yakın süre sınırına kadar sonuç bekle (timeout=0: sınırsız)
+                busy = [worker for worker in workers if worker.job_index is not None]
+                remaining = None
+                if self.timeout:
+                    remaining = max(0.0, min(worker.started_at + self.timeout for worker in busy) - time.time())
+                ready = wait([worker.conn for worker in busy], timeout=remaining)
+
+                for i, worker in enumerate(workers):
+                    if worker.job_index is None:
+                        continue
+                    job_index = worker.job_index
+                    pdf_path = jobs[job_index][0]
+                    elapsed = time.time() - worker.started_at
+
+                    if worker.conn in ready:
+                        try:
+                            status, payload = worker.conn.recv()
+                        except (EOFError, OSError):
+                            status, payload = "fatal", "İşçi süreç beklenmedik şekilde sonlandı"
+                        if status == "ok":
+                            results[job_index] = self._result(pdf_path, *payload)
+                        else:
+                            results[job_index] = self._result(pdf_path, elapsed=elapsed, error=Exception(payload))
+                        recycle = status == "fatal"
+                    elif self.timeout and elapsed >= self.timeout:
+                        results[job_index] = self._result(
+                            pdf_path, elapsed=elapsed,
+                            error=Exception(f"Zaman aşımı: {self.timeout:.0f} saniyede tamamlanamadı"))
+                        recycle = True
+                        if self.debug:
+                            print(f"⏱️ {pdf_path} zaman aşımına uğradı, işçi yeniden başlatılıyor")
+                    else:
+                        continue
+
+                    worker.job_index = None
+                    if recycle:
+                        # Çöken, bellek sınırını ya da süreyi aşan işçi temiz bir süreçle değiştirilir
+                        worker.kill()
+                        workers[i] = _ExtractionWorker(self.memory_limit_mb)
+
+                # Sıradaki sonuçlar hazırsa giriş sırasıyla döndür
+                while next_result in results:
+                    yield results.pop(next_result)
+                    next_result += 1
+        finally:
+            for worker in workers:
+                worker.close()
+
+    @staticmethod
+    def _result(pdf_path: str, documents: List[Document] = None, ingest_info: Dict[str, Any] = None,
+                elapsed: float = 0.0, error: Exception = None) -> Dict[str, Any]:
+        return {
+            "pdf_path": pdf_path,
+            "documents": documents,
+            "error": error,
+            "elapsed": elapsed,
+            "ingest_info": ingest_info or {}
+        }
@@ -0,0 +1,92 @@
+from typing import Dict, NamedTuple
+from langchain.schema import Document
+
+TURKISH_CHARS = 'çğıöşüÇĞIİÖŞÜ'
+_DROP_TURKISH = str.maketrans('', '', TURKISH_CHARS)
+
+
+class TextStats(NamedTuple):
+    """Bir sayfa ya da parçanın metin istatistikleri - çıkarma anında bir kez hesaplanır
+
+    Metadata'da tek bir "text_stats" değeri olarak saklanır (format_text_stats);
+    kalite skorları ve Markdown özellik sayısı bu değerlerden türetilir.
+    """
+    chars: int           # Ham metin uzunluğu
+    content_chars: int   # Baş/son boşluklar hariç uzunluk
+    words: int
+    lines: int
+    turkish: int         # Türkçe karakter sayısı
+    headers: int         # '#' sayısı
+    bold: int            # '**' sayısı
+    pipes: int           # '|' sayısı (tablo)
+
+    @property
+    def markdown_features(self) -> int:
+        return self.headers + self.bold + self.pipes
+
+    @property
+    def turkish_ratio(self) -> float:
+        return self.turkish / self.content_chars if self.content_chars else 0.0
+
+    @property
+    def quality_score(self) -> float:
+        """Sayfa metadata'sındaki quality_score"""
+        return self.content_chars + self.markdown_features * 10
+
+    @property
+    def extraction_score(self) -> float:
+        """evaluate_extraction_quality'nin sayfa başına skoru"""
+        score = self.content_chars * 0.3  # Karakter sayısı
+        score += self.words * 2           # Kelime sayısı
+        score += self.lines * 5           # Satır sayısı
+        score += self.turkish_ratio * 100  # Türkçe bonus
+        if self.markdown_features > 0:
+            score += self.markdown_features * 20
+        return score
+
+
+def compute_text_stats(text: str) -> TextStats:
+    """Tüm metrikleri hesapla - tek geçiş değil, metrik başına bir C seviyesi tarama
+
+    strip/split/count/translate metni ayrı ayrı tarar; Python seviyesinde
+    karakter döngüsü yoktur. Maliyet sayfa başına bir kez ödenir, sonrası
+    metadata'dan okunur (get_text_stats).
+    """
+    content = text.strip()
+    return TextStats(
+        chars=len(text),
+        content_chars=len(content),
+        words=len(content.split()),
+        lines=content.count('\n') + 1,
+        turkish=len(content) - len(content.translate(_DROP_TURKISH)),
+        headers=content.count('#'),
+        bold=content.count('**'),
+        pipes=content.count('|')
+    )
+
+
+def format_text_stats(stats: TextStats) -> str:
+    """Metadata için kısa metin: "chars,content_chars,words,lines,turkish,headers,bold,pipes" """
+    return ",".join(str(value) for value in stats)
+
+
+def parse_text_stats(value: str) -> TextStats:
+    return TextStats(*(int(part) for part in value.split(",")))
+
+
+def stats_metadata(text: str) -> Dict[str, object]:
+    """Document metadata'sına yazılacak istatistik alanları"""
+    stats = compute_text_stats(text)
+    return {
+        "text_stats": format_text_stats(stats),
+        "markdown_features": stats.markdown_features,
+        "quality_score": stats.quality_score
+    }
+
+
+def get_text_stats(doc: Document) -> TextStats:
+    """Saklanan istatistikleri oku - eski (istatistiksiz) dökümanlar için hesapla"""
+    value = doc.metadata.get("text_stats")
+    if value:
+        return parse_text_stats(value)
+    return compute_text_stats(doc.page_content)